@@ -4,18 +4,30 @@
 #  Base class for FHIR resources.
 #  2014, SMART Health IT.
 
+import logging
+
 from . import fhirabstractbase
 
+logger = logging.getLogger(__name__)
+
 
 class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
     """ Extends the FHIRAbstractBase with server talking capabilities.
     """
     resource_type = 'FHIRAbstractResource'
     
+    __slots__ = ('_server', '_local_id')
+    
+    id_search_size = 50
+    """ The maximum number of ids `read_many()` searches for at once. """
+    
     def __init__(self, jsondict=None, strict=True):
         self._server = None
         """ The server the instance was read from. """
         
+        self._local_id = None
+        """ The id the instance was read with, if it was read by id. """
+        
         # raise if "resourceType" does not match
         if jsondict is not None and 'resourceType' in jsondict \
             and jsondict['resourceType'] != self.resource_type:
@@ -40,9 +52,22 @@ class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
     
     def as_json(self):
         js = super(FHIRAbstractResource, self).as_json()
+        if js is self._json:        # unmodified trusted JSON, don't alter
+            if js.get('resourceType') == self.resource_type:
+                return js
+            js = dict(js)
         js['resourceType'] = self.resource_type
         return js
     
+    def _json_members(self):
+        members = super(FHIRAbstractResource, self)._json_members()
+        for i, (name, jsname, value) in enumerate(members):
+            if 'resourceType' == jsname:    # unmodified trusted JSON, keep the order
+                members[i] = (name, jsname, self.resource_type)
+                return members
+        members.append(('resourceType', 'resourceType', self.resource_type))
+        return members
+    
     
     # MARK: Handling Paths
     
@@ -74,31 +99,35 @@ class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
         self._server = server
     
     @classmethod
-    def read(cls, rem_id, server):
+    def read(cls, rem_id, server, lazy=False, trusted=False):
         """ Read the resource with the given id from the given server. The
         passed-in server instance must support a `request_json()` method call,
         taking a relative path as first (and only mandatory) argument.
         
         :param str rem_id: The id of the resource on the remote server
         :param FHIRServer server: An instance of a FHIR server or compatible class
+        :param bool lazy: If True, instantiates the resource lazily
+        :param bool trusted: If True, the server's JSON is not validated
         :returns: An instance of the receiving class
         """
         if not rem_id:
             raise Exception("Cannot read resource without remote id")
         
         path = '{}/{}'.format(cls.resource_type, rem_id)
-        instance = cls.read_from(path, server)
+        instance = cls.read_from(path, server, lazy=lazy, trusted=trusted)
         instance._local_id = rem_id
         
         return instance
     
     @classmethod
-    def read_from(cls, path, server):
+    def read_from(cls, path, server, lazy=False, trusted=False):
         """ Requests data from the given REST path on the server and creates
         an instance of the receiving class.
         
         :param str path: The REST path to read from
         :param FHIRServer server: An instance of a FHIR server or compatible class
+        :param bool lazy: If True, instantiates the resource lazily
+        :param bool trusted: If True, the server's JSON is not validated
         :returns: An instance of the receiving class
         """
         if not path:
@@ -107,15 +136,109 @@ class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
             raise Exception("Cannot read resource without server instance")
         
         ret = server.request_json(path)
-        instance = cls(jsondict=ret)
+        if lazy or trusted:
+            with fhirabstractbase._parsing(lazy=lazy, trusted=trusted):
+                instance = cls(jsondict=ret)
+        else:
+            instance = cls(jsondict=ret)
         instance.origin_server = server
         return instance
     
-    def create(self, server):
+    @classmethod
+    def read_many(cls, ids, server, max_workers=4, lazy=False, trusted=False):
+        """ Read the resources with the given ids from the given server,
+        issuing up to `max_workers` requests concurrently.
+        
+        If the server's CapabilityStatement has been fetched and lists the
+        "_id" search parameter for the receiving resource type, the resources
+        are first requested with searches for up to `id_search_size` ids each;
+        only those missing from their results are then read one by one.
+        
+        :param list ids: The ids of the resources on the remote server
+        :param FHIRServer server: An instance of a FHIR server or compatible class
+        :param int max_workers: The maximum number of concurrent requests
+        :param bool lazy: If True, instantiates the resources lazily
+        :param bool trusted: If True, the server's JSON is not validated
+        :returns: A list of `(instance, error)` tuples in the order of `ids`;
+            `error` is None or the exception raised reading that id, which
+            includes empty ids
+        """
+        if server is None:
+            raise Exception("Cannot read resources without server instance")
+        
+        results = {}
+        wanted = []
+        for rem_id in ids:
+            if rem_id not in results:
+                results[rem_id] = None
+                wanted.append(rem_id)
+        
+        # empty ids are left to `read()`, which fails on them
+        searched = [rem_id for rem_id in wanted if rem_id]
+        supports = getattr(server, 'supports_search_param', None)
+        if len(searched) > 1 and supports is not None and supports(cls.resource_type, '_id'):
+            results.update(cls._search_ids(searched, server, lazy, trusted))
+        
+        def read_one(rem_id):
+            try:
+                return (cls.read(rem_id, server, lazy=lazy, trusted=trusted), None)
+            except Exception as e:
+                return (None, e)
+        
+        missing = [rem_id for rem_id in wanted if results[rem_id] is None]
+        if len(missing) > 1 and max_workers > 1:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(min(max_workers, len(missing)))
+            try:
+                read = pool.map(read_one, missing)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            read = [read_one(rem_id) for rem_id in missing]
+        results.update(zip(missing, read))
+        
+        return [results[rem_id] for rem_id in ids]
+    
+    @classmethod
+    def _search_ids(cls, ids, server, lazy, trusted):
+        """ Searches the resources with the given ids using the "_id" search
+        parameter, searching for `id_search_size` ids at a time so that URLs
+        stay short and servers don't cap the page size.
+        
+        :returns: A dict of `(instance, None)` tuples for the ids found,
+            lacking the ids of searches that failed
+        """
+        found = {}
+        size = max(1, cls.id_search_size)
+        for start in range(0, len(ids), size):
+            chunk = ids[start:start + size]
+            wanted = set(chunk)
+            search = cls.where({'_id': ','.join(chunk), '_count': str(len(chunk))})
+            try:
+                for resource in search.perform_stream(server, lazy=lazy, trusted=trusted).resources():
+                    if resource.resource_type == cls.resource_type and resource.id in wanted:
+                        resource._owner = None
+                        resource._local_id = resource.id
+                        resource.origin_server = server
+                        found[resource.id] = (resource, None)
+            except Exception as e:
+                logger.warning("Searching {} resources by id failed, reading one by one: {}"
+                    .format(cls.resource_type, e))
+        return found
+    
+    def create(self, server, stream=False):
         """ Attempt to create the receiver on the given server, using a POST
         command.
         
+        With `stream` set, the receiver's JSON is not built in memory but
+        streamed as a chunked body, see `iter_json()`, which pays off for
+        large resources like Bundles. The receiver is validated before
+        anything is sent, so an invalid resource never leaves a request
+        half-sent.
+        
         :param FHIRServer server: The server to create the receiver on
+        :param bool stream: If True, streams the receiver's JSON
         :returns: None or the response JSON on success
         """
         srv = server or self.origin_server
@@ -124,17 +247,19 @@ class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
         if self.id:
             raise Exception("This resource already has an id, cannot create")
         
-        ret = srv.post_json(self.relativeBase(), self.as_json())
+        ret = srv.post_json(self.relativeBase(), self._request_json(stream))
         if len(ret.text) > 0:
             return ret.json()
         return None
     
-    def update(self, server=None):
+    def update(self, server=None, stream=False):
         """ Update the receiver's representation on the given server, issuing
         a PUT command.
         
         :param FHIRServer server: The server to update the receiver on;
             optional, will use the instance's `server` if needed.
+        :param bool stream: If True, streams the receiver's JSON, see
+            `create()`
         :returns: None or the response JSON on success
         """
         srv = server or self.origin_server
@@ -143,11 +268,21 @@ class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
         if not self.id:
             raise Exception("Cannot update a resource that does not have an id")
         
-        ret = srv.put_json(self.relativePath(), self.as_json())
+        ret = srv.put_json(self.relativePath(), self._request_json(stream))
         if len(ret.text) > 0:
             return ret.json()
         return None
     
+    def _request_json(self, stream):
+        """ The body to pass to the server's `post_json()` or `put_json()`:
+        the receiver's JSON dictionary or, if `stream` is set, the receiver
+        itself, validated, which the server then serializes while sending.
+        """
+        if not stream:
+            return self.as_json()
+        self.validate_json()
+        return self
+    
     def delete(self, server=None):
         """ Delete the receiver from the given server with a DELETE command.
         
@@ -167,6 +302,67 @@ class FHIRAbstractResource(fhirabstractbase.FHIRAbstractBase):
         return None
     
     
+    # MARK: - Asynchronous Server Connection
+    
+    @classmethod
+    def read_async(cls, rem_id, server, lazy=False, trusted=False):
+        """ Coroutine counterpart of `read`, requesting the resource from the
+        server's `async_server`. Requires Python 3.6 and 'aiohttp'.
+        
+        :param str rem_id: The id of the resource on the remote server
+        :param server: A FHIRServer or FHIRAsyncServer instance
+        :param bool lazy: If True, instantiates the resource lazily
+        :param bool trusted: If True, the server's JSON is not validated
+        :returns: A coroutine returning an instance of the receiving class
+        """
+        from . import fhirasync
+        return fhirasync.read(cls, rem_id, server, lazy=lazy, trusted=trusted)
+    
+    @classmethod
+    def read_from_async(cls, path, server, lazy=False, trusted=False):
+        """ Coroutine counterpart of `read_from`.
+        
+        :param str path: The REST path to read from
+        :param server: A FHIRServer or FHIRAsyncServer instance
+        :param bool lazy: If True, instantiates the resource lazily
+        :param bool trusted: If True, the server's JSON is not validated
+        :returns: A coroutine returning an instance of the receiving class
+        """
+        from . import fhirasync
+        return fhirasync.read_from(cls, path, server, lazy=lazy, trusted=trusted)
+    
+    def create_async(self, server, stream=False):
+        """ Coroutine counterpart of `create`.
+        
+        :param server: A FHIRServer or FHIRAsyncServer instance
+        :param bool stream: If True, streams the receiver's JSON
+        :returns: A coroutine returning None or the response JSON
+        """
+        from . import fhirasync
+        return fhirasync.create(self, server, stream=stream)
+    
+    def update_async(self, server=None, stream=False):
+        """ Coroutine counterpart of `update`.
+        
+        :param server: A FHIRServer or FHIRAsyncServer instance; optional,
+            will use the instance's `server` if needed.
+        :param bool stream: If True, streams the receiver's JSON
+        :returns: A coroutine returning None or the response JSON
+        """
+        from . import fhirasync
+        return fhirasync.update(self, server, stream=stream)
+    
+    def delete_async(self, server=None):
+        """ Coroutine counterpart of `delete`.
+        
+        :param server: A FHIRServer or FHIRAsyncServer instance; optional,
+            will use the instance's `server` if needed.
+        :returns: A coroutine returning None or the response JSON
+        """
+        from . import fhirasync
+        return fhirasync.delete(self, server)
+    
+    
     # MARK: - Search
     
     def search(self, struct=None):
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Coroutines performing the REST interactions of resources and searches
+#  against a `FHIRAsyncServer`. Requires Python 3.6 or newer.
+#
+#  Use the `_async` methods on `FHIRAbstractResource` and `FHIRSearch`, which
+#  import this module on demand, rather than calling these directly.
+
+from . import fhirabstractbase
+
+
+def _async_server(server):
+    """ The `FHIRAsyncServer` for the given server, which may be a
+    `FHIRServer` or a `FHIRAsyncServer`.
+    """
+    try:
+        return server.async_server
+    except AttributeError:
+        raise Exception("Server {} does not support asynchronous requests".format(server))
+
+def _instantiate(cls, jsondict, lazy, trusted):
+    if lazy or trusted:
+        with fhirabstractbase._parsing(lazy=lazy, trusted=trusted):
+            return cls(jsondict=jsondict)
+    return cls(jsondict=jsondict)
+
+async def _response_json(res):
+    text = await res.text()
+    if len(text) > 0:
+        return await res.json(content_type=None)
+    return None
+
+
+# MARK: Resources
+
+async def read(cls, rem_id, server, lazy=False, trusted=False):
+    """ See `FHIRAbstractResource.read_async()`.
+    """
+    if not rem_id:
+        raise Exception("Cannot read resource without remote id")
+    
+    path = '{}/{}'.format(cls.resource_type, rem_id)
+    instance = await read_from(cls, path, server, lazy=lazy, trusted=trusted)
+    instance._local_id = rem_id
+    
+    return instance
+
+async def read_from(cls, path, server, lazy=False, trusted=False):
+    """ See `FHIRAbstractResource.read_from_async()`.
+    """
+    if not path:
+        raise Exception("Cannot read resource without REST path")
+    if server is None:
+        raise Exception("Cannot read resource without server instance")
+    
+    srv = _async_server(server)
+    ret = await srv.request_json(path)
+    instance = _instantiate(cls, ret, lazy, trusted)
+    instance.origin_server = srv.server
+    return instance
+
+async def create(resource, server, stream=False):
+    """ See `FHIRAbstractResource.create_async()`.
+    """
+    srv = server or resource.origin_server
+    if srv is None:
+        raise Exception("Cannot create a resource without a server")
+    if resource.id:
+        raise Exception("This resource already has an id, cannot create")
+    
+    ret = await _async_server(srv).post_json(resource.relativeBase(), resource._request_json(stream))
+    return await _response_json(ret)
+
+async def update(resource, server=None, stream=False):
+    """ See `FHIRAbstractResource.update_async()`.
+    """
+    srv = server or resource.origin_server
+    if srv is None:
+        raise Exception("Cannot update a resource that does not have a server")
+    if not resource.id:
+        raise Exception("Cannot update a resource that does not have an id")
+    
+    ret = await _async_server(srv).put_json(resource.relativePath(), resource._request_json(stream))
+    return await _response_json(ret)
+
+async def delete(resource, server=None):
+    """ See `FHIRAbstractResource.delete_async()`.
+    """
+    srv = server or resource.origin_server
+    if srv is None:
+        raise Exception("Cannot delete a resource that does not have a server")
+    if not resource.id:
+        raise Exception("Cannot delete a resource that does not have an id")
+    
+    ret = await _async_server(srv).delete_json(resource.relativePath())
+    return await _response_json(ret)
+
+
+# MARK: Search
+
+async def perform(search, server, lazy=False):
+    """ See `FHIRSearch.perform_async()`.
+    """
+    if server is None:
+        raise Exception("Need a server to perform search")
+    
+    from . import bundle
+    srv = _async_server(server)
+    res = await srv.request_json(search.construct())
+    instance = _instantiate(bundle.Bundle, res, lazy, False)
+    instance.origin_server = srv.server
+    return instance
+
+async def perform_resources(search, server, lazy=False):
+    """ See `FHIRSearch.perform_resources_async()`.
+    """
+    bundle = await perform(search, server, lazy=lazy)
+    resources = []
+    if bundle is not None and bundle.entry is not None:
+        for entry in bundle.entry:
+            resources.append(entry.resource)
+    
+    return resources
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Incrementally read Bundles from a stream of JSON data.
+
+import re
+import json
+import codecs
+
+from . import bundle
+from . import fhirabstractbase
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+class FHIRBundleReader(object):
+    """ Reads the JSON of a Bundle from an iterable of chunks, e.g. the body
+    of a streamed response, and instantiates one `BundleEntry` at a time.
+    Only the JSON of the entry currently being read is kept in memory, so
+    memory use is bounded by the largest entry rather than by the size of
+    the Bundle.
+    
+    Iterate the reader (once) to get the entries. The Bundle's other
+    properties are available on `bundle` after all entries have been read;
+    its `entry` property stays empty.
+    """
+    
+    def __init__(self, chunks, server=None, lazy=False, trusted=False):
+        """ Initializer.
+        
+        :param chunks: An iterable of bytes (UTF-8) or str with the JSON
+        :param FHIRServer server: The server the Bundle is read from
+        :param bool lazy: If True, instantiates entries lazily
+        :param bool trusted: If True, the JSON data is not validated
+        """
+        self.bundle = bundle.Bundle()
+        """ The Bundle, without entries; complete after reading all entries. """
+        
+        self.bundle.origin_server = server
+        
+        self.lazy = lazy
+        """ Whether entries are instantiated lazily. """
+        
+        self.trusted = trusted
+        """ Whether the JSON data is trusted and not validated. """
+        
+        self._chunks = iter(chunks)
+        self._started = False
+        self._eof = False
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self._buffer = ''
+        self._pos = 0
+    
+    def __iter__(self):
+        if self._started:
+            raise Exception("A FHIRBundleReader can only be iterated once")
+        self._started = True
+        return self._entries()
+    
+    def resources(self):
+        """ Iterates the reader, yielding the resource of each entry.
+        
+        :returns: A generator of Resource instances
+        """
+        for entry in self:
+            if entry.resource is not None:
+                yield entry.resource
+    
+    
+    # MARK: Parsing
+    
+    def _entries(self):
+        """ Parses the top level Bundle object, decoding its members as a
+        whole except for "entry", whose items are decoded and instantiated
+        one by one.
+        """
+        members = {}
+        self._expect('{')
+        if '}' == self._skip_whitespace():
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(':')
+                if 'entry' == key:
+                    for i, jsondict in enumerate(self._array_items()):
+                        yield self._instantiate(jsondict, i)
+                else:
+                    members[key] = self._value()
+                    if 'resourceType' == key and 'Bundle' != members[key]:
+                        raise Exception("Attempting to read a Bundle from resource data that defines a resourceType of \"{}\""
+                            .format(members[key]))
+                if '}' == self._expect(',}'):
+                    break
+        
+        with fhirabstractbase._parsing(lazy=self.lazy, trusted=self.trusted):
+            self.bundle.update_with_json(members)
+    
+    def _instantiate(self, jsondict, index):
+        with fhirabstractbase._parsing(lazy=self.lazy, trusted=self.trusted):
+            try:
+                entry = bundle.BundleEntry(jsondict)
+            except fhirabstractbase.FHIRValidationError as e:
+                raise e.prefixed(str(index)).prefixed('entry')
+        entry._owner = self.bundle
+        return entry
+    
+    def _array_items(self):
+        """ Generates the decoded items of the JSON array starting at the
+        current position.
+        """
+        self._expect('[')
+        if ']' == self._skip_whitespace():
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if ']' == self._expect(',]'):
+                return
+    
+    def _value(self):
+        """ Decodes the JSON value at the current position, reading until it
+        is complete. Each retry reads at least as much data again as is
+        buffered, so large values are decoded a logarithmic number of times.
+        """
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+                
+                # a number may continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except ValueError:
+                if self._eof:
+                    raise
+            self._read(len(self._buffer) - self._pos)
+    
+    def _skip_whitespace(self):
+        """ Advances past whitespace, reading as needed.
+        
+        :returns: The next character, None at the end of the data
+        """
+        while True:
+            self._pos = _whitespace.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return None
+    
+    def _expect(self, chars):
+        """ Consumes the next non-whitespace character, which must be one of
+        `chars`.
+        
+        :raises: ValueError if another character or no character is found
+        :returns: The character consumed
+        """
+        char = self._skip_whitespace()
+        if char is None or char not in chars:
+            raise ValueError("Expecting one of \"{}\" but found {} while reading Bundle JSON"
+                .format(chars, repr(char) if char is not None else "the end of the data"))
+        self._pos += 1
+        return char
+    
+    def _read(self, minimum=1):
+        """ Appends at least `minimum` characters to the buffer, unless the
+        data ends, dropping the consumed part of the buffer.
+        
+        :returns: True if characters were appended
+        """
+        if self._eof:
+            return False
+        
+        added = []
+        size = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decode(chunk)
+            added.append(chunk)
+            size += len(chunk)
+            if size >= max(minimum, 1):
+                break
+        else:
+            self._eof = True
+            added.append(self._decode(b'', True))
+        
+        self._buffer = self._buffer[self._pos:] + ''.join(added)
+        self._pos = 0
+        return size > 0
@@ -13,6 +13,8 @@ class FHIRReference(reference.Reference):
     """ Subclassing FHIR's `Reference` resource to add resolving capabilities.
     """
     
+    __slots__ = ()
+    
     def resolved(self, klass):
         """ Resolves the reference and caches the result, returning instance(s)
         of the referenced classes.
@@ -60,13 +62,13 @@ class FHIRReference(reference.Reference):
                     base = bundle.origin_server.base_uri if bundle.origin_server else ''
                     fullUrl = base + self.reference
                 
-                for entry in bundle.entry:
-                    if entry.fullUrl == fullUrl:
-                        found = entry.resource
-                        if isinstance(found, klass):
-                            return found
-                        logger.warning("Bundled resource {} is not a {} but a {}".format(refid, klass, found.__class__))
-                        return None
+                index = _entry_index(bundle)
+                if fullUrl in index:
+                    found = index[fullUrl]
+                    if isinstance(found, klass):
+                        return found
+                    logger.warning("Bundled resource {} is not a {} but a {}".format(refid, klass, found.__class__))
+                    return None
             bundle = bundle.owningBundle()
         
         # relative references, use the same server
@@ -80,11 +82,128 @@ class FHIRReference(reference.Reference):
                 .format(self.reference))
             return None
         
-        # fetch remote resource; unable to verify klass since we use klass.read_from()
+        # fetch remote resource, or take it from the server's reference cache
+        cache = getattr(server, 'reference_cache', None)
+        if cache is not None:
+            relative = cache.resolved(server.base_uri + self.reference,
+                lambda: klass.read_from(self.reference, server))
+            owning_resource.didResolveReference(refid, relative)
+            if isinstance(relative, klass):
+                return relative
+            logger.warning("Referenced resource {} is not a {} but a {}".format(refid, klass, relative.__class__))
+            return None
+        
+        # unable to verify klass since we use klass.read_from()
         relative = klass.read_from(self.reference, server)
         owning_resource.didResolveReference(refid, relative)
         return relative
     
+    @classmethod
+    def resolve_all(cls, resources, server=None, max_workers=4):
+        """ Resolves all relative references found in the given resources,
+        e.g. those of a search result Bundle, in one pass: references are
+        grouped by resource type and each group is read with
+        `FHIRAbstractResource.read_many()`, which uses an "_id" search if
+        the server supports it and concurrent reads otherwise. The resolved
+        resources are cached by the owning resources, so subsequent calls to
+        `resolved()` don't hit the server. If the server has a
+        `reference_cache`, resources found there aren't read again, and
+        those read are stored there.
+        
+        References that are contained, absolute, versioned, already resolved
+        or found in an owning Bundle are skipped.
+        
+        :param resources: A resource, e.g. a Bundle, or a list of resources
+        :param FHIRServer server: The server to read from; defaults to the
+            server each owning resource was read from
+        :param int max_workers: The maximum number of concurrent requests
+        :returns: A dict of `(instance, error)` tuples by reference
+        """
+        if isinstance(resources, fhirabstractbase.FHIRAbstractBase):
+            resources = [resources]
+        
+        groups = {}
+        results = {}
+        for resource in resources:
+            for ref in _references(resource):
+                owner = ref.owningResource()
+                refid = ref.processedReferenceIdentifier()
+                parts = refid.split('/') if refid else []
+                if owner is None or len(parts) != 2 or '#' == refid[0] or owner.resolvedReference(refid) is not None:
+                    continue
+                srv = server or owner.origin_server
+                if srv is None or ref._bundled(srv):
+                    continue
+                cache = getattr(srv, 'reference_cache', None)
+                cached = cache.get(srv.base_uri + refid) if cache is not None else None
+                if cached is not None:
+                    owner.didResolveReference(refid, cached)
+                    results[refid] = (cached, None)
+                    continue
+                groups.setdefault((srv, parts[0]), []).append((ref, owner, refid, parts[1]))
+        
+        for (srv, resource_type), refs in groups.items():
+            klass = fhirelementfactory.FHIRElementFactory.class_for(resource_type)
+            if klass is None:
+                logger.warning("Cannot resolve references to unknown resource type {}".format(resource_type))
+                continue
+            read = klass.read_many([rem_id for ref, owner, refid, rem_id in refs], srv, max_workers=max_workers)
+            cache = getattr(srv, 'reference_cache', None)
+            stored = set()
+            for (ref, owner, refid, rem_id), (instance, error) in zip(refs, read):
+                results[refid] = (instance, error)
+                if instance is not None:
+                    owner.didResolveReference(refid, instance)
+                    if cache is not None and refid not in stored:
+                        cache.put(srv.base_uri + refid, instance)
+                        stored.add(refid)
+        return results
+    
+    @classmethod
+    def resolve_from(cls, resources, available, server=None):
+        """ Resolves the references found in the given resources to resources
+        at hand, e.g. those a search returned because of "_include", without
+        any request. The resources are cached by the owning resources, so
+        `resolved()` returns them; other references are left alone.
+        
+        :param resources: A resource or a list of resources
+        :param available: A list of resources to resolve references to
+        :param FHIRServer server: The server the resources were read from,
+            to also match absolute references
+        :returns: The number of references resolved
+        """
+        if isinstance(resources, fhirabstractbase.FHIRAbstractBase):
+            resources = [resources]
+        
+        index = {}
+        for resource in available:
+            if resource.id:
+                path = resource.relativePath()
+                index[path] = resource
+                if server is not None and server.base_uri:
+                    index[server.base_uri + path] = resource
+        
+        count = 0
+        for resource in resources:
+            for ref in _references(resource):
+                found = index.get(ref.reference) if ref.reference else None
+                owner = ref.owningResource()
+                if found is not None and owner is not None:
+                    owner.didResolveReference(ref.processedReferenceIdentifier(), found)
+                    count += 1
+        return count
+    
+    def _bundled(self, server):
+        """ Whether an owning Bundle has an entry with the reference's URL.
+        """
+        fullUrl = server.base_uri + self.reference
+        bundle = self.owningBundle()
+        while bundle is not None:
+            if fullUrl in _entry_index(bundle):
+                return True
+            bundle = bundle.owningBundle()
+        return False
+    
     def processedReferenceIdentifier(self):
         """ Normalizes the reference-id.
         """
@@ -92,3 +211,41 @@ class FHIRReference(reference.Reference):
             return self.reference[1:]
         return self.reference
 
+
+
+def _entry_index(bundle):
+    """ The resources of the given Bundle's entries by full URL, built once
+    and kept with the Bundle until its entries change (unless the Bundle
+    class was generated with `__slots__`).
+    """
+    entries = bundle.entry or []
+    cached = getattr(bundle, '_entry_index', None)
+    if cached is not None and cached[0] is entries and cached[1] == len(entries):
+        return cached[2]
+    
+    index = {}
+    for entry in entries:
+        if entry.fullUrl and entry.fullUrl not in index:
+            index[entry.fullUrl] = entry.resource
+    try:
+        bundle._entry_index = (entries, len(entries), index)
+    except AttributeError:
+        pass
+    return index
+
+def _references(element):
+    """ Generates the FHIRReference instances in the given element's tree,
+    walking the properties of the elements' compiled schemas.
+    """
+    for name, jsname, typ, is_list, of_many, not_optional in element._element_schema().properties:
+        value = getattr(element, name, None)
+        for item in (value if is_list and value is not None else [value]):
+            if isinstance(item, FHIRReference):
+                yield item
+            elif isinstance(item, fhirabstractbase.FHIRAbstractBase):
+                for ref in _references(item):
+                    yield ref
+
+
+from . import fhirabstractbase
+from . import fhirelementfactory
@@ -6,8 +6,13 @@
 
 try:
     from urllib import quote_plus
+    from urlparse import urljoin, urlsplit, urlunsplit
 except Exception as e:
-    from urllib.parse import quote_plus
+    from urllib.parse import quote_plus, urljoin, urlsplit, urlunsplit
+
+import threading
+
+from . import fhirabstractbase
 
 
 class FHIRSearch(object):
@@ -24,6 +29,9 @@ class FHIRSearch(object):
         self.wants_expand = False
         """ Used internally; whether or not `params` must be expanded first. """
         
+        self.includes = []
+        """ Tuples of "_include" or "_revinclude" parameter names and values. """
+        
         if struct is not None:
             if dict != type(struct):
                 raise Exception("Must pass a Python dictionary, but got a {}".format(type(struct)))
@@ -32,6 +40,37 @@ class FHIRSearch(object):
                 self.params.append(FHIRSearchParam(key, val))
     
     
+    def include(self, reference, iterate=False):
+        """ Asks the server to include the resources referenced by the given
+        search parameter with the results, in the same Bundle.
+        
+        :param str reference: The reference search parameter, e.g.
+            "medication" or "MedicationRequest:medication"; the searched type
+            is prepended if there is no colon
+        :param bool iterate: If True, also include resources referenced by
+            included resources
+        :returns: The receiver, for chaining
+        """
+        if ':' not in reference:
+            reference = '{}:{}'.format(self.resource_type.resource_type, reference)
+        self.includes.append(('_include:iterate' if iterate else '_include', reference))
+        return self
+    
+    def revinclude(self, reference, iterate=False):
+        """ Asks the server to include the resources referencing the results
+        via the given search parameter, in the same Bundle.
+        
+        :param str reference: The referencing type and search parameter,
+            e.g. "Provenance:target"
+        :param bool iterate: If True, apply to included resources as well
+        :returns: The receiver, for chaining
+        """
+        if ':' not in reference:
+            raise Exception('Need the referencing resource type in "{}", e.g. "Provenance:target"'.format(reference))
+        self.includes.append(('_revinclude:iterate' if iterate else '_revinclude', reference))
+        return self
+    
+    
     # MARK: Execution
     
     def construct(self):
@@ -48,38 +87,211 @@ class FHIRSearch(object):
                         parts.append(expanded.as_parameter())
                 else:
                     parts.append(param.as_parameter())
+        for name, value in self.includes:
+            parts.append('{}={}'.format(name, quote_plus(value, safe=':*')))
         
         return '{}?{}'.format(self.resource_type.resource_type, '&'.join(parts))
     
-    def perform(self, server):
+    def perform(self, server, lazy=False):
         """ Construct the search URL and execute it against the given server.
         
         :param server: The server against which to perform the search
+        :param bool lazy: If True, instantiates the Bundle lazily
         :returns: A Bundle resource
         """
         if server is None:
             raise Exception("Need a server to perform search")
         
+        return self._read_bundle(server, self.construct(), lazy, False)
+    
+    def perform_iter(self, server, count=None, max_results=None, prefetch=False, lazy=False, trusted=False):
+        """ Performs the search and follows the "next" links of the returned
+        Bundles, yielding the resources of all pages. Only links to the
+        server's `base_uri` are followed, as the requests are signed.
+        
+        :param server: The server against which to perform the search
+        :param int count: The page size to ask the server for, via "_count"
+        :param int max_results: If given, stops after this many resources
+        :param bool prefetch: If True, requests the next page in a background
+            thread while the resources of the current page are consumed
+        :param bool lazy: If True, instantiates the resources lazily
+        :param bool trusted: If True, the server's JSON is not validated
+        :raises: Exception if a "next" link leads off the server
+        :returns: A generator of Resource instances
+        """
+        if server is None:
+            raise Exception("Need a server to perform search")
+        
+        path = self.construct()
+        if count is not None:
+            path += '{}_count={}'.format('' if path.endswith('?') else '&', count)
+        
+        yielded = 0
+        bundle = self._read_bundle(server, path, lazy, trusted)
+        while bundle is not None:
+            entries = bundle.entry or []
+            next_path = self._next_link(bundle, server.base_uri, path)
+            upcoming = None
+            if next_path is not None and prefetch and (max_results is None or yielded + len(entries) < max_results):
+                upcoming = _in_background(self._read_bundle, server, next_path, lazy, trusted)
+            
+            for entry in entries:
+                if max_results is not None and yielded >= max_results:
+                    return
+                if entry.resource is not None:
+                    yielded += 1
+                    yield entry.resource
+            
+            if next_path is None or (max_results is not None and yielded >= max_results):
+                return
+            path = next_path
+            bundle = upcoming() if upcoming is not None else self._read_bundle(server, path, lazy, trusted)
+    
+    def perform_stream(self, server, lazy=False, trusted=False):
+        """ Construct the search URL and execute it against the given server,
+        reading the resulting Bundle incrementally as its entries are
+        iterated, rather than holding all entries in memory.
+        
+        :param server: The server against which to perform the search
+        :param bool lazy: If True, instantiates the entries lazily
+        :param bool trusted: If True, the server's JSON is not validated
+        :returns: A FHIRBundleReader, to be iterated for BundleEntry instances
+        """
+        if server is None:
+            raise Exception("Need a server to perform search")
+        
+        from . import fhirbundlereader
+        chunks = server.request_json_stream(self.construct())
+        return fhirbundlereader.FHIRBundleReader(chunks, server=server, lazy=lazy, trusted=trusted)
+    
+    def _read_bundle(self, server, path, lazy, trusted):
         from . import bundle
-        res = server.request_json(self.construct())
-        bundle = bundle.Bundle(res)
-        bundle.origin_server = server
-        return bundle
+        res = server.request_json(path)
+        if lazy or trusted:
+            with fhirabstractbase._parsing(lazy=lazy, trusted=trusted):
+                instance = bundle.Bundle(res)
+        else:
+            instance = bundle.Bundle(res)
+        instance.origin_server = server
+        return instance
+    
+    def _next_link(self, bundle, base_uri, path):
+        """ The path of the Bundle's "next" link relative to `base_uri`, None
+        if there is none or it points back to `path`, the path of the Bundle.
+        
+        :raises: Exception if the link doesn't lead to a URL below `base_uri`
+        """
+        for link in bundle.link or []:
+            if 'next' == link.relation:
+                if not link.url:
+                    return None
+                base = _normalized_url(base_uri)
+                url = _normalized_url(urljoin(base_uri, link.url))
+                if not url.startswith(base):
+                    raise Exception('Not following the "next" link to {}, which is not on the server at {}'
+                        .format(link.url, base_uri))
+                if url == _normalized_url(urljoin(base_uri, path)):
+                    return None
+                return url[len(base):]
+        return None
     
-    def perform_resources(self, server):
+    def perform_resources(self, server, lazy=False):
         """ Performs the search by calling `perform`, then extracts all Bundle
         entries and returns a list of Resource instances.
         
         :param server: The server against which to perform the search
+        :param bool lazy: If True, instantiates the resources lazily
         :returns: A list of Resource instances
         """
-        bundle = self.perform(server)
+        bundle = self.perform(server, lazy=lazy)
         resources = []
         if bundle is not None and bundle.entry is not None:
             for entry in bundle.entry:
                 resources.append(entry.resource)
-            
+        
         return resources
+    
+    def perform_with_includes(self, server, lazy=False):
+        """ Performs the search by calling `perform`, then separates the
+        matching resources from those the server included because of
+        `include()` or `revinclude()`. References between the returned
+        resources are resolved right away, so `FHIRReference.resolved()`
+        returns included resources without a request.
+        
+        :param server: The server against which to perform the search
+        :param bool lazy: If True, instantiates the resources lazily
+        :returns: A tuple of a list of matching and a list of included
+            Resource instances
+        """
+        bundle = self.perform(server, lazy=lazy)
+        matches = []
+        included = []
+        for entry in bundle.entry or []:
+            if entry.resource is None:
+                continue
+            mode = entry.search.mode if entry.search is not None else None
+            if 'include' == mode:
+                included.append(entry.resource)
+            elif 'outcome' != mode:
+                matches.append(entry.resource)
+        
+        if len(included) > 0:
+            from . import fhirreference
+            fhirreference.FHIRReference.resolve_from(matches + included, included, server)
+        return matches, included
+    
+    def perform_async(self, server, lazy=False):
+        """ Coroutine counterpart of `perform`, requesting the search from the
+        server's `async_server`. Requires Python 3.6 and 'aiohttp'.
+        
+        :param server: A FHIRServer or FHIRAsyncServer instance
+        :param bool lazy: If True, instantiates the Bundle lazily
+        :returns: A coroutine returning a Bundle resource
+        """
+        from . import fhirasync
+        return fhirasync.perform(self, server, lazy=lazy)
+    
+    def perform_resources_async(self, server, lazy=False):
+        """ Coroutine counterpart of `perform_resources`.
+        
+        :param server: A FHIRServer or FHIRAsyncServer instance
+        :param bool lazy: If True, instantiates the resources lazily
+        :returns: A coroutine returning a list of Resource instances
+        """
+        from . import fhirasync
+        return fhirasync.perform_resources(self, server, lazy=lazy)
+
+
+def _normalized_url(url):
+    """ The URL with lowercased scheme and host and without fragment, for
+    comparison with other URLs.
+    """
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+def _in_background(func, *args):
+    """ Calls `func` with the given arguments on a daemon thread.
+    
+    :returns: A function waiting for and returning the result, re-raising
+        the exception `func` raised
+    """
+    result = {}
+    def run():
+        try:
+            result['value'] = func(*args)
+        except Exception as e:
+            result['error'] = e
+    
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    
+    def wait():
+        thread.join()
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+    return wait
 
 
 class FHIRSearchParam(object):
@@ -260,7 +472,7 @@ class FHIRSearchParamTypeHandler(FHIRSearchParamHandler):
     
     def apply(self, param):
         param.name = '{}:{}'.format(param.name, self.value)
-    
+
 
 # announce all handlers
 FHIRSearchParamHandler.announce_handler(FHIRSearchParamModifierHandler)
@@ -33,3 +33,6 @@ if '__main__' == __name__:
     print('')
     print('8 '+FHIRSearch(Patient, {"name": {"$and": ["Willis", {"$exact": "Bruce"}]}, "birthDay": {"$and": [{"$lt": "1970", "$gte": "1950"}]}}).construct())
     print('= Patient?name=Willis&name:exact=Bruce&birthDay=>=1950&birthDay=<1970')
+    print('')
+    print('9 '+FHIRSearch(Patient, {'name': 'Willis'}).include('general-practitioner').revinclude('Provenance:target', iterate=True).construct())
+    print('= Patient?name=Willis&_include=Patient:general-practitioner&_revinclude:iterate=Provenance:target')
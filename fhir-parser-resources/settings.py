@@ -37,4 +37,7 @@ manual_profiles = [
     ('../fhir-parser-resources/fhirreference.py', 'fhirreference', ['FHIRReference']),
     ('../fhir-parser-resources/fhirdate.py', 'fhirdate', ['date', 'dateTime', 'instant', 'time']),
     ('../fhir-parser-resources/fhirsearch.py', 'fhirsearch', ['FHIRSearch']),
+    ('../fhir-parser-resources/fhirbundlereader.py', 'fhirbundlereader', ['FHIRBundleReader']),
+    ('../fhir-parser-resources/fhirbatch.py', 'fhirbatch', ['FHIRBatchWriter']),
+    ('../fhir-parser-resources/fhirasync.py', 'fhirasync', []),
 ]
@@ -4,11 +4,52 @@
 #  Generated from FHIR {{ info.version }} on {{ info.date }}.
 #  {{ info.year }}, SMART Health IT.
 
+import importlib
+
 
 class FHIRElementFactory(object):
     """ Factory class to instantiate resources by resource name.
     """
     
+    modules = {
+    {%- for klass in classes %}{% if klass.resource_type %}
+        "{{ klass.resource_type }}": ("{{ klass.module }}", "{{ klass.name }}"),
+    {%- endif %}{% endfor %}
+    }
+    """ Maps resource type names to the module and name of their class. """
+    
+    classes = {}
+    """ Maps resource type names to imported or registered classes. """
+    
+    @classmethod
+    def register(cls, klass, resource_type=None):
+        """ Registers a class, typically a subclass of a generated class
+        implementing a profile, to be instantiated for the given resource
+        type. Can be used as a class decorator.
+        
+        :param type klass: The class to instantiate
+        :param str resource_type: The resource type; defaults to the class's
+            `resource_type`
+        :returns: The class
+        """
+        cls.classes[resource_type or klass.resource_type] = klass
+        return klass
+    
+    @classmethod
+    def class_for(cls, resource_type):
+        """ Returns the class to instantiate for the given resource type,
+        importing its module the first time the type is requested.
+        
+        :param str resource_type: The name/type of the resource
+        :returns: A class or None if the resource type is unknown
+        """
+        klass = cls.classes.get(resource_type)
+        if klass is None and resource_type in cls.modules:
+            module, name = cls.modules[resource_type]
+            klass = getattr(importlib.import_module('.' + module, __package__), name)
+            cls.classes[resource_type] = klass
+        return klass
+    
     @classmethod
     def instantiate(cls, resource_type, jsondict):
         """ Instantiate a resource of the type correlating to "resource_type".
@@ -17,11 +58,9 @@ class FHIRElementFactory(object):
         :param dict jsondict: The JSON dictionary to use for data
         :returns: A resource of the respective type or `Element`
         """
-        {%- for klass in classes %}{% if klass.resource_type %}
-        if "{{ klass.resource_type }}" == resource_type:
-            from . import {{ klass.module }}
-            return {{ klass.module }}.{{ klass.name }}(jsondict)
-        {%- endif %}{% endfor %}
-        from . import element
-        return element.Element(jsondict)
+        klass = cls.class_for(resource_type)
+        if klass is None:
+            from . import element
+            klass = element.Element
+        return klass(jsondict)
 
@@ -4,6 +4,9 @@
 #  Generated from FHIR {{ info.version }} ({{ profile.url }}) on {{ info.date }}.
 #  {{ info.year }}, SMART Health IT.
 
+{#- Set `use_slots` to true to generate classes with `__slots__`, which greatly
+    reduces the memory used per element instance. #}
+{%- set use_slots = use_slots|default(false) %}
 {%- set imported = {} %}
 {%- for klass in classes %}
 
@@ -25,6 +28,10 @@ class {{ klass.name }}({% if klass.superclass in imports %}{{ klass.superclass.m
     
     resource_type = "{{ klass.resource_type }}"
 {%- endif %}
+{%- if use_slots %}
+    
+    __slots__ = ({% for prop in klass.properties %}"{{ prop.name }}", {% endfor %})
+{%- endif %}
     
     def __init__(self, jsondict=None, strict=True):
         """ Initialize all valid properties.
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+#  Asynchronous counterpart of FHIRServer, using aiohttp.
+#  Requires Python 3.6 or newer.
+
+import json
+import asyncio
+import logging
+import urllib.parse as urlparse
+
+try:
+    import aiohttp
+except ImportError as e:            # optional dependency
+    aiohttp = None
+
+from server import FHIRJSONMimeType, FHIRUnauthorizedException, FHIRPermissionDeniedException, FHIRNotFoundException
+
+logger = logging.getLogger(__name__)
+
+
+class FHIRAsyncServer(object):
+    """ Handles talking to a FHIR server asynchronously. Mirrors the request
+    methods of `FHIRServer` as coroutines, which return aiohttp responses
+    whose body has already been read.
+    
+    Wraps a `FHIRServer`, whose base URI, capability statement and `auth`
+    instance it uses, so requests are signed the same way and authorization
+    state is shared with synchronous requests. Its connection settings apply,
+    too, and transferred bytes are counted in its `transfer_stats()`. Use
+    `FHIRServer.async_server` to get the instance belonging to a server.
+    """
+    
+    def __init__(self, server, session=None):
+        """ Initializer.
+        
+        :param FHIRServer server: The server to talk to
+        :param session: An aiohttp.ClientSession to use; if None, the
+            instance creates (and closes) its own session
+        """
+        if aiohttp is None:
+            raise Exception("FHIRAsyncServer requires the 'aiohttp' module")
+        
+        self.server = server
+        """ The FHIRServer whose base URI and auth are used. """
+        
+        self.session = session
+        """ The aiohttp.ClientSession used for all requests. """
+        
+        self._owns_session = session is None
+        self._loop = None
+        self._closer = None
+    
+    @property
+    def async_server(self):
+        """ The receiver itself, for symmetry with `FHIRServer.async_server`.
+        """
+        return self
+    
+    @property
+    def base_uri(self):
+        return self.server.base_uri
+    
+    async def close(self):
+        """ Closes the session, if the receiver created it. A session created
+        for another event loop is left to that loop, which closes it when
+        shutting down, see `_session()`.
+        """
+        if self._owns_session and self.session is not None:
+            if self._loop is asyncio.get_event_loop():
+                await self._closer.aclose()
+            self.session = None
+            self._closer = None
+            self._loop = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    
+    # MARK: Server CapabilityStatement
+    
+    async def get_capability(self, force=False):
+        """ Retrieves the server's CapabilityStatement if needed or forced,
+        setting up the server's `auth` instance. The request is not signed,
+        as the statement may be needed to get credentials in the first place.
+        
+        :returns: The server's CapabilityStatement
+        """
+        if self.server._capability is None or force:
+            logger.info('Fetching CapabilityStatement from {0}'.format(self.base_uri))
+            from models import capabilitystatement
+            conf = capabilitystatement.CapabilityStatement(await self.request_json('metadata', nosign=True))
+            conf.origin_server = self.server
+            self.server._set_capability(conf)
+        return self.server._capability
+    
+    async def prepare(self):
+        """ Fetches the capability statement if it hasn't already been
+        fetched, see `FHIRServer.prepare()`.
+        
+        :returns: True if the server can make authenticated calls
+        """
+        if self.server.auth is None or self.server.auth.needs_capability():
+            await self.get_capability()
+        return self.server.ready
+    
+    
+    # MARK: Requests
+    
+    async def request_json(self, path, nosign=False):
+        """ Perform a request for JSON data against the server's base with the
+        given relative path.
+        
+        :param str path: The path to append to `base_uri`
+        :param bool nosign: If set to True, the request will not be signed
+        :throws: Exception on HTTP status >= 400
+        :returns: Decoded JSON response
+        """
+        if self.server.cache is not None:
+            return await self._request_json_cached(path, nosign)
+        
+        res = await self._request('GET', path, None, nosign)
+        return await res.json(content_type=None)
+    
+    async def _request_json_cached(self, path, nosign=False):
+        """ Performs a JSON request, made conditional if the server's `cache`
+        holds an earlier response, see `FHIRServer._request_json_cached()`.
+        """
+        cache = self.server.cache
+        url = urlparse.urljoin(self.base_uri, path)
+        entry, conditional = cache.lookup(url)
+        res, body = await self._request_body('GET', path, None, nosign, conditional)
+        if 304 == res.status and entry is not None:
+            return cache.not_modified(url, entry)
+        
+        cache.received(url, res, entry, body=body)
+        return await res.json(content_type=None)
+    
+    async def request_data(self, path, nosign=False):
+        """ Perform a data request against the server's base with the given
+        relative path.
+        
+        :returns: The response body as bytes
+        """
+        res, body = await self._request_body('GET', path, None, nosign)
+        return body
+    
+    async def put_json(self, path, resource_json, nosign=False):
+        """ Performs a PUT request of the given JSON, which should represent a
+        resource, to the given relative path.
+        
+        :param str path: The path to append to `base_uri`
+        :param resource_json: The JSON dict representing the resource, or a
+            model instance, whose JSON is then streamed
+        :param bool nosign: If set to True, the request will not be signed
+        :throws: Exception on HTTP status >= 400
+        :returns: The response object
+        """
+        self.server._invalidate(path)
+        return await self._request('PUT', path, resource_json, nosign)
+    
+    async def post_json(self, path, resource_json, nosign=False):
+        """ Performs a POST of the given JSON, which should represent a
+        resource, to the given relative path.
+        
+        :param str path: The path to append to `base_uri`
+        :param resource_json: The JSON dict representing the resource, or a
+            model instance, whose JSON is then streamed
+        :param bool nosign: If set to True, the request will not be signed
+        :throws: Exception on HTTP status >= 400
+        :returns: The response object
+        """
+        return await self._request('POST', path, resource_json, nosign)
+    
+    async def delete_json(self, path, nosign=False):
+        """ Issues a DELETE command against the given relative path, accepting
+        a JSON response.
+        
+        :param str path: The relative URL path to issue a DELETE against
+        :param bool nosign: If set to True, the request will not be signed
+        :returns: The response object
+        """
+        self.server._invalidate(path)
+        return await self._request('DELETE', path, None, nosign)
+    
+    async def _request(self, method, path, resource_json, nosign):
+        """ Issues a request, see `_request_body()`.
+        
+        :returns: The response object
+        """
+        res, body = await self._request_body(method, path, resource_json, nosign)
+        return res
+    
+    async def _request_body(self, method, path, resource_json, nosign, extra_headers=None):
+        """ Issues a request, signing it with the server's `auth` instance,
+        and reads the response body. Failed requests are retried as the
+        server's `retry_policy` decides.
+        
+        :param dict extra_headers: Further request headers, if any
+        :returns: A tuple of the response object and the body as bytes, which
+            can't be read from the response anymore once it was released
+        """
+        assert self.base_uri and path
+        url = urlparse.urljoin(self.base_uri, path)
+        headers = {
+            'Accept': FHIRJSONMimeType,
+            'Accept-Charset': 'UTF-8',
+        }
+        if extra_headers:
+            headers.update(extra_headers)
+        if resource_json is not None:
+            headers['Content-type'] = FHIRJSONMimeType
+            if self.server.connection['compress_requests']:
+                headers['Content-Encoding'] = 'gzip'
+        
+        auth = self.server.auth
+        if not nosign and auth is not None:
+            if auth.must_refresh():         # no valid token, wait for one
+                if auth.needs_capability():
+                    await self.get_capability()
+                await asyncio.get_event_loop().run_in_executor(None, auth.refresh_if_needed, self.server)
+            else:
+                auth.refresh_if_needed(self.server, wait=False)
+            self.server._save_deferred_state()
+            if auth.can_sign_headers():
+                headers = auth.signed_headers(headers)
+        
+        policy = self.server.retry_policy
+        if policy is not None:
+            policy.request_started()
+        attempt = 0
+        while True:
+            data = _json_body(self.server, resource_json) if resource_json is not None else None
+            try:
+                async with (await self._session()).request(method, url, headers=headers, data=data) as res:
+                    body = await res.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = policy.retry_delay(method, url, attempt, error=e) if policy is not None else None
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if res.status >= 400 and policy is not None:
+                    delay = policy.retry_delay(method, url, attempt, status=res.status, headers=res.headers)
+                if delay is None:
+                    self.raise_for_status(res)
+                    self.server._count_transfer('received', _wire_bytes(res, len(body)), 'received_decoded', len(body))
+                    return res, body
+            
+            logger.debug("Retrying {} {} in {:.2f} seconds".format(method, url, delay))
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def _session(self):
+        """ Returns the session, creating one for the running event loop if
+        the receiver manages its own session, applying the server's
+        connection settings.
+        
+        The loop also gets an asynchronous generator closing the session,
+        which it closes when shutting down, like `asyncio.run()` does, so
+        that the session doesn't outlive its loop when the next one gets a
+        session of its own.
+        """
+        loop = asyncio.get_event_loop()
+        if self._owns_session and (self.session is None or self.session.closed or self._loop is not loop):
+            connection = self.server.connection
+            connector = aiohttp.TCPConnector(
+                limit_per_host=connection['pool_maxsize'],
+                force_close=not connection['keep_alive'])
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=connection['connect_timeout'],
+                sock_read=connection['read_timeout'])
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._loop = loop
+            self._closer = _closing(self.session)
+            await self._closer.__anext__()
+        return self.session
+    
+    def raise_for_status(self, response):
+        if response.status < 400:
+            return
+        
+        if 401 == response.status:
+            raise FHIRUnauthorizedException(response)
+        elif 403 == response.status:
+            raise FHIRPermissionDeniedException(response)
+        elif 404 == response.status:
+            raise FHIRNotFoundException(response)
+        else:
+            response.raise_for_status()
+
+
+async def _closing(session):
+    """ An asynchronous generator that closes the session when it is
+    closed itself.
+    """
+    try:
+        yield
+    finally:
+        await session.close()
+
+def _json_body(server, resource_json):
+    """ The request body for the given JSON, encoded by the server's
+    `_encode_body()`, which gzips it if `compress_requests` is set and counts
+    the bytes sent: bytes for JSON dictionaries, an async generator streaming
+    `iter_json()` for model instances.
+    """
+    if hasattr(resource_json, 'iter_json'):
+        encoded = server._encode_body(chunk.encode('utf-8') for chunk in resource_json.iter_json())
+        async def chunks():
+            for chunk in encoded:
+                yield chunk
+        return chunks()
+    return server._encode_body(json.dumps(resource_json))
+
+def _wire_bytes(response, decoded):
+    """ The number of body bytes of the response read from the wire, as
+    given by "Content-Length" since aiohttp decodes the body while reading;
+    `decoded` if there is no such header.
+    """
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return decoded
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+import gc
+import io
+import sys
+import json
+import auth
+import cache
+import server
+import unittest
+import warnings
+import mockserver
+import models.patient as patient
+import models.fhirsearch as fhirsearch
+
+try:
+    import asyncio
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+@unittest.skipIf(aiohttp is None, "needs Python 3 and the 'aiohttp' module")
+class TestAsyncServer(unittest.TestCase):
+    
+    def setUp(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            self.bundle = json.load(h)
+        MockHandler.requests = []
+        MockHandler.statuses = []
+        MockHandler.bundle = self.bundle
+        MockHandler.resources = {'Patient/vader': (1, self.bundle['entry'][0]['resource'])}
+        self.httpd = mockserver.MockServer(MockHandler)
+        self.server = server.FHIRServer(None, base_uri=self.httpd.base_uri)
+    
+    def tearDown(self):
+        self.httpd.close()
+    
+    def run_async(self, coro):
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.server.async_server.close()
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+    
+    def testRead(self):
+        self.server.auth = auth.FHIROAuth2Auth()
+        self.server.auth.access_token = 'secret'
+        
+        pat = self.run_async(patient.Patient.read_async('vader', self.server))
+        self.assertEqual('Darth', pat.name[0].given[0])
+        self.assertEqual('vader', pat._local_id)
+        self.assertIs(self.server, pat.origin_server)
+        self.assertEqual(('GET', '/Patient/vader', None), MockHandler.requests[0][:3])
+        self.assertEqual('Bearer secret', MockHandler.requests[0][3])
+        
+        with self.assertRaises(server.FHIRNotFoundException):
+            self.run_async(patient.Patient.read_async('missing', self.server.async_server))
+    
+    def testWrite(self):
+        pat = patient.Patient(self.bundle['entry'][0]['resource'])
+        pat.id = None
+        self.assertEqual({'id': 'new'}, self.run_async(pat.create_async(self.server)))
+        self.assertEqual(('POST', '/Patient'), MockHandler.requests[-1][:2])
+        self.assertEqual(pat.as_json(), MockHandler.requests[-1][2])
+        
+        pat.id = 'vader'
+        pat.origin_server = self.server
+        self.assertIsNone(self.run_async(pat.update_async()))
+        self.assertEqual(('PUT', '/Patient/vader'), MockHandler.requests[-1][:2])
+        self.assertEqual('vader', MockHandler.requests[-1][2]['id'])
+        
+        self.assertIsNone(self.run_async(pat.delete_async()))
+        self.assertEqual(('DELETE', '/Patient/vader', None), MockHandler.requests[-1][:3])
+        
+        stats = self.server.transfer_stats()
+        self.assertEqual(stats['sent'], stats['sent_decoded'])
+        sent = [json.dumps(body).encode('utf-8') for method, path, body, authorization, encoding, etag in MockHandler.requests]
+        self.assertEqual(sum(len(body) for body in sent if body != b'null'), stats['sent'])
+        self.assertEqual(len(b'{"id": "new"}'), stats['received'])
+        
+        self.server.connection['compress_requests'] = True
+        self.assertIsNone(self.run_async(pat.update_async(stream=True)))
+        self.assertEqual('gzip', MockHandler.requests[-1][4])
+        self.assertEqual(pat.as_json(), MockHandler.requests[-1][2])
+        pat.id = None
+        self.run_async(self.server.async_server.post_json('Patient', pat.as_json()))
+        self.assertEqual('gzip', MockHandler.requests[-1][4])
+        self.assertEqual(pat.as_json(), MockHandler.requests[-1][2])
+        
+        previous, stats = stats, self.server.transfer_stats()
+        sent = [json.dumps(body).encode('utf-8') for method, path, body, authorization, encoding, etag in MockHandler.requests[-2:]]
+        self.assertEqual(sum(len(body) for body in sent), stats['sent_decoded'] - previous['sent_decoded'])
+        self.assertTrue(stats['sent'] - previous['sent'] < stats['sent_decoded'] - previous['sent_decoded'])
+    
+    def testEventLoops(self):
+        # each asyncio.run() closes the session created for its loop
+        unclosed = []
+        hook = sys.unraisablehook
+        sys.unraisablehook = lambda unraisable: unclosed.append(unraisable.exc_value)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', ResourceWarning)
+                for i in range(2):
+                    self.assertIsNotNone(asyncio.run(patient.Patient.read_async('vader', self.server)))
+                gc.collect()
+        finally:
+            sys.unraisablehook = hook
+        self.assertEqual([], unclosed)
+        self.assertTrue(self.server.async_server.session.closed)
+        self.assertEqual(2, len(MockHandler.requests))
+    
+    def testCache(self):
+        self.server.cache = cache.FHIRCache()
+        url = self.server.base_uri + 'Patient/vader'
+        for i in range(2):
+            pat = self.run_async(patient.Patient.read_async('vader', self.server))
+            self.assertEqual('Darth', pat.name[0].given[0])
+        self.assertEqual('W/"1"', MockHandler.requests[-1][5])
+        self.assertEqual([200, 304], MockHandler.statuses)
+        self.assertEqual({'hits': 1, 'misses': 1, 'revalidations': 1, 'stale': 0}, self.server.cache.stats)
+        
+        # writes invalidate
+        pat.id = 'vader'
+        self.run_async(pat.update_async())
+        self.assertIsNone(self.server.cache.backend.get(url))
+        self.run_async(patient.Patient.read_async('vader', self.server))
+        self.assertIsNotNone(self.server.cache.backend.get(url))
+        self.run_async(pat.delete_async())
+        self.assertIsNone(self.server.cache.backend.get(url))
+    
+    def testSearch(self):
+        search = fhirsearch.FHIRSearch(patient.Patient, {'name': 'Darth'})
+        bundle = self.run_async(search.perform_async(self.server))
+        self.assertEqual(len(self.bundle['entry']), len(bundle.entry))
+        self.assertIs(self.server, bundle.origin_server)
+        self.assertEqual('/Patient?name=Darth', MockHandler.requests[0][1])
+        
+        resources = self.run_async(search.perform_resources_async(self.server, lazy=True))
+        self.assertEqual('Darth', resources[0].name[0].given[0])
+
+
+class MockHandler(mockserver.ConditionalMockHandler):
+    """ Records requests, answering reads of "Patient/vader" with the first
+    patient in the test Bundle, see `resources`, and searches with the whole
+    Bundle.
+    """
+    requests = None
+    bundle = None
+    
+    def record(self):
+        self.requests.append((self.command, self.path, self.read_json(), self.headers.get('Authorization'),
+            self.headers.get('Content-Encoding'), self.headers.get('If-None-Match')))
+    
+    def do_GET(self):
+        self.record()
+        if self.path.startswith('/Patient?'):
+            self.respond(200, self.bundle)
+        else:
+            mockserver.ConditionalMockHandler.do_GET(self)
+    
+    def do_POST(self):
+        self.record()
+        self.respond(201, {'id': 'new'})
+    
+    def do_PUT(self):
+        self.record()
+        self.respond(200)
+    
+    def do_DELETE(self):
+        self.record()
+        self.respond(204)
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import io
+import os
+import json
+import time
 import uuid
 import logging
+import threading
+import contextlib
 try:                                # Python 2.x
     import urlparse
     from urllib import urlencode
@@ -9,6 +15,17 @@ except Exception as e:              # Python 3
     import urllib.parse as urlparse
     from urllib.parse import urlencode
 
+try:
+    import jwt
+except ImportError as e:            # optional dependency
+    jwt = None
+try:
+    import fcntl
+except ImportError as e:            # not available on Windows
+    fcntl = None
+
+from cache import _Flight
+
 logger = logging.getLogger(__name__)
 
 class FHIRAuth(object):
@@ -111,6 +128,23 @@ class FHIRAuth(object):
         """
         return None
     
+    def refresh_if_needed(self, server, wait=True):
+        """ Called before signing requests, to renew credentials that are
+        about to expire; call `server.defer_state_save()` rather than
+        `server.should_save_state()` when they changed. """
+        pass
+    
+    def must_refresh(self):
+        """ Whether requests can't be signed until `refresh_if_needed()`
+        has renewed the credentials, so callers that don't want to wait,
+        like the asyncio server, must wait nonetheless. """
+        return False
+    
+    def needs_capability(self):
+        """ Whether the server's CapabilityStatement is needed to set up
+        the credentials. """
+        return False
+    
     
     # MARK: State
     
@@ -141,9 +175,18 @@ class FHIROAuth2Auth(FHIRAuth):
         
         self.auth_state = None
         self.app_secret = None
-        self.access_token = None
         self.refresh_token = None
         
+        self._credentials = (None, None)
+        self._state_lock = threading.RLock()
+        
+        self.refresh_skew = 60
+        """ How many seconds before `expires_at` the token is refreshed. """
+        
+        self._refresh = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing_in_background = False
+        
         super(FHIROAuth2Auth, self).__init__(state=state)
     
     @property
@@ -152,10 +195,44 @@ class FHIROAuth2Auth(FHIRAuth):
     
     def reset(self):
         super(FHIROAuth2Auth, self).reset()
-        self.access_token = None
+        self._set_credentials(None, None)
         self.auth_state = None
     
     
+    # MARK: Credentials
+    
+    @property
+    def access_token(self):
+        return self._credentials[0]
+    
+    @access_token.setter
+    def access_token(self, access_token):
+        with self._state_lock:
+            self._credentials = (access_token, self._credentials[1])
+    
+    @property
+    def expires_at(self):
+        """ When the access token expires, in seconds since the epoch, if the
+        token endpoint said so. """
+        return self._credentials[1]
+    
+    @expires_at.setter
+    def expires_at(self, expires_at):
+        with self._state_lock:
+            self._credentials = (self._credentials[0], expires_at)
+    
+    def _set_credentials(self, access_token, expires_at, refresh_token=None):
+        """ Replaces the access token and its expiry together, and the refresh
+        token if one is given. The pair is an immutable tuple that is swapped
+        as a whole, so threads signing requests meanwhile see either the old
+        or the new token, never a mix.
+        """
+        with self._state_lock:
+            self._credentials = (access_token, expires_at)
+            if refresh_token is not None:
+                self.refresh_token = refresh_token
+    
+    
     # MARK: Signing/Authorizing Request Headers
     
     def can_sign_headers(self):
@@ -165,12 +242,13 @@ class FHIROAuth2Auth(FHIRAuth):
         """ Returns updated HTTP request headers, if possible, raises if there
         is no access_token.
         """
-        if not self.can_sign_headers():
+        access_token = self.access_token
+        if access_token is None:
             raise Exception("Cannot sign headers since I have no access token")
         
         if headers is None:
             headers = {}
-        headers['Authorization'] = "Bearer {0}".format(self.access_token)
+        headers['Authorization'] = "Bearer {0}".format(access_token)
         
         return headers
     
@@ -277,21 +355,23 @@ class FHIROAuth2Auth(FHIRAuth):
             auth = (self.app_id, self.app_secret)
         ret_params = server.post_as_form(self._token_uri, params, auth).json()
         
-        self.access_token = ret_params.get('access_token')
-        if self.access_token is None:
+        access_token = ret_params.pop('access_token', None)
+        if access_token is None:
+            self._set_credentials(None, None)
             raise Exception("No access token received")
-        del ret_params['access_token']
         
-        if 'expires_in' in ret_params:
-            del ret_params['expires_in']
+        expires_in = ret_params.pop('expires_in', None)
+        try:
+            expires_at = time.time() + float(expires_in) if expires_in is not None else None
+        except (TypeError, ValueError):
+            logger.warning("SMART AUTH: Ignoring invalid `expires_in`: {0}".format(expires_in))
+            expires_at = None
         
         # The refresh token issued by the authorization server. If present, the
         # app should discard any previous refresh_token associated with this
         # launch, replacing it with this new value.
-        refresh_token = ret_params.get('refresh_token')
-        if refresh_token is not None:
-            self.refresh_token = refresh_token
-            del ret_params['refresh_token']
+        refresh_token = ret_params.pop('refresh_token', None)
+        self._set_credentials(access_token, expires_at, refresh_token)
         
         logger.debug("SMART AUTH: Received access token: {0}, refresh token: {1}"
             .format(self.access_token is not None, self.refresh_token is not None))
@@ -301,19 +381,103 @@ class FHIROAuth2Auth(FHIRAuth):
     # MARK: Reauthorization
     
     def reauthorize(self, server):
-        """ Perform reauthorization.
+        """ Perform reauthorization. Concurrent calls wait for the first
+        call's token request and return its result, so many threads sharing
+        a server only refresh the token once.
         
         :param server: The Server instance to use
         :returns: The launch context dictionary, or None on failure
         """
-        if self.refresh_token is None:
+        if not self._can_reauthorize():
             logger.debug("SMART AUTH: Cannot reauthorize without refresh token")
             return None
         
+        with self._refresh_lock:
+            flight = self._refresh
+            leader = flight is None
+            if leader:
+                flight = self._refresh = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return dict(flight.value)
+        
+        try:
+            flight.value = self._refresh_access_token(server)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._refresh_lock:
+                self._refresh = None
+            flight.done.set()
+        return flight.value
+    
+    def refresh_if_needed(self, server, wait=True):
+        """ Refreshes the access token if it expires within `refresh_skew`
+        seconds: in a background thread while it is still valid, so requests
+        are not held up, and right away once it has expired. The new state
+        is not saved here, which may be on a background thread, but on the
+        server's next request, see `FHIRServer.defer_state_save()`.
+        
+        :param server: The Server instance to use
+        :param bool wait: If False, never waits for the token request, e.g.
+            when called from an event loop
+        """
+        expires_at = self.expires_at
+        if expires_at is None or not self._can_reauthorize():
+            return
+        remaining = expires_at - time.time()
+        if remaining > self.refresh_skew:
+            return
+        
+        if remaining <= 0 and wait:
+            try:
+                self.reauthorize(server)
+                server.defer_state_save()
+            except Exception as e:
+                logger.warning("SMART AUTH: Refreshing the expired token failed: {0}".format(e))
+            return
+        self._refresh_soon(server)
+    
+    def must_refresh(self):
+        expires_at = self.expires_at
+        return expires_at is not None and expires_at <= time.time() and self._can_reauthorize()
+    
+    def _can_reauthorize(self):
+        return self.refresh_token is not None
+    
+    def _refresh_access_token(self, server):
+        """ Requests a new access token; called by `reauthorize()` for the
+        first of concurrent calls only.
+        """
         logger.debug("SMART AUTH: Refreshing token")
         reauth = self._reauthorize_params()
         return self._request_access_token(server, reauth)
     
+    def _refresh_soon(self, server):
+        """ Starts refreshing the token in a background thread, unless a
+        refresh is already under way.
+        """
+        with self._refresh_lock:
+            if self._refreshing_in_background or self._refresh is not None:
+                return
+            self._refreshing_in_background = True
+        thread = threading.Thread(target=self._refresh_in_background, args=(server,))
+        thread.daemon = True
+        thread.start()
+    
+    def _refresh_in_background(self, server):
+        try:
+            self.reauthorize(server)
+            server.defer_state_save()
+        except Exception as e:
+            logger.warning("SMART AUTH: Refreshing the token ahead of expiry failed: {0}".format(e))
+        finally:
+            with self._refresh_lock:
+                self._refreshing_in_background = False
+    
     def _reauthorize_params(self):
         """ Parameters to be used in a reauthorize request.
         """
@@ -341,10 +505,16 @@ class FHIROAuth2Auth(FHIRAuth):
             s['auth_state'] = self.auth_state
         if self.app_secret is not None:
             s['app_secret'] = self.app_secret
-        if self.access_token is not None:
-            s['access_token'] = self.access_token
-        if self.refresh_token is not None:
-            s['refresh_token'] = self.refresh_token
+        with self._state_lock:
+            access_token, expires_at = self._credentials
+            refresh_token = self.refresh_token
+        if access_token is not None:
+            s['access_token'] = access_token
+        if refresh_token is not None:
+            s['refresh_token'] = refresh_token
+        if expires_at is not None:
+            s['expires_at'] = expires_at
+        s['refresh_skew'] = self.refresh_skew
         
         return s
     
@@ -360,8 +530,11 @@ class FHIROAuth2Auth(FHIRAuth):
         self.auth_state = state.get('auth_state') or self.auth_state
         self.app_secret = state.get('app_secret') or self.app_secret
         
-        self.access_token = state.get('access_token') or self.access_token
-        self.refresh_token = state.get('refresh_token') or self.refresh_token
+        self._set_credentials(state.get('access_token') or self.access_token,
+            state.get('expires_at') or self.expires_at,
+            state.get('refresh_token'))
+        if state.get('refresh_skew') is not None:
+            self.refresh_skew = state['refresh_skew']
     
 
     # MARK: Utilities    
@@ -393,8 +566,197 @@ class FHIROAuth2Auth(FHIRAuth):
             return "Authorization error: {0}.".format(err_code)
         
         return None
+
+
+class FHIRBackendServicesAuth(FHIROAuth2Auth):
+    """ SMART Backend Services authorization, for apps running without a
+    user: access tokens are requested with the "client_credentials" grant,
+    authenticating with a JWT signed with the app's private key, and are
+    requested anew the same way ahead of expiry.
+    
+    The state/settings dictionary supports, in addition to `app_id`:
+        
+        - `token_uri`: The token endpoint; taken from the "token" URL of
+          the SMART extension in the server's CapabilityStatement, which is
+          fetched before the first token request, if not given
+        - `private_key_path`: The PEM file of the private key to sign with;
+          alternatively, assign the PEM to `private_key`
+        - `key_id`: The "kid" of the key in the app's JWK Set
+        - `jwt_algorithm`: "RS384" (the default) or "ES384"
+        - `scope`: The scopes to request, e.g. "system/*.read"
+        - `token_cache`: A file to share tokens between processes, which
+          then only request a token if none in the file is valid long enough
+    
+    Requires the 'jwt' module (PyJWT, with 'cryptography').
+    """
+    auth_type = 'backend_services'
+    
+    def __init__(self, state=None):
+        self.private_key = None
+        """ The PEM private key to sign with, if not read from `private_key_path`. """
+        
+        self.private_key_path = None
+        self.key_id = None
+        self.jwt_algorithm = 'RS384'
+        self.scope = None
+        self.token_cache = None
+        
+        super(FHIRBackendServicesAuth, self).__init__(state=state)
+    
+    @property
+    def ready(self):
+        return self.access_token is not None or self._can_reauthorize()
+    
+    def authorize_uri(self, server):
+        return None
+    
+    def handle_callback(self, url, server):
+        raise Exception("{0} cannot handle callback URL, there is no user to authorize".format(self))
+    
+    
+    # MARK: Token Requests
+    
+    def refresh_if_needed(self, server, wait=True):
+        """ Also requests the first access token, right away unless `wait`
+        is False, fetching the server's CapabilityStatement first if the
+        token endpoint isn't known yet.
+        """
+        if self.access_token is None:
+            if wait and self.needs_capability():
+                server.get_capability()
+            if self._can_reauthorize():
+                if wait:
+                    self.reauthorize(server)
+                    server.defer_state_save()
+                else:
+                    self._refresh_soon(server)
+                return
+        super(FHIRBackendServicesAuth, self).refresh_if_needed(server, wait=wait)
+    
+    def must_refresh(self):
+        if self.access_token is None:
+            return self._can_reauthorize() or self.needs_capability()
+        return super(FHIRBackendServicesAuth, self).must_refresh()
+    
+    def needs_capability(self):
+        return self.access_token is None and self._token_uri is None
+    
+    def _can_reauthorize(self):
+        return self._token_uri is not None and (self.private_key is not None or self.private_key_path is not None)
+    
+    def _reauthorize_params(self):
+        params = {
+            'grant_type': 'client_credentials',
+            'client_assertion_type': 'urn:ietf:params:oauth:client-assertion-type:jwt-bearer',
+            'client_assertion': self.client_assertion(),
+        }
+        if self.scope:
+            params['scope'] = self.scope
+        return params
     
+    def client_assertion(self):
+        """ A JWT authenticating the app at the token endpoint, signed with
+        its private key and valid for five minutes.
+        """
+        if jwt is None:
+            raise Exception("FHIRBackendServicesAuth requires the 'jwt' module")
+        if self.private_key is None:
+            with io.open(self.private_key_path, 'rb') as handle:
+                self.private_key = handle.read()
+        
+        now = int(time.time())
+        claims = {
+            'iss': self.app_id,
+            'sub': self.app_id,
+            'aud': self._token_uri,
+            'exp': now + 300,
+            'jti': str(uuid.uuid4()),
+        }
+        headers = {'kid': self.key_id} if self.key_id else None
+        token = jwt.encode(claims, self.private_key, algorithm=self.jwt_algorithm, headers=headers)
+        return token.decode('utf-8') if isinstance(token, bytes) else token
+    
+    def _refresh_access_token(self, server):
+        """ Takes the token from `token_cache` if it's valid for longer than
+        `refresh_skew`, requesting and caching a new one otherwise. The cache
+        file is locked meanwhile, so concurrent processes wait for the first
+        one's request.
+        """
+        if self.token_cache is None:
+            return super(FHIRBackendServicesAuth, self)._refresh_access_token(server)
+        
+        key = ' '.join([self._token_uri, self.app_id or '', self.scope or ''])
+        with _locked(self.token_cache + '.lock'):
+            tokens = self._read_token_cache()
+            cached = tokens.get(key)
+            if cached is not None and cached.get('expires_at') is not None \
+                and cached['expires_at'] - time.time() > self.refresh_skew:
+                logger.debug("SMART AUTH: Using token from {0}".format(self.token_cache))
+                self._set_credentials(cached['access_token'], cached['expires_at'])
+                return {}
+            
+            ret = super(FHIRBackendServicesAuth, self)._refresh_access_token(server)
+            tokens = dict((k, v) for k, v in tokens.items() if (v.get('expires_at') or 0) > time.time())
+            access_token, expires_at = self._credentials
+            tokens[key] = {'access_token': access_token, 'expires_at': expires_at}
+            self._write_token_cache(tokens)
+            return ret
+    
+    def _read_token_cache(self):
+        try:
+            with io.open(self.token_cache, 'r', encoding='utf-8') as handle:
+                return json.load(handle)
+        except (IOError, OSError, ValueError):
+            return {}
+    
+    def _write_token_cache(self, tokens):
+        temp = '{}.{}.{}'.format(self.token_cache, os.getpid(), threading.current_thread().ident)
+        try:
+            fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with io.open(fd, 'w', encoding='utf-8') as handle:
+                handle.write(json.dumps(tokens))
+            getattr(os, 'replace', os.rename)(temp, self.token_cache)
+        except (IOError, OSError) as e:
+            logger.warning("SMART AUTH: Failed to write token cache {0}: {1}".format(self.token_cache, e))
+    
+    
+    # MARK: State
+    
+    @property
+    def state(self):
+        s = super(FHIRBackendServicesAuth, self).state
+        s['private_key_path'] = self.private_key_path
+        s['key_id'] = self.key_id
+        s['jwt_algorithm'] = self.jwt_algorithm
+        s['scope'] = self.scope
+        s['token_cache'] = self.token_cache
+        return s
+    
+    def from_state(self, state):
+        super(FHIRBackendServicesAuth, self).from_state(state)
+        self.private_key_path = state.get('private_key_path') or self.private_key_path
+        self.key_id = state.get('key_id') or self.key_id
+        self.jwt_algorithm = state.get('jwt_algorithm') or self.jwt_algorithm
+        self.scope = state.get('scope') or self.scope
+        self.token_cache = state.get('token_cache') or self.token_cache
+
+
+@contextlib.contextmanager
+def _locked(path):
+    """ Holds an exclusive lock on the given file, where supported.
+    """
+    if fcntl is None:
+        yield
+        return
+    with io.open(path, 'a') as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
 
 # register classes
 FHIRAuth.register()
 FHIROAuth2Auth.register()
+FHIRBackendServicesAuth.register()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import json
+import time
+import auth
+import client
+import shutil
+import logging
+import tempfile
+import unittest
+import threading
+import mockserver
+import models.patient as patient
+
+try:
+    from urllib.parse import parse_qsl
+except ImportError:         # Python 2
+    from urlparse import parse_qsl
+
+try:
+    import jwt
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+except ImportError:
+    jwt = None
+try:
+    import asyncio
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+logging.basicConfig(level=logging.CRITICAL)
+
+
+@unittest.skipIf(jwt is None, "needs the 'jwt' and 'cryptography' modules")
+class TestBackendServicesAuth(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.key_path = os.path.join(self.directory, 'key.pem')
+        with open(self.key_path, 'wb') as handle:
+            handle.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+        MockHandler.public_key = key.public_key()
+        MockHandler.forms = []
+        MockHandler.expires_in = 3600
+        self.httpd = mockserver.MockServer(MockHandler)
+        self.base = self.httpd.base_uri
+        MockHandler.token_uri = self.base + 'token'
+        self.settings = {
+            'app_id': 'etl',
+            'api_base': self.base,
+            'auth_type': 'backend_services',
+            'token_uri': self.base + 'token',
+            'private_key_path': self.key_path,
+            'key_id': 'key-1',
+            'scope': 'system/*.read',
+            'token_cache': os.path.join(self.directory, 'tokens.json'),
+        }
+    
+    def tearDown(self):
+        self.httpd.close()
+        shutil.rmtree(self.directory)
+    
+    def testClientCredentials(self):
+        smart = client.FHIRClient(settings=self.settings)
+        self.assertIsInstance(smart.server.auth, auth.FHIRBackendServicesAuth)
+        self.assertTrue(smart.server.ready)
+        self.assertIsNone(smart.authorize_url)
+        
+        self.assertEqual('1', patient.Patient.read('1', smart.server).id)
+        self.assertEqual(1, len(MockHandler.forms))
+        form = MockHandler.forms[0]
+        self.assertEqual('client_credentials', form['grant_type'])
+        self.assertEqual('system/*.read', form['scope'])
+        self.assertEqual('urn:ietf:params:oauth:client-assertion-type:jwt-bearer', form['client_assertion_type'])
+        header = jwt.get_unverified_header(form['client_assertion'])
+        self.assertEqual(('RS384', 'key-1'), (header['alg'], header['kid']))
+        self.assertAlmostEqual(time.time() + 3600, smart.server.auth.expires_at, delta=5)
+        
+        # another process finds the token in the cache
+        other = client.FHIRClient(settings=self.settings)
+        self.assertEqual('1', patient.Patient.read('1', other.server).id)
+        self.assertEqual(1, len(MockHandler.forms))
+        self.assertEqual(smart.server.auth.access_token, other.server.auth.access_token)
+        
+        # state restores the auth, refreshed ahead of expiry in the background
+        restored = client.FHIRClient(state=smart.state)
+        self.assertEqual(smart.server.auth.access_token, restored.server.auth.access_token)
+        with open(self.settings['token_cache']) as handle:
+            tokens = json.load(handle)
+        for token in tokens.values():
+            token['expires_at'] = time.time() + 30
+        with open(self.settings['token_cache'], 'w') as handle:
+            json.dump(tokens, handle)
+        restored.server.auth.expires_at = time.time() + 30
+        patient.Patient.read('1', restored.server)
+        for i in range(100):
+            if restored.server.auth.access_token != smart.server.auth.access_token \
+                and not restored.server.auth._refreshing_in_background:
+                break
+            time.sleep(0.02)
+        self.assertEqual(2, len(MockHandler.forms))
+        with open(self.settings['token_cache']) as handle:
+            cached = list(json.load(handle).values())
+        self.assertEqual(1, len(cached))
+        self.assertEqual(restored.server.auth.access_token, cached[0]['access_token'])
+        self.assertAlmostEqual(time.time() + 3600, cached[0]['expires_at'], delta=5)
+    
+    def testTokenEndpointDiscovery(self):
+        settings = dict(self.settings, token_cache=None)
+        del settings['token_uri']
+        smart = client.FHIRClient(settings=settings)
+        self.assertFalse(smart.ready)
+        self.assertEqual('1', patient.Patient.read('1', smart.server).id)
+        self.assertEqual(self.base + 'token', smart.server.auth._token_uri)
+        self.assertEqual(1, len(MockHandler.forms))
+        
+        smart = client.FHIRClient(settings=settings)
+        self.assertTrue(smart.prepare())
+        self.assertEqual(self.base + 'token', smart.server.auth._token_uri)
+        self.assertEqual(1, len(MockHandler.forms))
+    
+    @unittest.skipIf(aiohttp is None, "needs the 'aiohttp' module")
+    def testAsyncRequests(self):
+        settings = dict(self.settings, token_cache=None)
+        del settings['token_uri']
+        smart = client.FHIRClient(settings=settings)
+        async def read(times):
+            try:
+                return [await patient.Patient.read_async('1', smart.server) for i in range(times)]
+            finally:
+                await smart.server.async_server.close()
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(['1', '1'], [pat.id for pat in loop.run_until_complete(read(2))])
+            self.assertEqual(1, len(MockHandler.forms))
+            
+            # expired tokens are renewed before the request, too
+            token = smart.server.auth.access_token
+            smart.server.auth.expires_at = time.time() - 1
+            self.assertEqual('1', loop.run_until_complete(read(1))[0].id)
+            self.assertEqual(2, len(MockHandler.forms))
+            self.assertNotEqual(token, smart.server.auth.access_token)
+        finally:
+            loop.close()
+    
+    def testConcurrentRequests(self):
+        settings = dict(self.settings, token_cache=None)
+        smart = client.FHIRClient(settings=settings)
+        errors = []
+        def read():
+            try:
+                patient.Patient.read('1', smart.server)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=read) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual([], errors)
+        self.assertEqual(1, len(MockHandler.forms))
+
+
+class MockHandler(mockserver.MockHandler):
+    """ A token endpoint verifying client assertions with `public_key`, and
+    a resource server answering reads of Patients with a valid token and
+    its CapabilityStatement, naming the token endpoint, without.
+    Records the token request forms.
+    """
+    content_type = 'application/json'
+    public_key = None
+    token_uri = None
+    forms = None
+    expires_in = None
+    tokens = set()
+    
+    def do_POST(self):
+        form = dict(parse_qsl(self.read_body().decode('utf-8')))
+        time.sleep(0.05)
+        self.forms.append(form)
+        try:
+            claims = jwt.decode(form['client_assertion'], self.public_key, algorithms=['RS384'], audience=self.token_uri)
+        except Exception as e:
+            return self.respond(400, {'error': 'invalid_client'})
+        if 'etl' != claims['iss'] or 'etl' != claims['sub']:
+            return self.respond(400, {'error': 'invalid_client'})
+        token = 'token-{}'.format(claims['jti'])
+        self.tokens.add(token)
+        self.respond(200, {'access_token': token, 'token_type': 'bearer', 'expires_in': self.expires_in, 'scope': form.get('scope')})
+    
+    def do_GET(self):
+        if '/metadata' == self.path:
+            with io.open('test_metadata_valid.json', 'r', encoding='utf-8') as handle:
+                conf = json.load(handle)
+            conf['rest'][0]['security']['extension'] = [{
+                'url': 'http://fhir-registry.smarthealthit.org/StructureDefinition/oauth-uris',
+                'extension': [{'url': 'token', 'valueUri': self.token_uri}],
+            }]
+            return self.respond(200, conf)
+        
+        token = (self.headers.get('Authorization') or '')[len('Bearer '):]
+        if token not in self.tokens:
+            return self.respond(401, {'resourceType': 'OperationOutcome', 'issue': [{'severity': 'error', 'code': 'login'}]})
+        self.respond(200, {'resourceType': 'Patient', 'id': self.path.split('/')[-1]})
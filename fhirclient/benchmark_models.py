@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+#  Times instantiating models from JSON and serializing them back, on a
+#  searchset Bundle of blood pressure Observations. Run from inside the
+#  `fhirclient` directory, like the tests:
+#
+#      python benchmark_models.py [entries] [repeats]
+
+import sys
+import json
+import timeit
+import models.bundle as bundle
+
+
+def observation(i):
+    coding = lambda system, code, display: {'system': system, 'code': code, 'display': display}
+    quantity = lambda value: {'value': value, 'unit': 'mmHg', 'system': 'http://unitsofmeasure.org', 'code': 'mm[Hg]'}
+    return {
+        'resourceType': 'Observation',
+        'id': 'bp-{0}'.format(i),
+        'meta': {'versionId': '1', 'lastUpdated': '2017-03-22T10:00:00Z'},
+        'status': 'final',
+        'category': [{'coding': [coding('http://hl7.org/fhir/observation-category', 'vital-signs', 'Vital Signs')]}],
+        'code': {'coding': [coding('http://loinc.org', '85354-9', 'Blood pressure panel')], 'text': 'Blood pressure'},
+        'subject': {'reference': 'Patient/{0}'.format(i % 50)},
+        'effectiveDateTime': '2017-03-{0:02d}T09:30:00Z'.format(i % 28 + 1),
+        'performer': [{'reference': 'Practitioner/{0}'.format(i % 7)}],
+        'interpretation': {'coding': [coding('http://hl7.org/fhir/v2/0078', 'N', 'normal')]},
+        'component': [
+            {'code': {'coding': [coding('http://loinc.org', '8480-6', 'Systolic blood pressure')]},
+             'valueQuantity': quantity(110 + i % 30)},
+            {'code': {'coding': [coding('http://loinc.org', '8462-4', 'Diastolic blood pressure')]},
+             'valueQuantity': quantity(70 + i % 20)},
+        ],
+    }
+
+def searchset(entries):
+    return {
+        'resourceType': 'Bundle',
+        'type': 'searchset',
+        'total': entries,
+        'entry': [{
+            'fullUrl': 'https://fhir.example.org/Observation/bp-{0}'.format(i),
+            'resource': observation(i),
+            'search': {'mode': 'match'},
+        } for i in range(entries)],
+    }
+
+
+if '__main__' == __name__:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    js = json.loads(json.dumps(searchset(entries)))
+    b = bundle.Bundle(js)
+    parse = min(timeit.repeat(lambda: bundle.Bundle(js), number=1, repeat=repeats))
+    serialize = min(timeit.repeat(b.as_json, number=1, repeat=repeats))
+    print('{0} Observations: parse {1:.1f} ms, serialize {2:.1f} ms'.format(entries, parse * 1000, serialize * 1000))
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+
+import os
+import io
+import json
+import time
+import hashlib
+import logging
+import threading
+import collections
+
+logger = logging.getLogger(__name__)
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class FHIRCache(object):
+    """ Caches JSON responses together with their "ETag" and "Last-Modified"
+    headers, so they can be revalidated with a conditional request; a "304
+    Not Modified" response is then answered from the cache instead of
+    downloading the data again.
+    
+    Assign an instance to `FHIRServer.cache` to have `request_json()` use it,
+    also on the server's `async_server`. Entries are kept by a backend, in
+    memory by default.
+    """
+    
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else FHIRMemoryCacheBackend()
+        """ The backend storing the entries. """
+        
+        self.hits = 0
+        """ The number of responses served from the cache after revalidation. """
+        
+        self.misses = 0
+        """ The number of requests for URLs not in the cache. """
+        
+        self.revalidations = 0
+        """ The number of conditional requests made. """
+        
+        self.stale = 0
+        """ The number of conditional requests the server answered with new data. """
+        
+        self._lock = threading.Lock()
+    
+    @property
+    def stats(self):
+        """ The statistics as a dictionary. """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'stale': self.stale,
+            }
+    
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    def lookup(self, url):
+        """ Returns the cache entry for the given URL and the headers making
+        the request conditional.
+        
+        :param str url: The URL to be requested
+        :returns: A tuple of the entry, None if there is none, and a dict of
+            headers
+        """
+        entry = self.backend.get(url)
+        if entry is None:
+            self._count('misses')
+            return None, {}
+        
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        self._count('revalidations')
+        return entry, headers
+    
+    def not_modified(self, url, entry):
+        """ Call when the server confirmed that `entry` is still valid.
+        
+        :returns: The decoded JSON of the entry
+        """
+        self._count('hits')
+        return json.loads(entry['body'].decode('utf-8'))
+    
+    def received(self, url, response, entry=None, body=None):
+        """ Call with a successful response for the given URL, which is then
+        cached if it carries an "ETag" or "Last-Modified" header.
+        
+        :param str url: The URL requested
+        :param response: The response object
+        :param entry: The entry that was revalidated, if any
+        :param bytes body: The response body, if not `response.content`
+        """
+        if entry is not None:
+            self._count('stale')
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.backend.set(url, {
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': body if body is not None else response.content,
+            })
+        elif entry is not None:
+            self.backend.delete(url)
+    
+    def invalidate(self, url):
+        """ Removes the entry for the given URL, e.g. after it was updated.
+        """
+        self.backend.delete(url)
+
+
+class FHIRMemoryCacheBackend(object):
+    """ Keeps cache entries in memory, evicting the least recently used ones
+    once their bodies exceed `max_bytes`.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        """ The maximum number of body bytes to keep. """
+        
+        self.size = 0
+        """ The number of body bytes currently kept. """
+        
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+    
+    def set(self, key, entry):
+        size = len(entry['body'])
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+    
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry['body'])
+
+
+class FHIRDiskCacheBackend(object):
+    """ Keeps cache entries in files in the given directory, one per URL,
+    e.g. to share them between processes or keep them across restarts.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        """ The directory holding the cache files. """
+        
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+    
+    def get(self, key):
+        try:
+            with io.open(self._path(key), 'rb') as handle:
+                meta = json.loads(handle.readline().decode('utf-8'))
+                if meta.get('key') != key:
+                    return None
+                meta['body'] = handle.read()
+                return meta
+        except (IOError, OSError, ValueError):
+            return None
+    
+    def set(self, key, entry):
+        meta = {'key': key, 'etag': entry.get('etag'), 'last_modified': entry.get('last_modified')}
+        path = self._path(key)
+        temp = '{}.{}.{}'.format(path, os.getpid(), threading.current_thread().ident)
+        try:
+            with io.open(temp, 'wb') as handle:
+                handle.write(json.dumps(meta).encode('utf-8') + b'\n')
+                handle.write(entry['body'])
+            getattr(os, 'replace', os.rename)(temp, path)
+        except (IOError, OSError) as e:
+            logger.warning("Failed to write cache file {}: {}".format(path, e))
+    
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class FHIRReferenceCache(object):
+    """ Caches resources resolved from references, shared by all resources
+    of a server, so that e.g. the Organization referenced by thousands of
+    Encounters is read once. Assign an instance to
+    `FHIRServer.reference_cache` to have `FHIRReference.resolved()` use it.
+    
+    Entries are keyed by absolute URL and version, the latter taken from a
+    "_history" path in the reference, and the least recently used ones are
+    evicted beyond `max_entries`. Concurrent misses for the same key wait
+    for a single read. `FHIRReference.resolve_all()` looks up and stores
+    resources with `get()` and `put()`, as it reads them in batches.
+    
+    Note that the cached instances are shared by all references resolving
+    to them, so don't modify them.
+    """
+    
+    def __init__(self, max_entries=1000, ttl=None):
+        self.max_entries = max_entries
+        """ The maximum number of resources to keep. """
+        
+        self.ttl = ttl
+        """ Seconds after which an entry expires, None to keep entries until
+        they are evicted. """
+        
+        self.hits = 0
+        """ The number of references resolved from the cache. """
+        
+        self.misses = 0
+        """ The number of references read from the server. """
+        
+        self._entries = collections.OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @classmethod
+    def key(cls, url):
+        """ The cache key for the given absolute URL: a tuple of the URL
+        without "_history" path and the version, which may be None.
+        """
+        base, sep, version = url.partition('/_history/')
+        return (base, version.strip('/') or None)
+    
+    def resolved(self, url, fetch):
+        """ Returns the resource cached for the given absolute URL, calling
+        `fetch` to read it on a miss. Concurrent calls for the same key wait
+        for the first call's `fetch`, then return its result or raise its
+        exception.
+        
+        :param str url: The absolute URL of the resource
+        :param fetch: A callable returning the resource
+        :returns: The resource
+        """
+        key = self.key(url)
+        with self._lock:
+            entry = self._fresh_entry(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.hits += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    self._store(key, flight.value)
+            flight.done.set()
+        return flight.value
+    
+    def get(self, url):
+        """ Returns the resource cached for the given absolute URL, counting
+        a hit, without reading it on a miss.
+        
+        :param str url: The absolute URL of the resource
+        :returns: The resource, None if it isn't cached
+        """
+        with self._lock:
+            entry = self._fresh_entry(self.key(url))
+            if entry is None:
+                return None
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, url, resource):
+        """ Caches the given resource, read from the server, for the given
+        absolute URL, counting a miss.
+        
+        :param str url: The absolute URL of the resource
+        :param resource: The resource read
+        """
+        with self._lock:
+            self.misses += 1
+            self._store(self.key(url), resource)
+    
+    def _fresh_entry(self, key):
+        """ The unexpired entry for the key, marked as recently used, or
+        None. Call with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is None or (self.ttl is not None and _clock() - entry[1] >= self.ttl):
+            return None
+        self._entries.pop(key)
+        self._entries[key] = entry
+        return entry
+    
+    def _store(self, key, resource):
+        """ Stores the resource, evicting the least recently used entries
+        beyond `max_entries`. Call with the lock held.
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (resource, _clock())
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, url):
+        """ Removes the resource cached for the given absolute URL.
+        """
+        with self._lock:
+            self._entries.pop(self.key(url), None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _Flight(object):
+    """ A read in progress, which concurrent readers of the same key wait for.
+    """
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import time
+import cache
+import server
+import shutil
+import tempfile
+import unittest
+import threading
+import mockserver
+import models.patient as patient
+
+
+class TestCache(unittest.TestCase):
+    
+    def setUp(self):
+        MockHandler.resources = {
+            'Patient/1': (1, {'resourceType': 'Patient', 'id': '1', 'gender': 'male'}),
+            'Patient/2': (None, {'resourceType': 'Patient', 'id': '2'}),
+        }
+        MockHandler.statuses = []
+        self.httpd = mockserver.MockServer(MockHandler)
+        self.server = server.FHIRServer(None, base_uri=self.httpd.base_uri)
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        self.httpd.close()
+        shutil.rmtree(self.directory)
+    
+    def testRevalidation(self):
+        for backend in [cache.FHIRMemoryCacheBackend(), cache.FHIRDiskCacheBackend(self.directory)]:
+            MockHandler.statuses = []
+            self.server.cache = cache.FHIRCache(backend)
+            for i in range(3):
+                pat = patient.Patient.read('1', self.server)
+                self.assertEqual('male', pat.gender)
+            self.assertEqual([200, 304, 304], MockHandler.statuses)
+            self.assertEqual({'hits': 2, 'misses': 1, 'revalidations': 2, 'stale': 0}, self.server.cache.stats)
+            
+            # changed on the server
+            MockHandler.resources['Patient/1'][1]['gender'] = 'female'
+            MockHandler.resources['Patient/1'] = (2, MockHandler.resources['Patient/1'][1])
+            self.assertEqual('female', patient.Patient.read('1', self.server).gender)
+            self.assertEqual('female', patient.Patient.read('1', self.server).gender)
+            self.assertEqual([200, 304, 304, 200, 304], MockHandler.statuses)
+            self.assertEqual(1, self.server.cache.stale)
+            
+            # updating invalidates, responses without validators aren't cached
+            pat.update(self.server)
+            self.assertIsNone(backend.get(self.server.base_uri + 'Patient/1'))
+            self.server.request_json('Patient/2')
+            self.server.request_json('Patient/2')
+            self.assertEqual([200, 200, 200], MockHandler.statuses[-3:])
+            self.assertEqual(3, self.server.cache.misses)
+            MockHandler.resources['Patient/1'] = (1, {'resourceType': 'Patient', 'id': '1', 'gender': 'male'})
+    
+    def testMemoryBudget(self):
+        backend = cache.FHIRMemoryCacheBackend(max_bytes=10)
+        backend.set('a', {'etag': 'W/"1"', 'body': b'1234'})
+        backend.set('b', {'etag': 'W/"1"', 'body': b'1234'})
+        self.assertIsNotNone(backend.get('a'))
+        backend.set('c', {'etag': 'W/"1"', 'body': b'1234'})
+        self.assertEqual(2, len(backend))
+        self.assertEqual(8, backend.size)
+        self.assertIsNone(backend.get('b'))
+        self.assertIsNotNone(backend.get('a'))
+        
+        backend.set('d', {'etag': 'W/"1"', 'body': b'12345678901'})
+        self.assertIsNone(backend.get('d'))
+        backend.delete('a')
+        self.assertEqual(4, backend.size)
+        
+        disk = cache.FHIRDiskCacheBackend(self.directory)
+        disk.set('a', {'etag': 'W/"1"', 'last_modified': None, 'body': b'{"a": 1}\n'})
+        self.assertEqual({'key': 'a', 'etag': 'W/"1"', 'last_modified': None, 'body': b'{"a": 1}\n'}, disk.get('a'))
+        self.assertIsNone(disk.get('b'))
+        disk.delete('a')
+        self.assertIsNone(disk.get('a'))
+
+
+
+class TestReferenceCache(unittest.TestCase):
+    
+    def testSingleFlight(self):
+        refs = cache.FHIRReferenceCache(max_entries=2)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'organization'
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(refs.resolved('https://x.org/Organization/1', fetch))) for i in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(['organization'] * 5, results)
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, refs.misses)
+        
+        # errors reach all waiting callers and are not cached
+        def fail():
+            raise server.FHIRNotFoundException(None)
+        with self.assertRaises(server.FHIRNotFoundException):
+            refs.resolved('https://x.org/Organization/2', fail)
+        self.assertEqual('org 2', refs.resolved('https://x.org/Organization/2', lambda: 'org 2'))
+        
+        # keyed by version, least recently used evicted
+        self.assertEqual(('https://x.org/Organization/2', '3'), refs.key('https://x.org/Organization/2/_history/3'))
+        self.assertEqual('org 2 v3', refs.resolved('https://x.org/Organization/2/_history/3', lambda: 'org 2 v3'))
+        self.assertEqual(2, len(refs))
+        self.assertEqual('new', refs.resolved('https://x.org/Organization/1', lambda: 'new'))
+        self.assertEqual('org 2 v3', refs.resolved('https://x.org/Organization/2/_history/3', fetch))
+    
+    def testExpiry(self):
+        refs = cache.FHIRReferenceCache(ttl=0.05)
+        self.assertEqual(1, refs.resolved('https://x.org/Organization/1', lambda: 1))
+        self.assertEqual(1, refs.resolved('https://x.org/Organization/1', lambda: 2))
+        time.sleep(0.1)
+        self.assertEqual(3, refs.resolved('https://x.org/Organization/1', lambda: 3))
+        refs.invalidate('https://x.org/Organization/1')
+        self.assertEqual(4, refs.resolved('https://x.org/Organization/1', lambda: 4))
+
+
+class MockHandler(mockserver.ConditionalMockHandler):
+    """ Serves the `resources` set up by the tests.
+    """
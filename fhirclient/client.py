@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import threading
 
-from server import FHIRServer, FHIRUnauthorizedException, FHIRNotFoundException
+from auth import FHIRAuth
+from statesaver import FHIRStateSaver
+from server import FHIRServer, FHIRUnauthorizedException, FHIRNotFoundException, connection_defaults
 
 __version__ = '3.2.0'
 __author__ = 'SMART Platforms Team'
@@ -21,7 +24,7 @@ class FHIRClient(object):
     servers.
     
     The settings dictionary supports:
-    
+        
         - `app_id`*: Your app/client-id, e.g. 'my_web_app'
         - `app_secret`*: Your app/client-secret
         - `api_base`*: The FHIR service to connect to, e.g. 'https://fhir-api-dstu2.smarthealthit.org'
@@ -29,6 +32,15 @@ class FHIRClient(object):
         - `patient_id`: The patient id against which to operate, if already known
         - `scope`: Space-separated list of scopes to request, if other than default
         - `launch_token`: The launch token
+        - `pool_connections`, `pool_maxsize`, `pool_block`, `connect_timeout`,
+          `read_timeout`, `keep_alive`, `compress_requests`, `thread_safe`:
+          Connection settings, see `FHIRServer`
+        - `auth_type`: Set to 'backend_services' to authorize without a user,
+          see `FHIRBackendServicesAuth` for the settings it supports
+    
+    Connection settings are not part of the state. To apply them to a client
+    restored from its state, pass the settings along with the state; only
+    their connection settings are then used.
     """
     
     def __init__(self, settings=None, state=None, save_func=lambda x:x):
@@ -53,14 +65,21 @@ class FHIRClient(object):
         
         self.patient_id = None
         self._patient = None
+        self._lock = threading.RLock()
         
         if save_func is None:
             raise Exception("Must supply a save_func when initializing the SMART client")
         self._save_func = save_func
+        self._state_saver = FHIRStateSaver(save_func, lambda: self.state)
+        
+        self._connection = None
+        if settings is not None:
+            self._connection = dict((key, val) for key, val in settings.items() if key in connection_defaults)
         
         # init from state
         if state is not None:
             self.from_state(state)
+            self._state_saver.mark_saved(self.state)
         
         # init from settings dict
         elif settings is not None:
@@ -75,7 +94,9 @@ class FHIRClient(object):
             self.patient_id = settings.get('patient_id')
             self.scope = settings.get('scope', self.scope)
             self.launch_token = settings.get('launch_token')
-            self.server = FHIRServer(self, base_uri=settings['api_base'])
+            self.server = FHIRServer(self, base_uri=settings['api_base'], connection=self._connection)
+            if settings.get('auth_type') is not None:
+                self.server.auth = FHIRAuth.create(settings['auth_type'], state=settings)
         else:
             raise Exception("Must either supply settings or a state upon client initialization")
     
@@ -143,33 +164,39 @@ class FHIRClient(object):
     
     def _handle_launch_context(self, ctx):
         logger.debug("SMART: Handling launch context: {0}".format(ctx))
-        if 'patient' in ctx:
-            #print('Patient id was {0}, row context is {1}'.format(self.patient_id, ctx))
-            self.patient_id = ctx['patient']        # TODO: TEST THIS!
-        if 'id_token' in ctx:
-            logger.warning("SMART: Received an id_token, ignoring")
-        self.launch_context = ctx
-        self.save_state()
+        with self._lock:
+            if 'patient' in ctx:
+                #print('Patient id was {0}, row context is {1}'.format(self.patient_id, ctx))
+                self.patient_id = ctx['patient']        # TODO: TEST THIS!
+            if 'id_token' in ctx:
+                logger.warning("SMART: Received an id_token, ignoring")
+            self.launch_context = ctx
+            self.save_state()
     
     
     # MARK: Current Patient
     
     @property
     def patient(self):
-        if self._patient is None and self.patient_id is not None and self.ready:
-            import models.patient
-            try:
-                logger.debug("SMART: Attempting to read Patient {0}".format(self.patient_id))
-                self._patient = models.patient.Patient.read(self.patient_id, self.server)
-            except FHIRUnauthorizedException as e:
-                if self.reauthorize():
-                    logger.debug("SMART: Attempting to read Patient {0} after reauthorizing"
-                        .format(self.patient_id))
+        if self._patient is not None:
+            return self._patient
+        
+        # one thread reads the patient, others wait for it
+        with self._lock:
+            if self._patient is None and self.patient_id is not None and self.ready:
+                import models.patient
+                try:
+                    logger.debug("SMART: Attempting to read Patient {0}".format(self.patient_id))
                     self._patient = models.patient.Patient.read(self.patient_id, self.server)
-            except FHIRNotFoundException as e:
-                logger.warning("SMART: Patient with id {0} not found".format(self.patient_id))
-                self.patient_id = None
-            self.save_state()
+                except FHIRUnauthorizedException as e:
+                    if self.reauthorize():
+                        logger.debug("SMART: Attempting to read Patient {0} after reauthorizing"
+                            .format(self.patient_id))
+                        self._patient = models.patient.Patient.read(self.patient_id, self.server)
+                except FHIRNotFoundException as e:
+                    logger.warning("SMART: Patient with id {0} not found".format(self.patient_id))
+                    self.patient_id = None
+                self.save_state()
         
         return self._patient
     
@@ -196,11 +223,12 @@ class FHIRClient(object):
     # MARK: State
     
     def reset_patient(self):
-        self.launch_token = None
-        self.launch_context = None
-        self.patient_id = None
-        self._patient = None
-        self.save_state()
+        with self._lock:
+            self.launch_token = None
+            self.launch_context = None
+            self.patient_id = None
+            self._patient = None
+            self.save_state()
     
     @property
     def state(self):
@@ -224,8 +252,33 @@ class FHIRClient(object):
         self.patient_id = state.get('patient_id') or self.patient_id
         self.launch_token = state.get('launch_token') or self.launch_token
         self.launch_context = state.get('launch_context') or self.launch_context
-        self.server = FHIRServer(self, state=state.get('server'))
+        self.server = FHIRServer(self, state=state.get('server'), connection=self._connection)
     
     def save_state (self):
-        self._save_func(self.state)
+        """ Calls `save_func` with the current state if it changed since it
+        was last saved, or restored from, and saving isn't deferred; calls
+        from several threads are serialized, so they don't save a mix of
+        states.
+        """
+        with self._lock:
+            self._state_saver.changed()
+    
+    def deferred_save(self):
+        """ A context manager holding back the calling thread's state saves,
+        e.g. while handling one web request, calling `save_func` at most once
+        when it is left.
+        
+            with smart.deferred_save():
+                smart.handle_callback(request.url)
+                ...
+        """
+        return self._state_saver.deferred()
+    
+    @property
+    def save_stats(self):
+        """ A dictionary with the number of state saves `requests`, the
+        `writes` that called `save_func`, the saves skipped because the state
+        was `unchanged` and the number of writes `saved` overall.
+        """
+        return self._state_saver.stats
 
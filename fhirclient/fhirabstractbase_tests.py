@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import pickle
+import logging
+import unittest
+import models.bundle as bundle
+import models.coding as coding
+import models.fhirdate as fhirdate
+import models.fhirelementfactory as fhirelementfactory
+import models.patient as patient
+import models.questionnaire as questionnaire
+import models.fhirabstractbase as fabst
+import models.fhirabstractresource as fabst_resource
+
+
+class TestElementSchema(unittest.TestCase):
+    
+    def testSchemaIsCachedPerClass(self):
+        c1 = coding.Coding({'code': 'abc'})
+        c2 = coding.Coding()
+        schema = c1._element_schema()
+        self.assertIs(schema, c2._element_schema())
+        self.assertIn('_code', schema.valid)
+        self.assertIn('userSelected', schema.valid)
+        self.assertEqual(0, len(schema.nonoptionals))
+        self.assertIsNot(schema, fabst.FHIRAbstractBase()._element_schema())
+    
+    def testOverriddenElementProperties(self):
+        c = CodingWithRank({'code': 'abc', 'rank': 2})
+        self.assertEqual(2, c.rank)
+        self.assertEqual({'code': 'abc', 'rank': 2}, c.as_json())
+        with self.assertRaises(fabst.FHIRValidationError):
+            coding.Coding({'code': 'abc', 'rank': 2})
+        with self.assertRaises(fabst.FHIRValidationError):
+            CodingWithRank({'code': 'abc'})
+
+    def testSpecializedMatchesGeneric(self):
+        for filename, klass in [('test_bundle.json', bundle.Bundle),
+                ('test_contained_resource.json', questionnaire.Questionnaire)]:
+            with io.open(filename, 'r', encoding='utf-8') as h:
+                data = json.load(h)
+            fast = klass(data)
+            with GenericOnly():
+                generic = klass(data)
+                generic_js = generic.as_json()
+            self.assertEqual(generic_js, fast.as_json())
+            self.assertEqual(generic_js, generic.as_json())
+    
+    def testSpecializedFallsBackOnErrors(self):
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            coding.Coding({'code': 1, 'system': 'http://loinc.org', 'foo': 'bar'})
+        self.assertEqual(2, len(ctx.exception.errors))
+        
+        c = coding.Coding({'code': 'abc'})
+        c.display = 5
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            c.as_json()
+        self.assertEqual('display', ctx.exception.errors[0].path)
+
+    
+    def testSpecializedErrorsMatchGeneric(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        data['entry'][2]['resource']['subject']['display'] = 5
+        data['entry'][3]['resource']['foo'] = 'bar'
+        del data['entry'][4]['resource']['status']
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            bundle.Bundle(data)
+        with GenericOnly():
+            with self.assertRaises(fabst.FHIRValidationError) as gctx:
+                bundle.Bundle(data)
+        self.assertEqual(str(gctx.exception), str(ctx.exception))
+        self.assertEqual(['entry.2.resource.subject.display'],
+            [path for path, code, err in ctx.exception.issues()])
+    
+    def testTrustedJSON(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        b = bundle.Bundle.with_json(data, trusted=True)
+        self.assertEqual(bundle.Bundle(data).as_json(), b.as_json())
+        self.assertIs(b, b.entry[0]._owner)
+        self.assertIs(b.entry[0], b.entry[0].resource._owner)
+        
+        # no validation whatsoever
+        c = coding.Coding.with_json({'code': 1, 'foo': 'bar'}, trusted=True)
+        self.assertEqual(1, c.code)
+        self.assertFalse(fabst._parse_mode.trusted)
+    
+    def testTrustedRoundTrip(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        b = bundle.Bundle.with_json(data, trusted=True)
+        self.assertIs(data, b.as_json())
+        self.assertIsNone(bundle.Bundle(data)._json)
+        
+        # modified elements are serialized, unmodified children are reused
+        obs = b.entry[2].resource
+        obs.status = 'amended'
+        js = b.as_json()
+        self.assertIsNot(data, js)
+        self.assertIs(data['entry'][0], js['entry'][0])
+        self.assertIsNot(data['entry'][2], js['entry'][2])
+        self.assertIs(data['entry'][2]['resource']['code'], js['entry'][2]['resource']['code'])
+        self.assertEqual('amended', js['entry'][2]['resource']['status'])
+        self.assertEqual('Observation', js['entry'][2]['resource']['resourceType'])
+        self.assertNotEqual('amended', data['entry'][2]['resource']['status'])
+        
+        # changes to lists are noticed, too
+        b = bundle.Bundle.with_json(data, trusted=True)
+        b.entry.pop()
+        self.assertEqual(len(data['entry']) - 1, len(b.as_json()['entry']))
+        
+        b = bundle.Bundle.with_json(data, trusted=True)
+        b.entry[0].resource.name[0].given = ['Luke']
+        self.assertEqual(['Luke'], b.as_json()['entry'][0]['resource']['name'][0]['given'])
+        
+        # modified data is validated
+        b = bundle.Bundle.with_json(data, trusted=True)
+        b.entry[0].resource.name[0].family = 5
+        with self.assertRaises(fabst.FHIRValidationError):
+            b.as_json()
+    
+    def testStreaming(self):
+        for filename, klass in [('test_bundle.json', bundle.Bundle),
+                ('test_contained_resource.json', questionnaire.Questionnaire)]:
+            with io.open(filename, 'r', encoding='utf-8') as h:
+                data = json.load(h)
+            for inst in [klass(data), klass.with_json(data, lazy=True), klass.with_json(data, trusted=True)]:
+                self.assertEqual(inst.as_json(), json.loads(''.join(inst.iter_json())))
+            
+            # same key order, too
+            inst = klass.with_json(data, trusted=True)
+            self.assertEqual(json.dumps(inst.as_json()), ''.join(inst.iter_json()))
+        
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            b = bundle.Bundle(json.load(h))
+        chunks = list(b.iter_json(chunk_size=10))
+        self.assertEqual(len(b.entry) + 1, len(chunks))
+        handle = io.StringIO()
+        b.write_json(handle)
+        self.assertEqual(''.join(chunks), handle.getvalue())
+        
+        b.entry[1].resource.name[0].given = 'Luke'
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            handle.write(''.join(b.iter_json()))
+        self.assertEqual('entry.1.resource.name.0', ctx.exception.path)
+        self.assertEqual('given', ctx.exception.errors[0].path)
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            b.validate_json()
+        self.assertEqual('entry.1.resource.name.0', ctx.exception.path)
+        self.assertEqual('given', ctx.exception.errors[0].path)
+    
+    def testPickling(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            b = bundle.Bundle(json.load(h))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            b2 = pickle.loads(pickle.dumps(b, protocol))
+            self.assertEqual(b.as_json(), b2.as_json())
+            obs = b2.entry[2].resource
+            self.assertIs(b2.entry[2], obs._owner)
+            self.assertIs(b2, obs._owner._owner)
+            
+            date = pickle.loads(pickle.dumps(fhirdate.FHIRDate('2017-03-22T10:00:00Z'), protocol))
+            self.assertEqual(2017, date.date.year)
+            self.assertEqual('2017-03-22T10:00:00Z', date.as_json())
+
+
+
+class TestValidationErrors(unittest.TestCase):
+    
+    def setUp(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            self.data = json.load(h)
+        self.data['entry'][0]['resource']['name'][0]['given'] = 'Darth'
+        self.data['entry'][2]['resource']['subject']['display'] = 5
+        self.data['entry'][3]['resource']['foo'] = 'bar'
+        self.data['foo'] = 'bar'
+    
+    def testIssues(self):
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            coding.Coding({'code': 1, 'system': 'http://loinc.org', 'foo': 'bar'})
+        issues = ctx.exception.issues()
+        self.assertEqual([('code', 'wrong-type'), (None, 'superfluous')],
+            [(path, code) for path, code, err in issues])
+        self.assertIsInstance(issues[0][2], TypeError)
+        self.assertIsInstance(issues[1][2], AttributeError)
+        self.assertEqual("Wrong type <class 'int'> for property \"code\" on <class 'models.coding.Coding'>, expecting <class 'str'>",
+            str(issues[0][2]))
+        self.assertEqual('{root}:\n  code:\n    Wrong type', str(ctx.exception)[:30])
+        
+        e = pickle.loads(pickle.dumps(ctx.exception.errors[0]))
+        self.assertEqual('code', e.path)
+        self.assertEqual('wrong-type', e.errors[0].code)
+    
+    def testCollectErrors(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        fabst.logger.addHandler(handler)
+        try:
+            b, errors = bundle.Bundle.with_json_and_errors(self.data)
+        finally:
+            fabst.logger.removeHandler(handler)
+        self.assertEqual(0, len(records))
+        self.assertEqual(['entry.0.resource.name.0.given', 'entry.2.resource.subject.display', 'entry.3.resource', None],
+            [e.path for e in errors])
+        self.assertEqual(['list-expected', 'wrong-type', 'superfluous', 'superfluous'],
+            [e.issues()[0][1] for e in errors])
+        
+        # valid data is kept at any depth
+        self.assertEqual(5, len(b.entry))
+        self.assertIsNone(b.entry[0].resource.name[0].given)
+        self.assertEqual('Vader', b.entry[0].resource.name[0].family)
+        self.assertIsNone(b.entry[2].resource.subject.display)
+        self.assertEqual('Patient/23', b.entry[2].resource.subject.reference)
+        self.assertEqual('Observation', b.entry[3].resource.resource_type)
+        self.assertIsNone(fabst._parse_mode.errors)
+        
+        # not collecting, non-strict drops the invalid entries
+        b = bundle.Bundle(self.data, strict=False)
+        self.assertIsNone(b.entry)
+        
+        entries, errors = bundle.BundleEntry.with_json_and_errors(self.data['entry'])
+        self.assertEqual(5, len(entries))
+        self.assertEqual('3.resource', errors[2].path)
+
+
+class TestLazyInstantiation(unittest.TestCase):
+    
+    def setUp(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            self.data = json.load(h)
+    
+    def testLazyBundle(self):
+        b = bundle.Bundle.with_json(self.data, lazy=True)
+        self.assertIsNotNone(b._deferred)
+        self.assertEqual(self.data, b.as_json())
+        self.assertIs(self.data['entry'], b.as_json()['entry'])
+        
+        # access instantiates, children are lazy as well
+        obs = b.entry[2].resource
+        self.assertEqual('Observation', obs.resource_type)
+        self.assertIsNotNone(obs._deferred)
+        self.assertIs(b.entry[2], obs._owner)
+        self.assertIsNotNone(obs.subject)
+        self.assertIsNone(obs.issued)
+        self.assertEqual(self.data, b.as_json())
+        
+        # modified properties are serialized
+        obs.status = 'amended'
+        self.assertEqual('amended', b.as_json()['entry'][2]['resource']['status'])
+        
+        b.materialize()
+        self.assertIsNone(b._deferred)
+        self.assertIsNone(obs._deferred)
+        self.assertEqual(bundle.Bundle(self.data).as_json()['entry'][0], b.as_json()['entry'][0])
+    
+    def testLazyValidation(self):
+        self.data['foo'] = 'bar'
+        with self.assertRaises(fabst.FHIRValidationError):
+            bundle.Bundle.with_json(self.data, lazy=True)
+        del self.data['foo']
+        
+        self.data['entry'][0]['resource']['name'][0]['given'] = 'Darth'
+        b = bundle.Bundle.with_json(self.data, lazy=True)
+        pat = b.entry[0].resource
+        self.assertEqual('Patient', pat.resource_type)
+        with self.assertRaises(fabst.FHIRValidationError):
+            pat.name[0].given
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            b.materialize()
+        self.assertEqual('entry.0', str(ctx.exception.errors[0])[:7])
+    
+    def testLazyPickling(self):
+        b = bundle.Bundle.with_json(self.data, lazy=True)
+        self.assertEqual('Patient', b.entry[0].resource.resource_type)
+        b2 = pickle.loads(pickle.dumps(b))
+        self.assertIsNotNone(b2.entry[0].resource._deferred)
+        self.assertEqual('Darth', b2.entry[0].resource.name[0].given[0])
+        self.assertEqual(self.data, b2.as_json())
+
+
+
+class TestElementFactory(unittest.TestCase):
+    
+    def tearDown(self):
+        fhirelementfactory.FHIRElementFactory.classes.pop('Patient', None)
+    
+    def testInstantiate(self):
+        vp = fhirelementfactory.FHIRElementFactory.instantiate('VisionPrescription', {'id': 'vp'})
+        self.assertEqual('VisionPrescription', vp.resource_type)
+        self.assertEqual('vp', vp.id)
+        unknown = fhirelementfactory.FHIRElementFactory.instantiate('Unknown', {'id': 'x'})
+        self.assertEqual('Element', unknown.resource_type)
+    
+    def testRegisteredSubclass(self):
+        fhirelementfactory.FHIRElementFactory.register(ProfiledPatient)
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            b = bundle.Bundle(json.load(h))
+        self.assertIsInstance(b.entry[0].resource, ProfiledPatient)
+        self.assertEqual('Darth', b.entry[0].resource.first_given_name())
+        self.assertEqual('Observation', b.entry[2].resource.resource_type)
+
+
+class TestSlots(unittest.TestCase):
+    
+    def setUp(self):
+        self.data = {
+            'resourceType': 'SlottedResource',
+            'id': 'slotted-1',
+            'code': {'system': 'http://loinc.org', 'code': '85354-9'},
+            'coding': [{'code': 'a'}, {'system': 'http://snomed.info/sct', 'code': 'b'}],
+            'rank': 2,
+        }
+    
+    def testNoInstanceDict(self):
+        res = SlottedProfile(self.data)
+        self.assertFalse(hasattr(res, '__dict__'))
+        self.assertFalse(hasattr(res.code, '__dict__'))
+        self.assertEqual(self.data, res.as_json())
+    
+    def testPickling(self):
+        res = SlottedProfile(self.data)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            res2 = pickle.loads(pickle.dumps(res, protocol))
+            self.assertIsInstance(res2, SlottedProfile)
+            self.assertEqual(2, res2.rank)
+            self.assertEqual('b', res2.coding[1].code)
+            self.assertIs(res2, res2.coding[1]._owner)
+            self.assertEqual(self.data, res2.as_json())
+    
+    def testLazy(self):
+        res = SlottedProfile.with_json(self.data, lazy=True)
+        self.assertTrue(res._is_deferred('code'))
+        self.assertTrue(res._is_deferred('rank'))
+        
+        res2 = pickle.loads(pickle.dumps(res))
+        self.assertIsNotNone(res2._deferred)
+        self.assertTrue(res2._is_deferred('code'))
+        
+        self.assertEqual('85354-9', res2.code.code)
+        self.assertFalse(res2._is_deferred('code'))
+        self.assertTrue(res2._is_deferred('coding'))
+        self.assertIs(res2, res2.code._owner)
+        self.assertEqual(self.data, res2.as_json())
+        
+        res2.materialize()
+        self.assertIsNone(res2._deferred)
+        self.assertEqual('a', res2.coding[0].code)
+        self.assertEqual(self.data, res2.as_json())
+        
+        self.data['coding'][0]['code'] = 1
+        res = SlottedProfile.with_json(self.data, lazy=True)
+        self.assertEqual(2, len(res.coding))
+        with self.assertRaises(fabst.FHIRValidationError):
+            res.coding[0].code
+    
+    def testTrusted(self):
+        res = SlottedProfile.with_json(self.data, trusted=True)
+        self.assertIs(self.data, res.as_json())
+        
+        res2 = pickle.loads(pickle.dumps(res))
+        self.assertEqual(self.data, res2.as_json())
+        
+        res.coding[1].code = 'c'
+        js = res.as_json()
+        self.assertIsNot(self.data, js)
+        self.assertIs(self.data['code'], js['code'])
+        self.assertIs(self.data['coding'][0], js['coding'][0])
+        self.assertEqual('c', js['coding'][1]['code'])
+        self.assertEqual('SlottedResource', js['resourceType'])
+        
+        res.rank = 'first'
+        with self.assertRaises(fabst.FHIRValidationError):
+            res.as_json()
+
+
+class ProfiledPatient(patient.Patient):
+    """ A Patient subclass as used to implement profiles.
+    """
+    
+    def first_given_name(self):
+        return self.name[0].given[0] if self.name and self.name[0].given else None
+
+
+class GenericOnly(object):
+    """ Context manager disabling the specialized (de)serializers of all
+    compiled element schemas.
+    """
+    
+    def __enter__(self):
+        self.patched = []
+        for klass in _subclasses(fabst.FHIRAbstractBase):
+            schema = klass.__dict__.get('_fhir_schema')
+            if schema is not None:
+                self.patched.append((schema, schema.from_json, schema.to_json))
+                schema.from_json = lambda inst, jsondict: (0, None)
+                schema.to_json = lambda inst: None
+        return self
+    
+    def __exit__(self, *exc):
+        for schema, from_json, to_json in self.patched:
+            schema.from_json = from_json
+            schema.to_json = to_json
+
+
+def _subclasses(klass):
+    for sub in klass.__subclasses__():
+        yield sub
+        for subsub in _subclasses(sub):
+            yield subsub
+
+
+class CodingWithRank(coding.Coding):
+    """ A Coding subclass adding a required property.
+    """
+    
+    def __init__(self, jsondict=None, strict=True):
+        self.rank = None
+        super(CodingWithRank, self).__init__(jsondict=jsondict, strict=strict)
+    
+    def elementProperties(self):
+        js = super(CodingWithRank, self).elementProperties()
+        js.append(("rank", "rank", int, False, None, True))
+        return js
+
+
+class SlottedCoding(fabst.FHIRAbstractBase):
+    """ An element class as generated with `use_slots`.
+    """
+    
+    __slots__ = ("system", "code", )
+    
+    def __init__(self, jsondict=None, strict=True):
+        self.system = None
+        self.code = None
+        super(SlottedCoding, self).__init__(jsondict=jsondict, strict=strict)
+    
+    def elementProperties(self):
+        js = super(SlottedCoding, self).elementProperties()
+        js.extend([
+            ("system", "system", str, False, None, False),
+            ("code", "code", str, False, None, False),
+        ])
+        return js
+
+
+class SlottedResource(fabst_resource.FHIRAbstractResource):
+    """ A resource class as generated with `use_slots`.
+    """
+    
+    resource_type = "SlottedResource"
+    
+    __slots__ = ("id", "code", "coding", )
+    
+    def __init__(self, jsondict=None, strict=True):
+        self.id = None
+        self.code = None
+        self.coding = None
+        super(SlottedResource, self).__init__(jsondict=jsondict, strict=strict)
+    
+    def elementProperties(self):
+        js = super(SlottedResource, self).elementProperties()
+        js.extend([
+            ("id", "id", str, False, None, False),
+            ("code", "code", SlottedCoding, False, None, True),
+            ("coding", "coding", SlottedCoding, True, None, False),
+        ])
+        return js
+
+
+class SlottedProfile(SlottedResource):
+    """ A slotted subclass of a slotted resource, adding a property.
+    """
+    
+    __slots__ = ("rank", )
+    
+    def __init__(self, jsondict=None, strict=True):
+        self.rank = None
+        super(SlottedProfile, self).__init__(jsondict=jsondict, strict=strict)
+    
+    def elementProperties(self):
+        js = super(SlottedProfile, self).elementProperties()
+        js.append(("rank", "rank", int, False, None, False))
+        return js
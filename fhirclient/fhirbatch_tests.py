@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import time
+import logging
+import server
+import unittest
+import mockserver
+import models.patient as patient
+import models.fhirbatch as fhirbatch
+
+
+logging.basicConfig(level=logging.CRITICAL)
+
+
+class TestBatchWriter(unittest.TestCase):
+    
+    def setUp(self):
+        MockHandler.bundles = []
+        MockHandler.status = 200
+        self.httpd = mockserver.MockServer(MockHandler)
+        self.server = server.FHIRServer(None, base_uri=self.httpd.base_uri)
+    
+    def tearDown(self):
+        self.httpd.close()
+    
+    def testBatch(self):
+        created = [patient.Patient({'gender': 'male'}) for i in range(3)]
+        updated = patient.Patient({'id': 'upd', 'gender': 'female'})
+        failing = patient.Patient({'id': 'fail'})
+        deleted = patient.Patient({'id': 'del'})
+        
+        with fhirbatch.FHIRBatchWriter(self.server, batch_size=4) as writer:
+            full_url = writer.create(created[0])
+            self.assertTrue(full_url.startswith('urn:uuid:'))
+            writer.create(created[1])
+            writer.update(updated)
+            writer.update(failing)
+            self.assertEqual(0, len(writer))
+            self.assertEqual(1, len(MockHandler.bundles))
+            writer.create(created[2])
+            writer.delete(deleted)
+            self.assertEqual(2, len(writer))
+        self.assertEqual(2, len(MockHandler.bundles))
+        
+        first = MockHandler.bundles[0]
+        self.assertEqual('batch', first['type'])
+        self.assertEqual([('POST', 'Patient'), ('POST', 'Patient'), ('PUT', 'Patient/upd'), ('PUT', 'Patient/fail')],
+            [(entry['request']['method'], entry['request']['url']) for entry in first['entry']])
+        self.assertEqual(full_url, first['entry'][0]['fullUrl'])
+        self.assertEqual('female', first['entry'][2]['resource']['gender'])
+        self.assertNotIn('resource', MockHandler.bundles[1]['entry'][1])
+        
+        self.assertEqual(['new-0', 'new-1', 'new-4'], [pat.id for pat in created])
+        self.assertEqual('1', created[0].meta.versionId)
+        self.assertIs(self.server, created[0].origin_server)
+        self.assertEqual('2', updated.meta.versionId)
+        self.assertEqual(1, len(writer.failures))
+        self.assertIs(failing, writer.failures[0].resource)
+        self.assertEqual(('PUT', 400), (writer.failures[0].method, writer.failures[0].status))
+        self.assertEqual('invalid', writer.failures[0].outcome['issue'][0]['code'])
+    
+    def testInvalidEntries(self):
+        created = [patient.Patient({'gender': 'male'}) for i in range(3)]
+        created[1].gender = 5
+        writer = fhirbatch.FHIRBatchWriter(self.server)
+        for pat in created:
+            writer.create(pat)
+        writer.update(patient.Patient({'id': 'nostatus'}))
+        writer.update(patient.Patient({'id': 'intstatus'}))
+        results = writer.flush()
+        
+        # invalid resources are not sent but fail on their own
+        self.assertEqual(1, len(MockHandler.bundles))
+        self.assertEqual(4, len(MockHandler.bundles[0]['entry']))
+        self.assertEqual(created, [res for res, error in results[:3]])
+        self.assertEqual(['new-0', None, 'new-1'], [pat.id for pat in created])
+        self.assertIsNone(results[0][1])
+        self.assertEqual('POST', results[1][1].method)
+        self.assertIn('gender', str(results[1][1]))
+        
+        # as do entries without a proper status
+        self.assertIsNone(results[3][1].status)
+        self.assertIsNone(results[4][1].status)
+        self.assertEqual([results[1][1], results[3][1], results[4][1]], writer.failures)
+    
+    def testTransactionFailure(self):
+        MockHandler.status = 422
+        writer = fhirbatch.FHIRBatchWriter(self.server, transaction=True)
+        pat = patient.Patient({'gender': 'male'})
+        writer.create(pat)
+        writer.delete(patient.Patient({'id': 'del'}))
+        results = writer.flush()
+        self.assertEqual('transaction', MockHandler.bundles[0]['type'])
+        self.assertIs(pat, results[0][0])
+        self.assertEqual([422, 422], [error.status for res, error in results])
+        self.assertEqual('DELETE', results[1][1].method)
+        self.assertIsNone(pat.id)
+        self.assertEqual(2, len(writer.failures))
+        self.assertEqual([], writer.flush())
+    
+    def testFlushInterval(self):
+        writer = fhirbatch.FHIRBatchWriter(self.server, flush_interval=0.05)
+        pat = patient.Patient({'gender': 'male'})
+        writer.create(pat)
+        for i in range(100):
+            if pat.id is not None:
+                break
+            time.sleep(0.02)
+        self.assertEqual('new-0', pat.id)
+        self.assertEqual(0, len(writer))
+        self.assertEqual(1, len(MockHandler.bundles))
+
+
+class MockHandler(mockserver.MockHandler):
+    """ Answers batch and transaction Bundles, failing entries whose URL
+    contains "fail" and omitting or mistyping the status of those whose
+    URL contains "nostatus" or "intstatus"; answers with `status` and an OperationOutcome instead
+    unless it is 200. Records the Bundles received.
+    """
+    bundles = None
+    status = 200
+    
+    def do_POST(self):
+        bundle = self.read_json()
+        self.bundles.append(bundle)
+        
+        outcome = {'resourceType': 'OperationOutcome', 'issue': [{'severity': 'error', 'code': 'invalid'}]}
+        if 200 != self.status:
+            return self.respond(self.status, outcome)
+        
+        entries = []
+        for entry in bundle['entry']:
+            method, url = entry['request']['method'], entry['request']['url']
+            if 'fail' in url:
+                entries.append({'response': {'status': '400 Bad Request', 'outcome': outcome}})
+            elif 'nostatus' in url:
+                entries.append({'response': {}})
+            elif 'intstatus' in url:
+                entries.append({'response': {'status': 200}})
+            elif 'POST' == method:
+                entries.append({'response': {'status': '201 Created', 'location': '{}/new-{}/_history/1'.format(url, len(entries) + 4 * (len(self.bundles) - 1))}})
+            elif 'PUT' == method:
+                entries.append({'response': {'status': '200 OK', 'location': '{}/_history/2'.format(url), 'etag': 'W/"2"'}})
+            else:
+                entries.append({'response': {'status': '204 No Content'}})
+        self.respond(200, {'resourceType': 'Bundle', 'type': '{}-response'.format(bundle['type']), 'entry': entries})
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import server
+import unittest
+import models.bundle as bundle
+import models.patient as patient
+import models.fhirabstractbase as fabst
+import models.fhirbundlereader as fhirbundlereader
+
+
+class TestBundleReader(unittest.TestCase):
+    
+    def setUp(self):
+        with io.open('test_bundle.json', 'rb') as h:
+            self.raw = h.read()
+        self.data = json.loads(self.raw.decode('utf-8'))
+    
+    def testReadEntries(self):
+        expected = [entry.as_json() for entry in bundle.Bundle(self.data).entry]
+        for size in [1, 7, 100, len(self.raw)]:
+            reader = fhirbundlereader.FHIRBundleReader(chunked(self.raw, size))
+            entries = list(reader)
+            self.assertEqual(expected, [entry.as_json() for entry in entries])
+            self.assertIs(reader.bundle, entries[0]._owner)
+            self.assertEqual('collection', reader.bundle.type)
+            self.assertIsNone(reader.bundle.entry)
+            with self.assertRaises(Exception):
+                list(reader)
+        
+        reader = fhirbundlereader.FHIRBundleReader([self.raw], lazy=True)
+        resources = list(reader.resources())
+        self.assertEqual('Darth', resources[0].name[0].given[0])
+        self.assertIsNotNone(resources[2]._deferred)
+    
+    def testMembersAndText(self):
+        text = '{"type": "collection", "entry": [{"resource": {"resourceType": "Patient", "name": [{"given": ["Łukasz"]}]}}], "total": 1234}'
+        raw = text.encode('utf-8')
+        for size in [1, 2, 3]:
+            reader = fhirbundlereader.FHIRBundleReader(chunked(raw, size))
+            self.assertEqual('Łukasz', next(iter(reader)).resource.name[0].given[0])
+            self.assertIsNone(reader.bundle.total)
+        reader = fhirbundlereader.FHIRBundleReader(chunked(text, 5))
+        self.assertEqual(1, len(list(reader)))
+        self.assertEqual(1234, reader.bundle.total)
+        
+        reader = fhirbundlereader.FHIRBundleReader(['{"type": "searchset", "entry": []}'])
+        self.assertEqual([], list(reader))
+        self.assertEqual('searchset', reader.bundle.type)
+    
+    def testInvalidData(self):
+        with self.assertRaises(ValueError):
+            list(fhirbundlereader.FHIRBundleReader([self.raw[:-30]]))
+        with self.assertRaises(ValueError):
+            list(fhirbundlereader.FHIRBundleReader(['{"type": "searchset", "entry": [{}}']))
+        with self.assertRaises(Exception):
+            list(fhirbundlereader.FHIRBundleReader(['{"resourceType": "Patient", "id": "x"}']))
+        
+        self.data['entry'][1]['resource']['name'][0]['given'] = 'Ben'
+        with self.assertRaises(fabst.FHIRValidationError) as ctx:
+            list(fhirbundlereader.FHIRBundleReader([json.dumps(self.data)]))
+        self.assertEqual('entry.1', ctx.exception.path)
+    
+    def testSearchStream(self):
+        search = patient.Patient.where({'name': 'Darth'})
+        reader = search.perform_stream(MockServer())
+        entries = list(reader)
+        self.assertEqual(5, len(entries))
+        self.assertIsNotNone(entries[0].resource.origin_server)
+
+
+def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i+size]
+
+
+class MockServer(server.FHIRServer):
+    """ Streams the local Bundle file for any path.
+    """
+    
+    def __init__(self):
+        super().__init__(None, base_uri='https://fhir.smarthealthit.org')
+    
+    def request_json_stream(self, path, nosign=False, chunk_size=65536):
+        assert path
+        with io.open('test_bundle.json', 'rb') as handle:
+            return chunked(handle.read(), 100)
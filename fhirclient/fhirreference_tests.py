@@ -11,6 +11,10 @@ import models.resource as resource
 import models.valueset as valueset
 import models.patient as patient
 import models.bundle as bundle
+import models.practitioner as practitioner
+import models.fhirreference as fhirreference
+import models.observation as observation
+import cache
 import server
 
 
@@ -115,6 +119,125 @@ class TestResourceReference(unittest.TestCase):
         self.assertEqual(res, patURN)
         res = obs34.subject.resolved(patient.Patient)
         self.assertIsNone(res, "Must not resolve Patient on same server but different endpoint")
+    
+    
+    def testSharedReferenceCache(self):
+        with io.open('test_relative_reference.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        srv = MockServer()
+        srv.reference_cache = cache.FHIRReferenceCache()
+        resolved = []
+        for i in range(3):
+            q = questionnaire.Questionnaire(data)
+            q._server = srv
+            options = q.item[0].item[0].item[0].options
+            resolved.append(options.resolved(valueset.ValueSet))
+            self.assertIsNone(options.resolved(medication.Medication), "Must not resolve on resource type mismatch")
+        
+        self.assertEqual('Type options for Observation.subject', resolved[0].name)
+        self.assertIs(resolved[0], resolved[2])
+        self.assertEqual(1, len(srv.paths))
+        self.assertEqual((1, 2), (srv.reference_cache.misses, srv.reference_cache.hits))
+        self.assertEqual(('https://fhir.smarthealthit.org/ValueSet/vs2r', None), list(srv.reference_cache._entries)[0])
+    
+    
+    def testResolveAll(self):
+        def observation(subject, performer=None):
+            data = {'resourceType': 'Observation', 'status': 'final', 'code': {'text': 'x'}, 'subject': {'reference': subject}}
+            if performer is not None:
+                data['performer'] = [{'reference': performer}]
+            return data
+        data = {
+            'resourceType': 'Bundle',
+            'type': 'searchset',
+            'entry': [
+                {'resource': observation('Patient/1', 'Practitioner/9')},
+                {'resource': observation('Patient/2', 'Patient/1')},
+                {'resource': observation('Patient/3')},
+                {'resource': observation('Patient/4')},
+                {'fullUrl': 'https://fhir.smarthealthit.org/Patient/4', 'resource': {'resourceType': 'Patient', 'id': '4'}},
+                {'resource': observation('https://other.org/Patient/5', 'Patient/1/_history/2')},
+                {'resource': observation('#pat')},
+            ],
+        }
+        b = bundle.Bundle(data)
+        srv = MockServer()
+        srv.files = {
+            'Patient/1': {'resourceType': 'Patient', 'id': '1'},
+            'Patient/2': {'resourceType': 'Patient', 'id': '2'},
+            'Practitioner/9': {'resourceType': 'Practitioner', 'id': '9'},
+        }
+        b._server = srv
+        
+        results = fhirreference.FHIRReference.resolve_all(b)
+        self.assertEqual(['Patient/1', 'Patient/2', 'Patient/3', 'Practitioner/9'], sorted(results))
+        self.assertIsInstance(results['Patient/3'][1], server.FHIRNotFoundException)
+        self.assertEqual(['Patient/1', 'Patient/2', 'Patient/3', 'Practitioner/9'], sorted(srv.paths))
+        
+        obs = [entry.resource for entry in b.entry]
+        self.assertIs(results['Patient/1'][0], obs[0].subject.resolved(patient.Patient))
+        self.assertIs(results['Patient/1'][0], obs[1].performer[0].resolved(patient.Patient))
+        self.assertEqual('9', obs[0].performer[0].resolved(practitioner.Practitioner).id)
+        self.assertEqual('4', obs[3].subject.resolved(patient.Patient).id)
+        self.assertEqual(4, len(srv.paths))
+        
+        # nothing left to resolve
+        self.assertEqual(['Patient/3'], list(fhirreference.FHIRReference.resolve_all(obs)))
+        
+        # the server's reference cache is used and filled
+        srv = MockServer()
+        srv.files = b._server.files
+        srv.reference_cache = cache.FHIRReferenceCache()
+        first = bundle.Bundle({'resourceType': 'Bundle', 'type': 'searchset', 'entry': data['entry'][:1]})
+        first._server = srv
+        self.assertEqual('1', first.entry[0].resource.subject.resolved(patient.Patient).id)
+        self.assertEqual(['Patient/1'], srv.paths)
+        
+        b = bundle.Bundle(data)
+        b._server = srv
+        results = fhirreference.FHIRReference.resolve_all(b)
+        self.assertIs(first.entry[0].resource.subject.resolved(patient.Patient), results['Patient/1'][0])
+        self.assertEqual(['Patient/1', 'Patient/2', 'Patient/3', 'Practitioner/9'], sorted(srv.paths))
+        self.assertEqual((3, 2), (srv.reference_cache.misses, srv.reference_cache.hits))
+        
+        again = bundle.Bundle(data)
+        again._server = srv
+        self.assertIs(results['Patient/2'][0], again.entry[1].resource.subject.resolved(patient.Patient))
+        self.assertEqual(4, len(srv.paths))
+    
+    def testSearchIncludes(self):
+        def observation_entry(subject, performer):
+            return {'resource': {'resourceType': 'Observation', 'status': 'final', 'code': {'text': 'x'},
+                'subject': {'reference': subject}, 'performer': [{'reference': performer}]}, 'search': {'mode': 'match'}}
+        srv = MockServer()
+        search = observation.Observation.where({'code': 'x'}).include('subject').include('performer')
+        self.assertEqual('Observation?code=x&_include=Observation:subject&_include=Observation:performer', search.construct())
+        srv.files[search.construct()] = {
+            'resourceType': 'Bundle',
+            'type': 'searchset',
+            'entry': [
+                observation_entry('Patient/1', 'https://fhir.smarthealthit.org/Practitioner/9'),
+                observation_entry('Patient/2', 'Practitioner/8'),
+                {'fullUrl': 'https://fhir.smarthealthit.org/Patient/1', 'resource': {'resourceType': 'Patient', 'id': '1'}, 'search': {'mode': 'include'}},
+                {'resource': {'resourceType': 'Practitioner', 'id': '9'}, 'search': {'mode': 'include'}},
+                {'resource': {'resourceType': 'OperationOutcome', 'issue': [{'severity': 'information', 'code': 'informational'}]}, 'search': {'mode': 'outcome'}},
+            ],
+        }
+        
+        matches, included = search.perform_with_includes(srv)
+        self.assertEqual(['Observation', 'Observation'], [res.resource_type for res in matches])
+        self.assertEqual(['Patient', 'Practitioner'], [res.resource_type for res in included])
+        self.assertIs(included[0], matches[0].subject.resolved(patient.Patient))
+        self.assertIs(included[1], matches[0].performer[0].resolved(practitioner.Practitioner))
+        self.assertEqual(1, len(srv.paths))
+        
+        # not included, read from the server
+        srv.files['Patient/2'] = {'resourceType': 'Patient', 'id': '2'}
+        self.assertEqual('2', matches[1].subject.resolved(patient.Patient).id)
+        self.assertEqual(['Patient/2'], srv.paths[1:])
+        
+        with self.assertRaises(Exception):
+            search.revinclude('target')
 
 
 class MockServer(server.FHIRServer):
@@ -123,9 +246,16 @@ class MockServer(server.FHIRServer):
     
     def __init__(self):
         super().__init__(None, base_uri='https://fhir.smarthealthit.org')
+        self.paths = []
+        self.files = {}
     
     def request_json(self, path, nosign=False):
         assert path
+        self.paths.append(path)
+        if path in self.files:
+            return self.files[path]
+        if '/' in path and not os.path.exists('_'.join(os.path.split(path)) + '.json'):
+            raise server.FHIRNotFoundException(None)
         parts = os.path.split(path)
         filename = '_'.join(parts) + '.json'
         with io.open(filename, 'r', encoding='utf-8') as handle:
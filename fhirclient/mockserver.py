@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+#  Local HTTP server for the tests, answering requests with a `MockHandler`
+#  subclass from a background thread.
+
+import io
+import gzip
+import json
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:         # Python 2
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """ Handles each request in its own thread, like the class of the same
+    name that `http.server` only has since Python 3.7.
+    """
+    daemon_threads = True
+
+
+class MockServer(object):
+    """ Serves requests with the given handler class on a free local port,
+    until closed.
+    """
+    
+    def __init__(self, handler):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.port = self.httpd.server_port
+        self.base_uri = 'http://127.0.0.1:{0}/'.format(self.port)
+        thread = threading.Thread(target=self.httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """ Base class of the tests' request handlers: keeps connections alive,
+    logs nothing, reads request bodies and answers with JSON.
+    """
+    protocol_version = 'HTTP/1.1'
+    content_type = 'application/fhir+json'
+    
+    def log_message(self, *args):
+        pass
+    
+    def read_body(self):
+        """ Reads the request body, sent chunked or with a Content-Length,
+        decompressing it if it is gzipped.
+        
+        :returns: The body's bytes, None if the request has no body
+        """
+        if 'chunked' == self.headers.get('Transfer-Encoding'):
+            data = b''
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                data += self.rfile.read(size)
+                self.rfile.readline()
+                if 0 == size:
+                    break
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            if 0 == length:
+                return None
+            data = self.rfile.read(length)
+        if 'gzip' == self.headers.get('Content-Encoding'):
+            data = gzip.GzipFile(fileobj=io.BytesIO(data)).read()
+        return data
+    
+    def read_json(self):
+        """ Reads the request body and decodes it as JSON.
+        
+        :returns: The decoded JSON, None if the request has no body
+        """
+        data = self.read_body()
+        return json.loads(data.decode('utf-8')) if data is not None else None
+    
+    def respond(self, status, data=None, headers=None):
+        """ Answers with the given status and `data` as JSON body, empty if
+        `data` is None.
+        
+        :param int status: The HTTP status code
+        :param data: The JSON to send
+        :param dict headers: Additional headers to send
+        """
+        body = json.dumps(data).encode('utf-8') if data is not None else b''
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', self.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ConditionalMockHandler(MockHandler):
+    """ Serves `resources`, a dict of (version, JSON) tuples by path, with an
+    ETag unless the version is None, and answers "304 Not Modified" when
+    the request's "If-None-Match" header matches it. Records the statuses
+    sent in `statuses`.
+    """
+    resources = None
+    statuses = None
+    
+    def respond(self, status, data=None, etag=None):
+        self.statuses.append(status)
+        MockHandler.respond(self, status, data, {'ETag': etag} if etag is not None else None)
+    
+    def do_GET(self):
+        if self.path[1:] not in self.resources:
+            return self.respond(404)
+        version, data = self.resources[self.path[1:]]
+        etag = 'W/"{0}"'.format(version) if version is not None else None
+        if etag is not None and etag == self.headers.get('If-None-Match'):
+            self.respond(304, etag=etag)
+        else:
+            self.respond(200, data, etag)
+    
+    def do_PUT(self):
+        self.read_body()
+        self.respond(200)
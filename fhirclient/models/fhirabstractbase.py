@@ -4,7 +4,10 @@
 #  Base class for all FHIR elements.
 
 import sys
+import json
 import logging
+import threading
+import contextlib
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +15,9 @@ logger = logging.getLogger(__name__)
 class FHIRValidationError(Exception):
     """ Exception raised when one or more errors occurred during model
     validation.
+    
+    The message is only formatted when the exception is converted to a
+    string; `issues()` gives structured access to the errors.
     """
     
     def __init__(self, errors, path=None):
@@ -23,10 +29,7 @@ class FHIRValidationError(Exception):
         """
         if not isinstance(errors, list):
             errors = [TypeError(errors)]
-        msgs = "\n  ".join([str(e).replace("\n", "\n  ") for e in errors])
-        message = "{}:\n  {}".format(path or "{root}", msgs)
-        
-        super(FHIRValidationError, self).__init__(message)
+        super(FHIRValidationError, self).__init__(errors, path)
         
         self.errors = errors
         """ A list of validation errors encountered. Typically contains
@@ -40,12 +43,440 @@ class FHIRValidationError(Exception):
         applied. """
         path = '{}.{}'.format(path_prefix, self.path) if self.path is not None else path_prefix
         return self.__class__(self.errors, path)
+    
+    def issues(self):
+        """ Flattens the receiver's nested errors, without formatting any
+        messages.
+        
+        :returns: A list of ("path", "code", error) tuples, where "path" is
+            the dotted property path (None for the root), "code" the error's
+            `code` (None for errors without one) and error the innermost
+            exception
+        """
+        issues = []
+        for err in self.errors:
+            if isinstance(err, FHIRValidationError):
+                for path, code, leaf in err.issues():
+                    if self.path is not None:
+                        path = '{}.{}'.format(self.path, path) if path is not None else self.path
+                    issues.append((path, code, leaf))
+            else:
+                issues.append((self.path, getattr(err, 'code', None), err))
+        return issues
+    
+    def __str__(self):
+        msgs = "\n  ".join([str(e).replace("\n", "\n  ") for e in self.errors])
+        return "{}:\n  {}".format(self.path or "{root}", msgs)
+
+
+_messages = {
+    'not-dict': "Non-dict type {} fed to `{}` on {}",
+    'wrong-type': "Wrong type {} for property \"{}\" on {}, expecting {}",
+    'list-expected': "Wrong type {} for list property \"{}\" on {}, expecting a list of {}",
+    'missing': "Non-optional property \"{}\" on {} is missing",
+    'superfluous': "Superfluous entry \"{}\" in data for {}",
+    'value-wrong-type': "Expecting property \"{}\" on {} to be {}, but is {}",
+    'value-list-expected': "Expecting property \"{}\" on {} to be list, but is {}",
+    'value-missing': "Property \"{}\" on {} is not optional, you must provide a value for it",
+}
+
+
+class _DeferredMessage(object):
+    """ Mixin for validation errors that keep a `code` and the arguments of
+    their message, which is only formatted when needed.
+    """
+    
+    def __init__(self, code, *args):
+        super(_DeferredMessage, self).__init__(code, *args)
+        self.code = code
+        """ The kind of error, a key of `_messages`. """
+    
+    def __str__(self):
+        return _messages[self.code].format(*self.args[1:])
+
+
+class _TypeError(_DeferredMessage, TypeError):
+    pass
+
+
+class _KeyError(_DeferredMessage, KeyError):
+    pass
+
+
+class _AttributeError(_DeferredMessage, AttributeError):
+    pass
+
+
+class FHIRElementSchema(object):
+    """ The properties of one FHIR element class, compiled once from the
+    class's `elementProperties()` so that (de)serialization does not have to
+    rebuild the property list for every instance.
+    """
+    
+    def __init__(self, klass, properties):
+        """ Initializer.
+        
+        :param type klass: The class the schema describes
+        :param list properties: The tuples returned by `elementProperties()`
+        """
+        self.klass = klass
+        """ The class the schema belongs to. """
+        
+        self.properties = tuple(properties)
+        """ Tuples of ("name", "json_name", type, is_list, "of_many", not_optional). """
+        
+        self.valid = set(['resourceType'])   # used to also contain `fhir_comments` until STU-3
+        """ JSON keys that may appear in data for the element. """
+        
+        self.of_many = {}
+        """ Choice-type groups, mapping "of_many" to a list of JSON names. """
+        
+        self.nonoptionals = set()
+        """ JSON names (or "of_many" group names) that must be present. """
+        
+        self.names = {}
+        """ Maps property names to their property tuples. """
+        
+        for prop in self.properties:
+            name, jsname, typ, is_list, of_many, not_optional = prop
+            self.names[name] = prop
+            self.valid.add(jsname)
+            self.valid.add('_'+jsname)     # TODO: allow `_name` only if this is a primitive!
+            if of_many is not None:
+                self.valid.add(of_many)
+                self.of_many.setdefault(of_many, []).append(jsname)
+            if not_optional:
+                self.nonoptionals.add(of_many or jsname)
+        
+        self.types = {}
+        """ Maps property names to the class (or tuple of classes) their
+        values must be instances of, for use with `isinstance()`. """
+        
+        for name, jsname, typ, is_list, of_many, not_optional in self.properties:
+            self.types[name] = typ if hasattr(typ, 'with_json_and_owner') else _accepted_types(typ)
+        
+        self.from_json = None
+        """ Specialized `update_with_json()` for the class; returns True on
+        success, otherwise where the generic (error reporting) code path
+        must take over. """
+        
+        self.from_trusted_json = None
+        """ Specialized `update_with_json()` for the class that performs no
+        validation at all, for data known to be valid. """
+        
+        self.to_json = None
+        """ Specialized `as_json()` for the class; returns None if the
+        instance needs the generic (error reporting) code path. """
+        
+        self.unmodified = None
+        """ Tests whether an instance's properties still are exactly the
+        values instantiated from a given JSON dictionary, see `as_json()`. """
+        
+        self._compile()
+    
+    
+    # MARK: Specialized (De)Serialization
+    
+    def _compile(self):
+        """ Generates straight-line deserialization and serialization
+        functions for the properties, with names and types inlined. Except
+        for `from_trusted_json()`, these functions only handle valid data and
+        bail out on the first problem, leaving error reporting to the generic
+        loops in `FHIRAbstractBase`.
+        """
+        namespace = {
+            'FHIRAbstractBase': FHIRAbstractBase,
+            'FHIRValidationError': FHIRValidationError,
+            'valid': self.valid,
+        }
+        for i, prop in enumerate(self.properties):
+            namespace['T{}'.format(i)] = self.types[prop[0]]
+        
+        source = self._from_json_source() + self._from_trusted_json_source() \
+            + self._to_json_source() + self._unmodified_source()
+        exec('\n'.join(source + ['']), namespace)
+        self.from_json = namespace['from_json']
+        self.from_trusted_json = namespace['from_trusted_json']
+        self.to_json = namespace['to_json']
+        self.unmodified = namespace['unmodified']
+    
+    def _from_json_source(self):
+        """ Source lines of `from_json()`, which returns True on success.
+        On the first problem with the data it returns a tuple of the index
+        of the property where the generic code path must resume, and the
+        exception raised when instantiating that property's value (None if
+        the value needs to be instantiated again). Instantiation exceptions
+        are handed on so that invalid data nested deeply is not instantiated
+        again on every level.
+        """
+        src = ['def from_json(self, jsondict):',
+            '    if not valid.issuperset(jsondict):',
+            '        return 0, None']
+        for i, (name, jsname, typ, is_list, of_many, not_optional) in enumerate(self.properties):
+            t = 'T{}'.format(i)
+            fail = 'return {}, None'.format(i)
+            is_element = hasattr(typ, 'with_json_and_owner')
+            
+            # instantiate elements (calling plain element classes directly),
+            # then test the type and assign
+            src.append('    v = jsondict.get({!r})'.format(jsname))
+            src.append('    if v is not None:')
+            if is_list:
+                src.append('        if not isinstance(v, list): {}'.format(fail))
+            if is_element and _is_plain_element(typ):
+                if is_list:
+                    src.extend([
+                        '        lst = []',
+                        '        for e in v:',
+                        '            if e.__class__ is not dict: {}'.format(fail),
+                        '            try: e = {}(e)'.format(t),
+                        '            except FHIRValidationError as x: return {}, x.prefixed(str(len(lst)))'.format(i),
+                        '            except Exception: {}'.format(fail),
+                        '            e._owner = self',
+                        '            lst.append(e)',
+                        '        v = lst'])
+                else:
+                    src.extend([
+                        '        if v.__class__ is not dict: {}'.format(fail),
+                        '        try: v = {}(v)'.format(t),
+                        '        except FHIRValidationError as x: return {}, x'.format(i),
+                        '        except Exception: {}'.format(fail),
+                        '        v._owner = self'])
+            elif is_element:
+                src.extend([
+                    '        try: v = {}.with_json_and_owner(v, self)'.format(t),
+                    '        except Exception as x: return {}, x'.format(i)])
+            if is_list:
+                src.append('        if v and not isinstance(v[0], {}): {}'.format(t, fail))
+            else:
+                src.append('        if not isinstance(v, {}): {}'.format(t, fail))
+            src.append('        self.{} = v'.format(name))
+        
+        # non-optional properties, `of_many` groups need one of their members
+        for required in sorted(self.nonoptionals):
+            members = self.of_many.get(required) or [required]
+            src.append('    if {}: return {}, None'.format(' and '.join(
+                ['jsondict.get({!r}) is None'.format(m) for m in members]), len(self.properties)))
+        
+        src.append('    return True')
+        return src
+    
+    def _from_trusted_json_source(self):
+        """ Source lines of `from_trusted_json()`, which instantiates and
+        assigns without any checks.
+        """
+        src = ['def from_trusted_json(self, jsondict):']
+        for i, (name, jsname, typ, is_list, of_many, not_optional) in enumerate(self.properties):
+            t = 'T{}'.format(i)
+            src.append('    v = jsondict.get({!r})'.format(jsname))
+            src.append('    if v is not None:')
+            if _is_plain_element(typ):
+                if is_list:
+                    src.extend([
+                        '        v = [{}(e) for e in v]'.format(t),
+                        '        for e in v: e._owner = self'])
+                else:
+                    src.extend([
+                        '        v = {}(v)'.format(t),
+                        '        v._owner = self'])
+            elif hasattr(typ, 'with_json_and_owner'):
+                src.append('        v = {}.with_json_and_owner(v, self)'.format(t))
+            src.append('        self.{} = v'.format(name))
+        src.append('    return True')
+        return src
+    
+    def _to_json_source(self):
+        """ Source lines of `to_json()`, which returns None on the first
+        problem with the instance.
+        """
+        src = ['def to_json(self):',
+            '    js = {}']
+        for i, (name, jsname, typ, is_list, of_many, not_optional) in enumerate(self.properties):
+            t = 'T{}'.format(i)
+            js = repr(jsname)
+            is_element = hasattr(typ, 'with_json_and_owner')
+            
+            # test the type, then JSONify
+            src.append('    v = self.{}'.format(name))
+            src.append('    if v is not None:')
+            if is_list:
+                src.extend([
+                    '        if not isinstance(v, list): return None',
+                    '        if v:',
+                    '            if not isinstance(v[0], {}): return None'.format(t)])
+                if is_element:
+                    src.extend([
+                        '            try: js[{}] = [e.as_json() for e in v]'.format(js),
+                        '            except (FHIRValidationError, AttributeError): return None'])
+                else:
+                    src.append('            js[{}] = list(v)'.format(js))
+            else:
+                src.append('        if not isinstance(v, {}): return None'.format(t))
+                if is_element:
+                    src.extend([
+                        '        try: js[{}] = v.as_json()'.format(js),
+                        '        except FHIRValidationError: return None'])
+                else:
+                    src.append('        js[{}] = v'.format(js))
+        
+        # non-optional properties, `of_many` groups need one of their members
+        for required in sorted(self.nonoptionals):
+            members = self.of_many.get(required) or [required]
+            src.append('    if {}: return None'.format(' and '.join(
+                ['{!r} not in js'.format(m) for m in members])))
+        
+        src.append('    return js')
+        return src
+    
+    def _unmodified_source(self):
+        """ Source lines of `unmodified()`, which compares property values by
+        identity to the JSON values `from_trusted_json()` assigned. Elements
+        must be unmodified themselves, other objects (like `FHIRDate`) must
+        return the identical JSON value from `as_json()`.
+        """
+        src = ['def unmodified(self, jsondict):']
+        for i, (name, jsname, typ, is_list, of_many, not_optional) in enumerate(self.properties):
+            if not hasattr(typ, 'with_json_and_owner'):
+                src.append('    if self.{} is not jsondict.get({!r}): return False'.format(name, jsname))
+                continue
+            
+            if isinstance(typ, type) and issubclass(typ, FHIRAbstractBase):
+                test = 'isinstance({0}, FHIRAbstractBase) and {0}._json is {1} and {0}._is_unmodified()'
+            else:
+                test = 'getattr({0}, "as_json", None) is not None and {0}.as_json() is {1}'
+            src.extend([
+                '    v = self.{}'.format(name),
+                '    w = jsondict.get({!r})'.format(jsname),
+                '    if v is None:',
+                '        if w is not None: return False'])
+            if is_list:
+                src.extend([
+                    '    elif not isinstance(v, list) or not isinstance(w, list) or len(v) != len(w): return False',
+                    '    else:',
+                    '        for e, f in zip(v, w):',
+                    '            if not ({}): return False'.format(test.format('e', 'f'))])
+            else:
+                src.append('    elif not ({}): return False'.format(test.format('v', 'w')))
+        
+        src.append('    return True')
+        return src
+
+
+def _is_plain_element(typ):
+    """ Whether instances of `typ` can be created from a JSON dictionary by
+    calling the class directly, i.e. the class does not customize how
+    `with_json_and_owner()` instantiates (as resources do to use the
+    element factory).
+    """
+    if not isinstance(typ, type) or not issubclass(typ, FHIRAbstractBase):
+        return False
+    return typ.with_json.__func__ is FHIRAbstractBase.with_json.__func__ \
+        and typ._with_json_dict.__func__ is FHIRAbstractBase._with_json_dict.__func__ \
+        and typ.with_json_and_owner.__func__ is FHIRAbstractBase.with_json_and_owner.__func__
+
+
+def _accepted_types(typ):
+    """ The types accepted for values of a primitive property of type `typ`,
+    mirroring `FHIRAbstractBase._matches_type()`.
+    """
+    if int == typ or float == typ:
+        return (int, float)
+    if (sys.version_info < (3, 0)) and (str == typ or unicode == typ):
+        return (str, unicode)
+    return (typ,)
+
+
+def _prefix_collected(collected, mark, path_prefix):
+    """ Prefixes the errors collected since `mark` with a path component.
+    """
+    for i in range(mark, len(collected)):
+        collected[i] = collected[i].prefixed(path_prefix)
+
+
+_json_encoder = json.JSONEncoder()
+
+
+def _write_json_value(value, write):
+    """ Serializes a property value by passing the pieces of its JSON to
+    `write`, walking elements and lists item by item.
+    """
+    if isinstance(value, FHIRAbstractBase):
+        value._write_json(write)
+    elif isinstance(value, list):
+        write('[')
+        for i, item in enumerate(value):
+            if i > 0:
+                write(', ')
+            try:
+                _write_json_value(item, write)
+            except FHIRValidationError as e:
+                raise e.prefixed(str(i))
+        write(']')
+    elif hasattr(value, 'as_json'):
+        write(_json_encoder.encode(value.as_json()))
+    else:
+        write(_json_encoder.encode(value))
+
+
+def _validate_json_value(value):
+    """ Validates the elements of a property value, see `validate_json()`.
+    """
+    if isinstance(value, FHIRAbstractBase):
+        value.validate_json()
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            try:
+                _validate_json_value(item)
+            except FHIRValidationError as e:
+                raise e.prefixed(str(i))
+
+
+class _ParseMode(threading.local):
+    """ Options applying to all elements instantiated from JSON on the
+    current thread, so they reach elements that are instantiated deep down
+    the tree, via generated initializers or the element factory.
+    """
+    lazy = False
+    trusted = False
+    errors = None       # a list when collecting errors, see `with_json_and_errors()`
+
+
+_parse_mode = _ParseMode()
+
+
+@contextlib.contextmanager
+def _parsing(**options):
+    """ Context manager setting `_parse_mode` options while instantiating.
+    """
+    previous = dict((key, getattr(_parse_mode, key)) for key in options)
+    for key, value in options.items():
+        setattr(_parse_mode, key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(_parse_mode, key, value)
 
 
 class FHIRAbstractBase(object):
     """ Abstract base class for all FHIR elements.
+    
+    Elements can be instantiated lazily, see `with_json()`: a lazy element
+    keeps its JSON dictionary and only instantiates a property's value when
+    the property is first accessed. Its children are lazy elements, too.
+    JSON keys are validated when instantiating, property values are
+    validated on access or when calling `materialize()`.
+    
+    Trusted JSON, e.g. data produced by `as_json()` earlier, can be
+    instantiated without any validation by passing `trusted=True` to
+    `with_json()`. Trusted elements keep their JSON dictionary, which
+    `as_json()` returns as long as the element and its children remain
+    unmodified; the dictionary must therefore not be modified while the
+    element is in use.
     """
     
+    __slots__ = ('_resolved', '_owner', '_deferred', '_json')
+    
     def __init__(self, jsondict=None, strict=True):
         """ Initializer. If strict is true, raises on errors, otherwise uses
         `logger.warning()`.
@@ -61,21 +492,57 @@ class FHIRAbstractBase(object):
         self._owner = None
         """ Points to the parent resource, if there is one. """
         
+        self._deferred = None
+        """ The JSON dictionary of a lazy element, see `materialize()`. """
+        
+        self._json = None
+        """ The JSON dictionary of a trusted element, see `as_json()`. """
+        
         if jsondict is not None:
-            if strict:
-                self.update_with_json(jsondict)
+            update = self._defer_json if _parse_mode.lazy else self.update_with_json
+            collected = _parse_mode.errors
+            if collected is not None:
+                try:
+                    update(jsondict)
+                except FHIRValidationError as e:
+                    collected.extend([err if isinstance(err, FHIRValidationError) else FHIRValidationError([err])
+                        for err in e.errors])
+            elif strict:
+                update(jsondict)
             else:
                 try:
-                    self.update_with_json(jsondict)
+                    update(jsondict)
                 except FHIRValidationError as e:
                     for err in e.errors:
                         logger.warning(err)
     
     
+    # MARK: Pickling
+    
+    def __getstate__(self):
+        """ Collects instance variables from `__dict__` (if there is one) and
+        from the `__slots__` of all classes, so that instances of classes
+        generated with `__slots__` can be pickled with any protocol.
+        """
+        state = dict(getattr(self, '__dict__', {}))
+        for klass in self.__class__.__mro__:
+            for name in klass.__dict__.get('__slots__', ()):
+                if name not in state:
+                    try:
+                        state[name] = object.__getattribute__(self, name)
+                    except AttributeError:      # unset slot or lazy property
+                        pass
+        return state
+    
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+    
+    
     # MARK: Instantiation from JSON
     
     @classmethod
-    def with_json(cls, jsonobj):
+    def with_json(cls, jsonobj, lazy=False, trusted=False):
         """ Initialize an element from a JSON dictionary or array.
         
         If the JSON dictionary has a "resourceType" entry and the specified
@@ -85,23 +552,54 @@ class FHIRAbstractBase(object):
         :raises: TypeError on anything but dict or list of dicts
         :raises: FHIRValidationError if instantiation fails
         :param jsonobj: A dict or list of dicts to instantiate from
+        :param bool lazy: If True, instantiates lazy elements that only
+            instantiate their properties when accessed
+        :param bool trusted: If True, the JSON data is known to be valid and
+            is not validated
         :returns: An instance or a list of instances created from JSON data
         """
+        if (lazy and not _parse_mode.lazy) or (trusted and not _parse_mode.trusted):
+            with _parsing(lazy=lazy or _parse_mode.lazy, trusted=trusted or _parse_mode.trusted):
+                return cls.with_json(jsonobj)
+        
         if isinstance(jsonobj, dict):
             return cls._with_json_dict(jsonobj)
         
         if isinstance(jsonobj, list):
             arr = []
+            collected = _parse_mode.errors
             for jsondict in jsonobj:
+                mark = len(collected) if collected is not None else 0
                 try:
                     arr.append(cls._with_json_dict(jsondict))
                 except FHIRValidationError as e:
                     raise e.prefixed(str(len(arr)))
+                if collected is not None:
+                    _prefix_collected(collected, mark, str(len(arr) - 1))
             return arr
         
         raise TypeError("`with_json()` on {} only takes dict or list of dict, but you provided {}"
             .format(cls, type(jsonobj)))
     
+    @classmethod
+    def with_json_and_errors(cls, jsonobj):
+        """ Initialize an element from a JSON dictionary or array like
+        `with_json()`, but leniently: invalid properties are skipped at any
+        depth, keeping all valid data, and their errors are returned instead
+        of being raised or logged. Messages of the errors are only formatted
+        when converted to strings.
+        
+        :raises: TypeError on anything but dict or list of dicts
+        :param jsonobj: A dict or list of dicts to instantiate from
+        :returns: A tuple of the instance (or list of instances) and a list
+            of FHIRValidationError, one per problem, with `path` set to the
+            problem's location
+        """
+        errors = []
+        with _parsing(errors=errors):
+            instance = cls.with_json(jsonobj)
+        return instance, errors
+    
     @classmethod
     def _with_json_dict(cls, jsondict):
         """ Internal method to instantiate from JSON dictionary.
@@ -137,6 +635,109 @@ class FHIRAbstractBase(object):
         return instance
     
     
+    # MARK: Lazy Instantiation
+    
+    def _defer_json(self, jsondict):
+        """ Keeps the JSON dictionary for properties to be instantiated on
+        first access, validating only the dictionary's keys.
+        
+        :raises: FHIRValidationError on missing or superfluous keys
+        :param dict jsondict: The JSON dictionary to use
+        """
+        if not isinstance(jsondict, dict):
+            raise FHIRValidationError([_TypeError('not-dict', type(jsondict), '_defer_json', type(self))])
+        
+        schema = self._element_schema()
+        found = set()
+        for name, jsname, typ, is_list, of_many, not_optional in schema.properties:
+            if jsondict.get(jsname) is not None:
+                object.__delattr__(self, name)      # `__getattr__` now instantiates
+                found.add(of_many or jsname)
+        self._deferred = jsondict
+        
+        errs = self._json_key_errors(jsondict, found, schema.nonoptionals)
+        if len(errs) > 0:
+            raise FHIRValidationError(errs)
+    
+    def __getattr__(self, name):
+        """ Instantiates a lazy element's property on first access.
+        
+        :raises: FHIRValidationError if the property's JSON is invalid
+        """
+        if name[:1] != '_' and self._deferred is not None:
+            prop = self._element_schema().names.get(name)
+            if prop is not None:
+                return self._materialize_property(prop)
+        raise AttributeError("'{}' object has no attribute '{}'"
+            .format(self.__class__.__name__, name))
+    
+    def _is_deferred(self, name):
+        """ Whether the property `name` of a lazy element has not yet been
+        instantiated. """
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return True
+        return False
+    
+    def _materialize_property(self, prop):
+        """ Instantiates, validates and assigns the value of one property
+        from the lazy element's JSON dictionary.
+        
+        :raises: FHIRValidationError if the property's JSON is invalid
+        :returns: The property's value
+        """
+        name, jsname, typ, is_list, of_many, not_optional = prop
+        value = self._deferred.get(jsname)
+        if value is not None and hasattr(typ, 'with_json_and_owner'):
+            try:
+                with _parsing(lazy=True):
+                    value = typ.with_json_and_owner(value, self)
+            except FHIRValidationError as e:
+                raise e.prefixed(name)
+            except Exception as e:
+                raise FHIRValidationError([e], name)
+        
+        testval = value
+        if is_list and value is not None:
+            if not isinstance(value, list):
+                raise FHIRValidationError([_TypeError('list-expected', type(value), name, type(self), typ)], name)
+            testval = value[0] if len(value) > 0 else None
+        if testval is not None and not isinstance(testval, self._element_schema().types[name]):
+            raise FHIRValidationError([_TypeError('wrong-type', type(testval), name, type(self), typ)], name)
+        
+        setattr(self, name, value)
+        return value
+    
+    def materialize(self):
+        """ Instantiates all remaining properties of a lazy element and of
+        its children, which validates all of its JSON data. Does nothing for
+        elements that have not been instantiated lazily.
+        
+        :raises: FHIRValidationError on validation errors
+        """
+        if self._deferred is None:
+            return
+        
+        errs = []
+        for prop in self._element_schema().properties:
+            name = prop[0]
+            try:
+                value = self._materialize_property(prop) if self._is_deferred(name) else getattr(self, name)
+                for i, child in enumerate(value if isinstance(value, list) else [value]):
+                    if isinstance(child, FHIRAbstractBase):
+                        try:
+                            child.materialize()
+                        except FHIRValidationError as e:
+                            errs.append(e.prefixed(str(i)).prefixed(name) if prop[3] else e.prefixed(name))
+            except FHIRValidationError as e:
+                errs.append(e)
+        
+        if len(errs) > 0:
+            raise FHIRValidationError(errs)
+        self._deferred = None
+    
+    
     # MARK: (De)Serialization
     
     def elementProperties(self):
@@ -145,6 +746,19 @@ class FHIRAbstractBase(object):
         """
         return []
     
+    def _element_schema(self):
+        """ Returns the receiver's class's `FHIRElementSchema`, compiling it
+        from `elementProperties()` on first use. The schema is cached per
+        class, hence `elementProperties()` must return the same properties
+        for all instances of a class.
+        """
+        cls = self.__class__
+        schema = getattr(cls, '_fhir_schema', None)
+        if schema is None or schema.klass is not cls:
+            schema = FHIRElementSchema(cls, self.elementProperties())
+            cls._fhir_schema = schema
+        return schema
+    
     def update_with_json(self, jsondict):
         """ Update the receiver with data in a JSON dictionary.
         
@@ -156,44 +770,75 @@ class FHIRAbstractBase(object):
             return
         
         if not isinstance(jsondict, dict):
-            raise FHIRValidationError("Non-dict type {} fed to `update_with_json` on {}"
-                .format(type(jsondict), type(self)))
+            raise FHIRValidationError([_TypeError('not-dict', type(jsondict), 'update_with_json', type(self))])
         
-        # loop all registered properties and instantiate
+        # use the class's specialized implementation if the data is valid;
+        # when collecting errors, it runs strictly and the generic loop
+        # instantiates the failed property again, collecting its errors
+        schema = self._element_schema()
+        if _parse_mode.trusted:
+            schema.from_trusted_json(self, jsondict)
+            self._json = jsondict
+            return
+        collected = _parse_mode.errors
+        if collected is not None:
+            _parse_mode.errors = None
+            try:
+                result = schema.from_json(self, jsondict)
+            finally:
+                _parse_mode.errors = collected
+        else:
+            result = schema.from_json(self, jsondict)
+        if result is True:
+            return
+        resume, failure = result
+        if collected is not None:
+            failure = None
+        
+        # loop all registered properties and instantiate; those before
+        # `resume` have already been instantiated and assigned
         errs = []
-        valid = set(['resourceType'])   # used to also contain `fhir_comments` until STU-3
         found = set()
         nonoptionals = set()
-        for name, jsname, typ, is_list, of_many, not_optional in self.elementProperties():
-            valid.add(jsname)
-            if of_many is not None:
-                valid.add(of_many)
+        for i, (name, jsname, typ, is_list, of_many, not_optional) in enumerate(schema.properties):
+            value = jsondict.get(jsname)
+            if i < resume:
+                if value is not None:
+                    found.add(jsname)
+                    if of_many is not None:
+                        found.add(of_many)
+                elif not_optional:
+                    nonoptionals.add(of_many or jsname)
+                continue
             
             # bring the value in shape
             err = None
-            value = jsondict.get(jsname)
-            if value is not None and hasattr(typ, 'with_json_and_owner'):
+            if i == resume and failure is not None:
+                value = None
+                err = failure
+            elif value is not None and hasattr(typ, 'with_json_and_owner'):
+                mark = len(collected) if collected is not None else 0
                 try:
                     value = typ.with_json_and_owner(value, self)
                 except Exception as e:
                     value = None
                     err = e
+                if collected is not None:
+                    _prefix_collected(collected, mark, name)
             
             # got a value, test if it is of required type and assign
             if value is not None:
                 testval = value
                 if is_list:
                     if not isinstance(value, list):
-                        err = TypeError("Wrong type {} for list property \"{}\" on {}, expecting a list of {}"
-                            .format(type(value), name, type(self), typ))
+                        err = _TypeError('list-expected', type(value), name, type(self), typ)
                         testval = None
                     else:
                         testval = value[0] if value and len(value) > 0 else None
                 
-                if testval is not None and not self._matches_type(testval, typ):
-                    err = TypeError("Wrong type {} for property \"{}\" on {}, expecting {}"
-                        .format(type(testval), name, type(self), typ))
-                else:
+                if testval is not None and not isinstance(testval, schema.types[name]):
+                    err = _TypeError('wrong-type', type(testval), name, type(self), typ)
+                elif err is None:
                     setattr(self, name, value)
                 
                 found.add(jsname)
@@ -204,31 +849,36 @@ class FHIRAbstractBase(object):
             elif not_optional:
                 nonoptionals.add(of_many or jsname)
             
-            # TODO: look at `_name` only if this is a primitive!
-            _jsname = '_'+jsname
-            _value = jsondict.get(_jsname)
-            if _value is not None:
-                valid.add(_jsname)
-                found.add(_jsname)
-            
             # report errors
             if err is not None:
                 errs.append(err.prefixed(name) if isinstance(err, FHIRValidationError) else FHIRValidationError([err], name))
         
+        errs.extend(self._json_key_errors(jsondict, found, nonoptionals))
+        if len(errs) > 0:
+            raise FHIRValidationError(errs)
+    
+    def _json_key_errors(self, jsondict, found, nonoptionals):
+        """ Reports missing non-optional and superfluous JSON keys.
+        
+        :param dict jsondict: The JSON dictionary being applied
+        :param set found: JSON names and "of_many" groups with values
+        :param set nonoptionals: JSON names and "of_many" groups that need values
+        :returns: A list of errors, possibly empty
+        """
+        errs = []
+        
         # were there missing non-optional entries?
         if len(nonoptionals) > 0:
             for miss in nonoptionals - found:
-                errs.append(KeyError("Non-optional property \"{}\" on {} is missing"
-                    .format(miss, self)))
+                errs.append(_KeyError('missing', miss, self))
         
         # were there superfluous dictionary keys?
-        if len(set(jsondict.keys()) - valid) > 0:
+        valid = self._element_schema().valid
+        if not valid.issuperset(jsondict):
             for supflu in set(jsondict.keys()) - valid:
-                errs.append(AttributeError("Superfluous entry \"{}\" in data for {}"
-                    .format(supflu, self)))
+                errs.append(_AttributeError('superfluous', supflu, self))
         
-        if len(errs) > 0:
-            raise FHIRValidationError(errs)
+        return errs
     
     def as_json(self):
         """ Serializes to JSON by inspecting `elementProperties()` and creating
@@ -237,19 +887,36 @@ class FHIRAbstractBase(object):
         - whether required properties are not None (and lists not empty)
         - whether not-None properties are of the correct type
         
+        Properties of lazy elements that have not been accessed are
+        returned as found in the original JSON, without validation. Trusted
+        elements whose properties have not been modified return their
+        original JSON dictionary, again without validation.
+        
         :raises: FHIRValidationError if properties have the wrong type or if
             required properties are empty
         :returns: A validated dict object that can be JSON serialized
         """
+        if self._is_unmodified():
+            return self._json
+        
+        schema = self._element_schema()
+        deferred = self._deferred
+        if deferred is None:
+            js = schema.to_json(self)
+            if js is not None:
+                return js
+        
+        # JSONify all registered properties, collecting errors
         js = {}
         errs = []
-        
-        # JSONify all registered properties
         found = set()
-        nonoptionals = set()
-        for name, jsname, typ, is_list, of_many, not_optional in self.elementProperties():
-            if not_optional:
-                nonoptionals.add(of_many or jsname)
+        for name, jsname, typ, is_list, of_many, not_optional in schema.properties:
+            if deferred is not None and self._is_deferred(name):
+                value = deferred.get(jsname)
+                if value is not None:
+                    js[jsname] = value
+                    found.add(of_many or jsname)
+                continue
             
             err = None
             value = getattr(self, name)
@@ -258,12 +925,10 @@ class FHIRAbstractBase(object):
             
             if is_list:
                 if not isinstance(value, list):
-                   err = TypeError("Expecting property \"{}\" on {} to be list, but is {}"
-                       .format(name, type(self), type(value)))
+                   err = _TypeError('value-list-expected', name, type(self), type(value))
                 elif len(value) > 0:
-                    if not self._matches_type(value[0], typ):
-                        err = TypeError("Expecting property \"{}\" on {} to be {}, but is {}"
-                            .format(name, type(self), typ, type(value[0])))
+                    if value[0] is not None and not isinstance(value[0], schema.types[name]):
+                        err = _TypeError('value-wrong-type', name, type(self), typ, type(value[0]))
                     else:
                         lst = []
                         for v in value:
@@ -274,9 +939,8 @@ class FHIRAbstractBase(object):
                         found.add(of_many or jsname)
                         js[jsname] = lst
             else:
-                if not self._matches_type(value, typ):
-                    err = TypeError("Expecting property \"{}\" on {} to be {}, but is {}"
-                        .format(name, type(self), typ, type(value)))
+                if not isinstance(value, schema.types[name]):
+                    err = _TypeError('value-wrong-type', name, type(self), typ, type(value))
                 else:
                     try:
                         found.add(of_many or jsname)
@@ -288,15 +952,162 @@ class FHIRAbstractBase(object):
                 errs.append(err if isinstance(err, FHIRValidationError) else FHIRValidationError([err], name))
         
         # any missing non-optionals?
-        if len(nonoptionals - found) > 0:
-            for nonop in nonoptionals - found:
-                errs.append(KeyError("Property \"{}\" on {} is not optional, you must provide a value for it"
-                    .format(nonop, self)))
+        if len(schema.nonoptionals - found) > 0:
+            for nonop in schema.nonoptionals - found:
+                errs.append(_KeyError('value-missing', nonop, self))
         
         if len(errs) > 0:
             raise FHIRValidationError(errs)
         return js
     
+    def iter_json(self, chunk_size=65536):
+        """ Serializes to JSON like `as_json()` followed by `json.dumps()`,
+        but generates the JSON text in chunks while walking the element
+        tree, rather than building the complete dictionary and string in
+        memory. A chunk is generated whenever at least `chunk_size`
+        characters are pending after an item of one of the receiver's list
+        properties (like a Bundle's entries) has been serialized.
+        
+        Each element is validated just before its JSON is generated, hence
+        a FHIRValidationError may be raised after parts of the JSON have
+        already been generated; call `validate_json()` first to avoid that.
+        
+        :raises: FHIRValidationError if properties have the wrong type or if
+            required properties are empty
+        :param int chunk_size: The minimum size of generated chunks
+        :returns: A generator of str
+        """
+        pending = ['{']
+        size = 1
+        sep = ''
+        for name, jsname, value in self._json_members():
+            pending.append(sep + _json_encoder.encode(jsname) + ': ')
+            sep = ', '
+            try:
+                if not isinstance(value, list):
+                    _write_json_value(value, pending.append)
+                    continue
+                
+                pending.append('[')
+                for i, item in enumerate(value):
+                    buf = [', '] if i > 0 else []
+                    try:
+                        _write_json_value(item, buf.append)
+                    except FHIRValidationError as e:
+                        raise e.prefixed(str(i))
+                    chunk = ''.join(buf)
+                    pending.append(chunk)
+                    size += len(chunk)
+                    if size >= chunk_size:
+                        yield ''.join(pending)
+                        pending = []
+                        size = 0
+                pending.append(']')
+            except FHIRValidationError as e:
+                raise e.prefixed(name)
+        pending.append('}')
+        yield ''.join(pending)
+    
+    def write_json(self, fp):
+        """ Writes the receiver's JSON, as generated by `iter_json()`, to a
+        file-like object.
+        
+        :raises: FHIRValidationError if properties have the wrong type or if
+            required properties are empty
+        :param fp: A file-like object with a `write()` method accepting str
+        """
+        for chunk in self.iter_json():
+            fp.write(chunk)
+    
+    def validate_json(self):
+        """ Performs the checks `iter_json()` performs while serializing on
+        the receiver and all of its children, without serializing, so that
+        no JSON has to be generated before a problem is found.
+        
+        :raises: FHIRValidationError if properties have the wrong type or if
+            required properties are empty
+        """
+        for name, jsname, value in self._json_members():
+            try:
+                _validate_json_value(value)
+            except FHIRValidationError as e:
+                raise e.prefixed(name)
+    
+    def _write_json(self, write):
+        """ Serializes the receiver's JSON by passing its pieces to `write`.
+        """
+        write('{')
+        sep = ''
+        for name, jsname, value in self._json_members():
+            write(sep + _json_encoder.encode(jsname) + ': ')
+            sep = ', '
+            try:
+                _write_json_value(value, write)
+            except FHIRValidationError as e:
+                raise e.prefixed(name)
+        write('}')
+    
+    def _json_members(self):
+        """ Returns the JSON members of the receiver for `iter_json()`, with
+        the same checks as `as_json()` but without serializing elements.
+        
+        :raises: FHIRValidationError if properties have the wrong type or if
+            required properties are empty
+        :returns: A list of ("name", "json_name", value) tuples, where value
+            is an element, a list, or any other JSON serializable object
+        """
+        if self._is_unmodified():
+            return [(jsname, jsname, value) for jsname, value in self._json.items()]
+        
+        schema = self._element_schema()
+        deferred = self._deferred
+        members = []
+        errs = []
+        found = set()
+        for name, jsname, typ, is_list, of_many, not_optional in schema.properties:
+            if deferred is not None and self._is_deferred(name):
+                value = deferred.get(jsname)
+                if value is not None:
+                    members.append((name, jsname, value))
+                    found.add(of_many or jsname)
+                continue
+            
+            value = getattr(self, name)
+            if value is None:
+                continue
+            
+            testval = value
+            if is_list:
+                if not isinstance(value, list):
+                    errs.append(FHIRValidationError([_TypeError('value-list-expected', name, type(self), type(value))], name))
+                    continue
+                if len(value) == 0:
+                    continue
+                testval = value[0]
+            if testval is not None and not isinstance(testval, schema.types[name]):
+                errs.append(FHIRValidationError([_TypeError('value-wrong-type', name, type(self), typ, type(testval))], name))
+                continue
+            members.append((name, jsname, value))
+            found.add(of_many or jsname)
+        
+        # any missing non-optionals?
+        if len(schema.nonoptionals - found) > 0:
+            for nonop in schema.nonoptionals - found:
+                errs.append(_KeyError('value-missing', nonop, self))
+        
+        if len(errs) > 0:
+            raise FHIRValidationError(errs)
+        return members
+    
+    def _is_unmodified(self):
+        """ Whether the receiver has been instantiated from trusted JSON and
+        none of its properties, nor those of its children, have been
+        assigned since. Values are compared by identity, so this also notices
+        elements that have been added to or replaced in lists.
+        """
+        return self._json is not None \
+            and self._element_schema().unmodified(self, self._json)
+    
     def _matches_type(self, value, typ):
         if value is None:
             return True
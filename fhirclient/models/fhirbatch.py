@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  Submit writes of many resources in batch or transaction Bundles.
+
+import uuid
+import logging
+import threading
+
+from . import bundle
+from . import meta
+from . import fhirabstractbase
+
+logger = logging.getLogger(__name__)
+
+
+class FHIRBatchError(Exception):
+    """ Indicating that a create, update or delete submitted in a batch or
+    transaction Bundle failed.
+    """
+    
+    def __init__(self, message, resource, method, status=None, outcome=None):
+        super(FHIRBatchError, self).__init__(message)
+        
+        self.resource = resource
+        """ The resource the failed operation was for. """
+        
+        self.method = method
+        """ The HTTP method of the operation: "POST", "PUT" or "DELETE". """
+        
+        self.status = status
+        """ The HTTP status code reported for the operation, if known. """
+        
+        self.outcome = outcome
+        """ The OperationOutcome JSON reported for the operation, if any. """
+
+
+class FHIRBatchWriter(object):
+    """ Collects creates, updates and deletes of resources and submits them
+    to the server in "batch" or "transaction" Bundles, POSTed to the server
+    base, instead of one request per resource.
+    
+    Queued operations are flushed once `batch_size` of them have been
+    collected, once the oldest one has waited `flush_interval` seconds (if
+    given, from a background thread) and when calling `flush()` or
+    `close()`; use the writer as a context manager to have it closed.
+    
+    Resources are validated when queued; invalid ones are not submitted
+    but fail on their own. Each response entry is mapped back to the
+    resource it belongs to, setting the id and `meta.versionId` the server
+    assigned. Failed operations are reported as `FHIRBatchError` by
+    `flush()` and collected in `failures`.
+    """
+    
+    def __init__(self, server, transaction=False, batch_size=100, flush_interval=None):
+        """ Initializer.
+        
+        :param FHIRServer server: The server to submit to
+        :param bool transaction: If True, submits "transaction" Bundles,
+            whose operations succeed or fail together, rather than "batch"
+            Bundles
+        :param int batch_size: The number of operations per Bundle
+        :param float flush_interval: Seconds after which queued operations
+            are submitted even if there are fewer than `batch_size`
+        """
+        if server is None:
+            raise Exception("Need a server to submit a batch to")
+        if batch_size < 1:
+            raise Exception("The batch size must be at least 1, got {}".format(batch_size))
+        
+        self.server = server
+        """ The server to submit to. """
+        
+        self.transaction = transaction
+        """ Whether "transaction" rather than "batch" Bundles are submitted. """
+        
+        self.batch_size = batch_size
+        """ The number of operations per Bundle. """
+        
+        self.flush_interval = flush_interval
+        """ Seconds after which queued operations are submitted. """
+        
+        self.failures = []
+        """ A list of FHIRBatchError for all operations that failed. """
+        
+        self._queue = []
+        self._timer = None
+        self._lock = threading.RLock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self):
+        return len(self._queue)
+    
+    
+    # MARK: Operations
+    
+    def create(self, resource):
+        """ Queues creating the given resource with a POST.
+        
+        :param resource: The resource to create, which must not have an id
+        :returns: The "urn:uuid:" full URL of the entry, which references
+            from resources in the same transaction can use
+        """
+        if resource.id:
+            raise Exception("This resource already has an id, cannot create")
+        full_url = 'urn:uuid:{}'.format(uuid.uuid4())
+        self._add(resource, 'POST', resource.relativeBase(), full_url, validate=True)
+        return full_url
+    
+    def update(self, resource):
+        """ Queues updating the given resource with a PUT.
+        
+        :param resource: The resource to update, which must have an id
+        """
+        if not resource.id:
+            raise Exception("Cannot update a resource that does not have an id")
+        self._add(resource, 'PUT', resource.relativePath(), validate=True)
+    
+    def delete(self, resource):
+        """ Queues deleting the given resource.
+        
+        :param resource: The resource to delete, which must have an id
+        """
+        if not resource.id:
+            raise Exception("Cannot delete a resource that does not have an id")
+        self._add(resource, 'DELETE', resource.relativePath())
+    
+    def _add(self, resource, method, url, full_url=None, validate=False):
+        """ Queues the operation, along with the error validating the
+        resource if asked to, so that an invalid resource fails on its own
+        instead of aborting the Bundle while it is being sent.
+        """
+        error = None
+        if validate:
+            try:
+                resource.validate_json()
+            except fhirabstractbase.FHIRValidationError as e:
+                error = FHIRBatchError("{} {} is invalid: {}".format(method, url, e), resource, method)
+        with self._lock:
+            self._queue.append((resource, method, url, full_url, error))
+            if len(self._queue) >= self.batch_size:
+                self.flush()
+            elif self.flush_interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    
+    # MARK: Submitting
+    
+    def flush(self):
+        """ Submits all queued operations, in Bundles of up to `batch_size`
+        entries.
+        
+        :returns: A list of `(resource, error)` tuples in the order the
+            operations were queued, where error is None or a FHIRBatchError
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            results = []
+            while len(self._queue) > 0:
+                ops = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+                results.extend(self._submit(ops))
+            return results
+    
+    def close(self):
+        """ Submits all queued operations, see `flush()`.
+        """
+        return self.flush()
+    
+    def _submit(self, ops):
+        """ POSTs one Bundle with the given operations, leaving out those of
+        invalid resources, and processes the response.
+        
+        :returns: A list of `(resource, error)` tuples
+        """
+        valid = [op[:4] for op in ops if op[4] is None]
+        submitted = iter(self._post(valid) if len(valid) > 0 else [])
+        results = [(op[0], op[4]) if op[4] is not None else next(submitted) for op in ops]
+        
+        for resource, method, url, full_url in valid:
+            if 'POST' != method:
+                self.server._invalidate(url)
+        for resource, error in results:
+            if error is not None:
+                logger.warning(error)
+                self.failures.append(error)
+        return results
+    
+    def _post(self, ops):
+        """ POSTs one Bundle with the given operations.
+        
+        :returns: A list of `(resource, error)` tuples
+        """
+        bndl = bundle.Bundle()
+        bndl.type = 'transaction' if self.transaction else 'batch'
+        bndl.entry = []
+        for resource, method, url, full_url in ops:
+            entry = bundle.BundleEntry()
+            entry.fullUrl = full_url
+            entry.request = bundle.BundleEntryRequest()
+            entry.request.method = method
+            entry.request.url = url
+            if 'DELETE' != method:
+                entry.resource = resource
+            bndl.entry.append(entry)
+        
+        logger.debug("Submitting {} with {} entries".format(bndl.type, len(ops)))
+        try:
+            res = self.server.post_json('', bndl)
+            entries = res.json().get('entry') or []
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            status = getattr(response, 'status_code', None)
+            outcome = None
+            try:
+                outcome = response.json() if response is not None else None
+            except ValueError:
+                pass
+            results = [(resource, FHIRBatchError("Submitting the {} failed: {}".format(bndl.type, e),
+                resource, method, status, outcome)) for resource, method, url, full_url in ops]
+        else:
+            if len(entries) != len(ops):
+                logger.warning("The {} response has {} entries for {} operations"
+                    .format(bndl.type, len(entries), len(ops)))
+            results = []
+            for i, (resource, method, url, full_url) in enumerate(ops):
+                entry = entries[i] if i < len(entries) else None
+                response = entry.get('response') if isinstance(entry, dict) else None
+                results.append((resource, self._apply(resource, method, url, response)))
+        return results
+    
+    def _apply(self, resource, method, url, response):
+        """ Applies the response of one entry to its resource.
+        
+        :returns: None on success, a FHIRBatchError otherwise
+        """
+        if not isinstance(response, dict):
+            return FHIRBatchError("No response for {} {}".format(method, url), resource, method)
+        
+        status = response.get('status')
+        try:
+            code = int(status.split(' ', 1)[0]) if isinstance(status, str) else None
+        except ValueError:
+            code = None
+        if code is None or code >= 400:
+            return FHIRBatchError("{} {} failed with status \"{}\"".format(method, url, status),
+                resource, method, code, response.get('outcome'))
+        
+        if 'DELETE' != method:
+            rem_id, version = _parse_location(response.get('location'))
+            etag = response.get('etag')
+            if etag:
+                version = etag.replace('W/', '').strip('"')
+            if rem_id is not None:
+                resource.id = rem_id
+            if version is not None:
+                if resource.meta is None:
+                    resource.meta = meta.Meta()
+                resource.meta.versionId = version
+            resource.origin_server = self.server
+        return None
+
+
+def _parse_location(location):
+    """ The id and version in a location like "Patient/123/_history/2",
+    which may be absolute.
+    
+    :returns: A tuple of id and version, either of which may be None
+    """
+    if not location:
+        return None, None
+    path, sep, version = location.partition('/_history/')
+    parts = path.rstrip('/').split('/')
+    rem_id = parts[-1] if len(parts) > 1 else None
+    return rem_id, version.strip('/') or None
@@ -18,6 +18,8 @@ class FHIRDate(object):
     - `date`: datetime object representing the receiver's date-time
     """
     
+    __slots__ = ('date', 'origval')
+    
     def __init__(self, jsonval=None):
         self.date = None
         if jsonval is not None:
@@ -43,6 +45,13 @@ class FHIRDate(object):
             self.origval = None
         object.__setattr__(self, prop, value)
     
+    def __getstate__(self):
+        return {'date': self.date, 'origval': self.origval}
+    
+    def __setstate__(self, state):
+        object.__setattr__(self, 'date', state.get('date'))
+        object.__setattr__(self, 'origval', state.get('origval'))
+    
     @property
     def isostring(self):
         if self.date is None:
@@ -1,18 +1,36 @@
 # -*- coding: utf-8 -*-
 
 import json
+import zlib
+import time
+import random
 import requests
 import urllib
 import logging
+import threading
+import functools
+import email.utils
 try:                                # Python 2.x
     import urlparse
 except ImportError as e:            # Python 3
     import urllib.parse as urlparse
 
-from auth import FHIRAuth
+from auth import FHIRAuth, FHIRBackendServicesAuth
 
 FHIRJSONMimeType = 'application/fhir+json'
 
+connection_defaults = {
+    'pool_connections': 10,
+    'pool_maxsize': 10,
+    'pool_block': False,
+    'connect_timeout': 10,
+    'read_timeout': 60,
+    'keep_alive': True,
+    'compress_requests': False,
+    'thread_safe': False,
+}
+""" Default connection settings of `FHIRServer`, see its initializer. """
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,18 +55,204 @@ class FHIRNotFoundException(Exception):
         self.response = response
 
 
+class FHIRRetryPolicy(object):
+    """ Decides whether and when a failed request is retried.
+    
+    By default only idempotent methods are retried, after connection errors,
+    timeouts and responses with a status in `statuses`. The delay grows
+    exponentially with each attempt and is randomized ("full jitter"),
+    unless the server asks for a delay via the "Retry-After" header.
+    
+    Retries are limited per request by `total` and overall by a budget: at
+    most `budget_min` plus `budget_ratio` times the number of requests made
+    so far, so a failing server isn't hit with several times the usual load.
+    """
+    
+    def __init__(self, total=3, methods=('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'),
+            statuses=(429, 500, 502, 503, 504), backoff_factor=0.5, backoff_max=30,
+            jitter=True, max_retry_after=300, budget_ratio=0.2, budget_min=10, metrics=None):
+        self.total = total
+        """ The maximum number of retries per request. """
+        
+        self.methods = set(methods)
+        """ The HTTP methods to retry. """
+        
+        self.statuses = set(statuses)
+        """ The response status codes to retry. """
+        
+        self.backoff_factor = backoff_factor
+        """ Seconds to wait before the first retry, doubled per retry. """
+        
+        self.backoff_max = backoff_max
+        """ The maximum number of seconds to back off. """
+        
+        self.jitter = jitter
+        """ Whether to wait a random time between 0 and the backoff. """
+        
+        self.max_retry_after = max_retry_after
+        """ Responses asking to retry later than this many seconds are not retried. """
+        
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        
+        self.metrics = metrics
+        """ A callable receiving a dict for each retry, with `method`, `url`,
+        `attempt`, `delay` and either `status` or `error`. """
+        
+        self.requests = 0
+        """ The number of requests made, not counting retries. """
+        
+        self.retries = 0
+        """ The number of retries made. """
+        
+        self.backoff_time = 0
+        """ The total number of seconds spent waiting to retry. """
+        
+        self._lock = threading.Lock()
+    
+    def request_started(self):
+        with self._lock:
+            self.requests += 1
+    
+    def retry_delay(self, method, url, attempt, status=None, headers=None, error=None):
+        """ Decides whether to retry a request that failed with the given
+        response status or error. A retry is accounted for when a delay is
+        returned.
+        
+        :param str method: The HTTP method of the request
+        :param str url: The URL requested
+        :param int attempt: The number of retries already made
+        :param int status: The response status, if a response was received
+        :param headers: The response headers, if a response was received
+        :param error: The exception raised, if no response was received
+        :returns: The seconds to wait before retrying, None to not retry
+        """
+        if attempt >= self.total or method.upper() not in self.methods:
+            return None
+        if status is not None and status not in self.statuses:
+            return None
+        
+        delay = self.retry_after(headers) if headers is not None else None
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+            if self.jitter:
+                delay = random.uniform(0, delay)
+        elif delay > self.max_retry_after:
+            return None
+        
+        with self._lock:
+            if self.retries >= self.budget_min + self.budget_ratio * self.requests:
+                logger.warning("Retry budget exhausted, not retrying {} {}".format(method, url))
+                return None
+            self.retries += 1
+            self.backoff_time += delay
+        
+        if self.metrics is not None:
+            self.metrics({
+                'method': method,
+                'url': url,
+                'attempt': attempt + 1,
+                'delay': delay,
+                'status': status,
+                'error': error,
+            })
+        return delay
+    
+    def retry_after(self, headers):
+        """ The seconds to wait according to the "Retry-After" response
+        header, which holds seconds or an HTTP date.
+        
+        :returns: The number of seconds, None if there's no valid header
+        """
+        value = headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        parsed = email.utils.parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0, email.utils.mktime_tz(parsed) - time.time())
+
+
+def _gzip_chunks(chunks):
+    """ Gzips the given bytes chunks, yielding compressed chunks. """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _wire_bytes(response, decoded):
+    """ The number of body bytes of the response read from the wire, before
+    decoding any Content-Encoding; `decoded` if it can't be determined.
+    """
+    try:
+        return response.raw.tell() or decoded
+    except Exception:
+        return decoded
+
+
 class FHIRServer(object):
     """ Handles talking to a FHIR server.
+    
+    With the `thread_safe` connection setting, one instance can be shared by
+    many threads: each thread gets its own requests Session, all sharing the
+    same connection pools, the CapabilityStatement is fetched only once, and
+    requests are signed with a consistent snapshot of the `auth` instance's
+    credentials, which are renewed by one thread at a time.
     """
     
-    def __init__(self, client, base_uri=None, state=None):
+    def __init__(self, client, base_uri=None, state=None, connection=None, retry_policy=None):
+        """ Initializer.
+        
+        The connection settings dictionary supports (see
+        `connection_defaults` for the defaults):
+            
+            - `pool_connections`: The number of hosts to keep connection pools for
+            - `pool_maxsize`: The number of connections to keep open per host
+            - `pool_block`: If True, requests wait for a pooled connection to
+              become free rather than opening an extra, unpooled one
+            - `connect_timeout`: Seconds to wait for a connection, None to wait forever
+            - `read_timeout`: Seconds to wait for data from the server, None to wait forever
+            - `keep_alive`: If False, connections are closed after each request
+            - `compress_requests`: If True, PUT and POST bodies are sent gzipped
+            - `thread_safe`: If True, every thread uses its own Session, see
+              the class documentation
+        
+        :param FHIRClient client: The client owning the server, if any
+        :param str base_uri: The server's base URI
+        :param dict state: State to restore, see `state`
+        :param dict connection: Connection settings
+        :param FHIRRetryPolicy retry_policy: The policy deciding which failed
+            requests to retry; a default FHIRRetryPolicy if None
+        """
         self.client = client
         self.auth = None
         self.base_uri = None
         self.aud = None
-
-        # Use a single requests Session for all "requests"
-        self.session = requests.Session()
+        self.connection = dict(connection_defaults)
+        """ The connection settings in effect; they are deployment settings
+        and not part of `state`. """
+        
+        self.retry_policy = retry_policy or FHIRRetryPolicy()
+        """ The FHIRRetryPolicy instance; set to None to never retry. """
+        
+        self.cache = None
+        """ A `FHIRCache` for `request_json()` to revalidate responses with,
+        None to not cache. """
+        
+        self.reference_cache = None
+        """ A `FHIRReferenceCache` sharing resolved references across
+        resources, None to not share them. """
+        
+        self._transfer = {'sent': 0, 'sent_decoded': 0, 'received': 0, 'received_decoded': 0}
+        self._transfer_lock = threading.Lock()
+        self._unsaved_state = False
+        self._unsaved_state_lock = threading.Lock()
         
         # A URI can't possibly be less than 11 chars
         # make sure we end with "/", otherwise the last path component will be
@@ -57,15 +261,134 @@ class FHIRServer(object):
             self.base_uri = base_uri if '/' == base_uri[-1] else base_uri + '/'
             self.aud = base_uri
         self._capability = None
+        self._capability_lock = threading.Lock()
+        self._fetching_capability = threading.local()
+        self._async_server = None
         if state is not None:
             self.from_state(state)
+        if connection is not None:
+            self.connection.update(connection)
+        
+        # Use a single requests Session for all "requests", or one per thread
+        self._adapters = None
+        self._adapters_lock = threading.Lock()
+        self._session = None
+        self._sessions = None
+        if self.connection['thread_safe']:
+            self._sessions = threading.local()
+        else:
+            self._session = self._create_session()
         if not self.base_uri or len(self.base_uri) <= 10:
             raise Exception("FHIRServer must be initialized with `base_uri` or `state` containing the base-URI, but neither happened")
     
+    @property
+    def session(self):
+        """ The requests Session to use; in thread-safe mode, the calling
+        thread's Session. Assigning a Session uses it for all threads.
+        """
+        if self._sessions is None:
+            return self._session
+        session = getattr(self._sessions, 'session', None)
+        if session is None:
+            session = self._sessions.session = self._create_session()
+        return session
+    
+    @session.setter
+    def session(self, session):
+        self._session = session
+        self._sessions = None
+    
+    def _create_session(self):
+        """ Creates a requests Session using the receiver's connection pools,
+        which are created once, sized per the connection settings.
+        """
+        with self._adapters_lock:
+            if self._adapters is None:
+                self._adapters = dict((prefix, requests.adapters.HTTPAdapter(
+                    pool_connections=self.connection['pool_connections'],
+                    pool_maxsize=self.connection['pool_maxsize'],
+                    pool_block=self.connection['pool_block'])) for prefix in ['http://', 'https://'])
+        
+        session = requests.Session()
+        for prefix, adapter in self._adapters.items():
+            session.mount(prefix, adapter)
+        if not self.connection['keep_alive']:
+            session.headers['Connection'] = 'close'
+        return session
+    
+    @property
+    def timeout(self):
+        """ The (connect, read) timeout tuple passed to requests. """
+        return (self.connection['connect_timeout'], self.connection['read_timeout'])
+    
+    def pool_stats(self):
+        """ Reports the utilization of the session's connection pools, so
+        `pool_maxsize` can be sized to the number of concurrent requests.
+        
+        :returns: A dict with one entry per pooled host, keyed by
+            "scheme://host:port", with a dict containing `maxsize`, `in_use`
+            (connections currently checked out of the pool), `idle` (open
+            connections waiting in the pool), `connections` (opened so far)
+            and `requests` (made so far)
+        """
+        stats = {}
+        for adapter in self.session.adapters.values():
+            manager = getattr(adapter, 'poolmanager', None)
+            if manager is None:
+                continue
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                if pool is None or pool.pool is None:
+                    continue
+                queued = list(pool.pool.queue)
+                stats['{}://{}:{}'.format(pool.scheme, pool.host, pool.port)] = {
+                    'maxsize': pool.pool.maxsize,
+                    'in_use': pool.pool.maxsize - len(queued),
+                    'idle': len([conn for conn in queued if conn is not None]),
+                    'connections': pool.num_connections,
+                    'requests': pool.num_requests,
+                }
+        return stats
+    
+    def transfer_stats(self):
+        """ Reports the number of body bytes transferred, both as sent over
+        the wire, i.e. compressed, and decoded.
+        
+        :returns: A dict with `sent`, `sent_decoded`, `received` and
+            `received_decoded`
+        """
+        with self._transfer_lock:
+            return dict(self._transfer)
+    
+    def _count_transfer(self, wire_key, wire, decoded_key, decoded):
+        with self._transfer_lock:
+            self._transfer[wire_key] += wire
+            self._transfer[decoded_key] += decoded
+    
     def should_save_state(self):
         if self.client is not None:
             self.client.save_state()
     
+    def defer_state_save(self):
+        """ Notes that the state changed, to be saved by the next signed
+        request rather than right away. Used when the state changes on
+        threads the client's `save_func` can't be called on, e.g. when
+        refreshing a token in the background while `save_func` writes to a
+        web framework's request-bound session.
+        """
+        with self._unsaved_state_lock:
+            self._unsaved_state = True
+    
+    def _save_deferred_state(self):
+        """ Saves the state if `defer_state_save()` was called since it was
+        last saved.
+        """
+        with self._unsaved_state_lock:
+            unsaved = self._unsaved_state
+            self._unsaved_state = False
+        if unsaved:
+            self.should_save_state()
+    
     
     # MARK: Server CapabilityStatement
     
@@ -76,28 +399,66 @@ class FHIRServer(object):
     
     def get_capability(self, force=False):
         """ Returns the server's CapabilityStatement, retrieving it if needed
-        or forced.
+        or forced. Does nothing when called while retrieving it, e.g. by the
+        `auth` instance signing the request for it.
         """
         if self._capability is None or force:
-            logger.info('Fetching CapabilityStatement from {0}'.format(self.base_uri))
-            from models import capabilitystatement
-            conf = capabilitystatement.CapabilityStatement.read_from('metadata', self)
-            self._capability = conf
-            
-            security = None
-            try:
-                security = conf.rest[0].security
-            except Exception as e:
-                logger.info("No REST security statement found in server capability statement")
-            
-            settings = {
-                'aud': self.aud,
-                'app_id': self.client.app_id if self.client is not None else None,
-                'app_secret': self.client.app_secret if self.client is not None else None,
-                'redirect_uri': self.client.redirect if self.client is not None else None,
-            }
-            self.auth = FHIRAuth.from_capability_security(security, settings)
-            self.should_save_state()
+            if getattr(self._fetching_capability, 'active', False):
+                return
+            with self._capability_lock:
+                if self._capability is None or force:
+                    logger.info('Fetching CapabilityStatement from {0}'.format(self.base_uri))
+                    from models import capabilitystatement
+                    self._fetching_capability.active = True
+                    try:
+                        conf = capabilitystatement.CapabilityStatement.read_from('metadata', self)
+                    finally:
+                        self._fetching_capability.active = False
+                    self._set_capability(conf)
+    
+    def _set_capability(self, conf):
+        """ Stores the fetched CapabilityStatement and sets up the `auth`
+        instance its security statement describes.
+        """
+        self._capability = conf
+        
+        security = None
+        try:
+            security = conf.rest[0].security
+        except Exception as e:
+            logger.info("No REST security statement found in server capability statement")
+        
+        settings = {
+            'aud': self.aud,
+            'app_id': self.client.app_id if self.client is not None else None,
+            'app_secret': self.client.app_secret if self.client is not None else None,
+            'redirect_uri': self.client.redirect if self.client is not None else None,
+        }
+        auth = FHIRAuth.from_capability_security(security, settings)
+        if isinstance(self.auth, FHIRBackendServicesAuth):      # set up for the client, keep it
+            self.auth._token_uri = self.auth._token_uri or settings.get('token_uri')
+        else:
+            self.auth = auth
+        self.should_save_state()
+    
+    def supports_search_param(self, resource_type, name):
+        """ Whether the server's CapabilityStatement lists the given search
+        parameter for the given resource type. Does not fetch the
+        CapabilityStatement, returns False if it hasn't been fetched yet.
+        
+        :param str resource_type: The resource type to search
+        :param str name: The name of the search parameter, e.g. "_id"
+        :returns: True if the parameter is listed as supported
+        """
+        if self._capability is None:
+            return False
+        for rest in self._capability.rest or []:
+            if 'server' != rest.mode:
+                continue
+            for resource in rest.resource or []:
+                if resource_type == resource.type:
+                    return any(name == param.name for param in resource.searchParam or [])
+        return False
     
     
     # MARK: Authorization
@@ -129,6 +490,17 @@ class FHIRServer(object):
     
     # MARK: Requests
     
+    @property
+    def async_server(self):
+        """ The `FHIRAsyncServer` sharing the receiver's base URI and auth,
+        with coroutine counterparts of the request methods; needs Python 3.6
+        and the 'aiohttp' module.
+        """
+        if self._async_server is None:
+            from asyncserver import FHIRAsyncServer
+            self._async_server = FHIRAsyncServer(self)
+        return self._async_server
+    
     @property
     def ready(self):
         """ Check whether the server is ready to make calls, i.e. is has
@@ -146,7 +518,7 @@ class FHIRServer(object):
         
         :returns: True if the server can make authenticated calls
         """
-        if self.auth is None:
+        if self.auth is None or self.auth.needs_capability():
             self.get_capability()
         return self.auth.ready if self.auth is not None else False
     
@@ -159,11 +531,58 @@ class FHIRServer(object):
         :throws: Exception on HTTP status >= 400
         :returns: Decoded JSON response
         """
+        if self.cache is not None:
+            return self._request_json_cached(path, nosign)
+        
         headers = {'Accept': 'application/json'}
         res = self._get(path, headers, nosign)
         
         return res.json()
     
+    def _request_json_cached(self, path, nosign=False):
+        """ Performs a JSON request, made conditional if `cache` holds an
+        earlier response, which is then used if the server answers "304 Not
+        Modified".
+        """
+        url = urlparse.urljoin(self.base_uri, path)
+        entry, conditional = self.cache.lookup(url)
+        headers = {
+            'Accept': FHIRJSONMimeType,
+            'Accept-Charset': 'UTF-8',
+        }
+        headers.update(conditional)
+        res = self._request('GET', path, headers, nosign)
+        if 304 == res.status_code and entry is not None:
+            return self.cache.not_modified(url, entry)
+        
+        self.cache.received(url, res, entry)
+        return res.json()
+    
+    def request_json_stream(self, path, nosign=False, chunk_size=65536):
+        """ Perform a request for JSON data against the server's base with the
+        given relative path, without reading the response body up front.
+        The response is closed once its chunks have been consumed or the
+        returned generator is closed.
+        
+        :param str path: The path to append to `base_uri`
+        :param bool nosign: If set to True, the request will not be signed
+        :param int chunk_size: The number of bytes to read per chunk
+        :throws: Exception on HTTP status >= 400
+        :returns: A generator of bytes, the response body in chunks
+        """
+        res = self._get(path, None, nosign, stream=True)
+        
+        def chunks():
+            decoded = 0
+            try:
+                for chunk in res.iter_content(chunk_size):
+                    decoded += len(chunk)
+                    yield chunk
+            finally:
+                res.close()
+                self._count_transfer('received', _wire_bytes(res, decoded), 'received_decoded', decoded)
+        return chunks()
+    
     def request_data(self, path, headers={}, nosign=False):
         """ Perform a data request data against the server's base with the
         given relative path.
@@ -171,73 +590,65 @@ class FHIRServer(object):
         res = self._get(path, None, nosign)
         return res.content
     
-    def _get(self, path, headers={}, nosign=False):
+    def _get(self, path, headers={}, nosign=False, stream=False):
         """ Issues a GET request.
         
+        :param bool stream: If True, the response body is not read up front
+        
         :returns: The response object
         """
         assert self.base_uri and path
-        url = urlparse.urljoin(self.base_uri, path)
-        
         headers = {
             'Accept': FHIRJSONMimeType,
             'Accept-Charset': 'UTF-8',
         }
-        if not nosign and self.auth is not None and self.auth.can_sign_headers():
-            headers = self.auth.signed_headers(headers)
-        
-        # perform the request but intercept 401 responses, raising our own Exception
-        res = self.session.get(url, headers=headers)
-        self.raise_for_status(res)
-        return res
+        return self._request('GET', path, headers, nosign, stream=stream)
     
     def put_json(self, path, resource_json, nosign=False):
         """ Performs a PUT request of the given JSON, which should represent a
         resource, to the given relative path.
         
         :param str path: The path to append to `base_uri`
-        :param dict resource_json: The JSON representing the resource
+        :param resource_json: The JSON dict representing the resource, or a
+            model instance, whose JSON is then sent as a chunked body
         :param bool nosign: If set to True, the request will not be signed
         :throws: Exception on HTTP status >= 400
         :returns: The response object
         """
-        url = urlparse.urljoin(self.base_uri, path)
         headers = {
             'Content-type': FHIRJSONMimeType,
             'Accept': FHIRJSONMimeType,
             'Accept-Charset': 'UTF-8',
         }
-        if not nosign and self.auth is not None and self.auth.can_sign_headers():
-            headers = self.auth.signed_headers(headers)
-        
-        # perform the request but intercept 401 responses, raising our own Exception
-        res = self.session.put(url, headers=headers, data=json.dumps(resource_json))
-        self.raise_for_status(res)
-        return res
+        self._invalidate(path)
+        return self._request('PUT', path, headers, nosign, body=functools.partial(self._json_body, resource_json))
     
     def post_json(self, path, resource_json, nosign=False):
         """ Performs a POST of the given JSON, which should represent a
         resource, to the given relative path.
         
         :param str path: The path to append to `base_uri`
-        :param dict resource_json: The JSON representing the resource
+        :param resource_json: The JSON dict representing the resource, or a
+            model instance, whose JSON is then sent as a chunked body
         :param bool nosign: If set to True, the request will not be signed
         :throws: Exception on HTTP status >= 400
         :returns: The response object
         """
-        url = urlparse.urljoin(self.base_uri, path)
         headers = {
             'Content-type': FHIRJSONMimeType,
             'Accept': FHIRJSONMimeType,
             'Accept-Charset': 'UTF-8',
         }
-        if not nosign and self.auth is not None and self.auth.can_sign_headers():
-            headers = self.auth.signed_headers(headers)
-        
-        # perform the request but intercept 401 responses, raising our own Exception
-        res = self.session.post(url, headers=headers, data=json.dumps(resource_json))
-        self.raise_for_status(res)
-        return res
+        return self._request('POST', path, headers, nosign, body=functools.partial(self._json_body, resource_json))
+    
+    def _json_body(self, resource_json):
+        """ Returns the request body for the given JSON. Model instances are
+        not converted to a dictionary but serialized while sending, via
+        `iter_json()`, which requests sends as a chunked body.
+        """
+        if hasattr(resource_json, 'iter_json'):
+            return (chunk.encode('utf-8') for chunk in resource_json.iter_json())
+        return json.dumps(resource_json)
     
     def post_as_form(self, url, formdata, auth=None):
         """ Performs a POST request with form-data, expecting to receive JSON.
@@ -251,9 +662,7 @@ class FHIRServer(object):
             'Content-Type': 'application/x-www-form-urlencoded; charset=utf-8',
             'Accept': 'application/json',
         }
-        res = self.session.post(url, data=formdata, auth=auth)
-        self.raise_for_status(res)
-        return res
+        return self._request('POST', url, headers, True, data=formdata, auth=auth)
     
     def delete_json(self, path, nosign=False):
         """ Issues a DELETE command against the given relative path, accepting
@@ -263,18 +672,99 @@ class FHIRServer(object):
         :param bool nosign: If set to True, the request will not be signed
         :returns: The response object
         """
-        url = urlparse.urljoin(self.base_uri, path)
         headers = {
             'Accept': FHIRJSONMimeType,
             'Accept-Charset': 'UTF-8',
         }
-        if not nosign and self.auth is not None and self.auth.can_sign_headers():
-            headers = self.auth.signed_headers(headers)
+        self._invalidate(path)
+        return self._request('DELETE', path, headers, nosign)
+    
+    def _invalidate(self, path):
+        url = urlparse.urljoin(self.base_uri, path)
+        if self.cache is not None:
+            self.cache.invalidate(url)
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate(url)
+    
+    def _request(self, method, path, headers, nosign=False, body=None, **kwargs):
+        """ Issues a request against the given path, relative to `base_uri`,
+        signing it unless `nosign` is set and applying the configured
+        timeouts. Failed requests are retried as `retry_policy` decides.
         
-        # perform the request but intercept 401 responses, raising our own Exception
-        res = self.session.delete(url)
-        self.raise_for_status(res)
-        return res
+        :param str method: The HTTP method
+        :param str path: The path to append to `base_uri`, or an absolute URL
+        :param dict headers: The request headers
+        :param bool nosign: If set to True, the request will not be signed
+        :param body: A callable returning the request body, called for each
+            attempt so that streamed bodies can be sent again
+        :param kwargs: Further arguments to `requests.Session.request()`
+        :throws: Exception on HTTP status >= 400
+        :returns: The response object
+        """
+        url = urlparse.urljoin(self.base_uri, path)
+        auth = self.auth
+        if not nosign and auth is not None:
+            auth.refresh_if_needed(self)
+            self._save_deferred_state()
+            if auth.can_sign_headers():
+                headers = auth.signed_headers(headers)
+        
+        if body is not None and self.connection['compress_requests']:
+            headers = dict(headers, **{'Content-Encoding': 'gzip'})
+        
+        policy = self.retry_policy
+        if policy is not None:
+            policy.request_started()
+        attempt = 0
+        while True:
+            if body is not None:
+                kwargs['data'] = self._encode_body(body())
+            try:
+                res = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = policy.retry_delay(method, url, attempt, error=e) if policy is not None else None
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if res.status_code >= 400 and policy is not None:
+                    delay = policy.retry_delay(method, url, attempt, status=res.status_code, headers=res.headers)
+                if delay is None:
+                    # intercept 401 responses, raising our own Exception
+                    self.raise_for_status(res)
+                    if not kwargs.get('stream'):
+                        decoded = len(res.content)
+                        self._count_transfer('received', _wire_bytes(res, decoded), 'received_decoded', decoded)
+                    return res
+                res.close()
+            
+            logger.debug("Retrying {} {} in {:.2f} seconds".format(method, url, delay))
+            time.sleep(delay)
+            attempt += 1
+    
+    def _encode_body(self, data):
+        """ Gzips the given request body if `compress_requests` is set,
+        counting the bytes sent. Bodies given as an iterable of bytes are
+        compressed while they are sent.
+        
+        :param data: The body, a str or an iterable of bytes
+        :returns: The body to send
+        """
+        compress = self.connection['compress_requests']
+        if isinstance(data, bytes) or hasattr(data, 'encode'):
+            raw = data if isinstance(data, bytes) else data.encode('utf-8')
+            encoded = b''.join(_gzip_chunks([raw])) if compress else raw
+            self._count_transfer('sent', len(encoded), 'sent_decoded', len(raw))
+            return encoded
+        
+        def counted(chunks, key):
+            for chunk in chunks:
+                with self._transfer_lock:
+                    self._transfer[key] += len(chunk)
+                yield chunk
+        
+        data = counted(data, 'sent_decoded')
+        return counted(_gzip_chunks(data) if compress else data, 'sent')
     
     def raise_for_status(self, response):
         if response.status_code < 400:
@@ -308,4 +798,4 @@ class FHIRServer(object):
         assert state
         self.base_uri = state.get('base_uri') or self.base_uri
         self.auth = FHIRAuth.create(state.get('auth_type'), state=state.get('auth'))
-    
+
@@ -3,10 +3,22 @@
 
 import os
 import io
+import zlib
+import gzip
 import json
+import time
+import auth
+import email.utils
+import client
 import shutil
 import server
+import requests
 import unittest
+import threading
+import mockserver
+import models.bundle as bundle
+import models.patient as patient
+import models.capabilitystatement as capabilitystatement
 import models.fhirabstractbase as fabst
 
 
@@ -55,6 +67,508 @@ class TestServer(unittest.TestCase):
             self.assertEqual("coding.0:", str(e.errors[2].errors[1].errors[0].errors[0])[:9])
             self.assertEqual("Superfluous entry \"systems\"", str(e.errors[2].errors[1].errors[0].errors[0].errors[0])[:27])
             self.assertEqual("Superfluous entry \"formats\"", str(e.errors[3])[:27])
+    
+    
+    def testStreamedBody(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        fhir = server.FHIRServer(None, base_uri='https://fhir.smarthealthit.org')
+        fhir.session = MockSession()
+        
+        fhir.post_json('Bundle', data)
+        self.assertEqual(data, json.loads(fhir.session.body))
+        
+        b = bundle.Bundle(data)
+        fhir.put_json('Bundle/1', b)
+        self.assertEqual(b'{', fhir.session.chunks[0][:1])
+        self.assertEqual(data, json.loads(fhir.session.body))
+        self.assertEqual('https://fhir.smarthealthit.org/Bundle/1', fhir.session.url)
+        
+        stats = fhir.transfer_stats()
+        self.assertEqual(stats['sent'], stats['sent_decoded'])
+        self.assertEqual(2 * len(fhir.session.body.encode('utf-8')), stats['sent'])
+        
+        # resources send their JSON dictionary, unless asked to stream it,
+        # which validates first
+        pat = patient.Patient(data['entry'][0]['resource'])
+        pat.update(fhir)
+        self.assertFalse(fhir.session.streamed)
+        self.assertEqual(pat.as_json(), json.loads(fhir.session.body))
+        pat.update(fhir, stream=True)
+        self.assertTrue(fhir.session.streamed)
+        self.assertEqual('https://fhir.smarthealthit.org/Patient/{}'.format(pat.id), fhir.session.url)
+        self.assertEqual(b'{', fhir.session.chunks[0][:1])
+        self.assertEqual(pat.as_json(), json.loads(fhir.session.body))
+        
+        pat.id = None
+        pat.name[0].given = 'Luke'
+        with self.assertRaises(fabst.FHIRValidationError):
+            pat.create(fhir, stream=True)
+        with self.assertRaises(fabst.FHIRValidationError):
+            pat.create(fhir)
+        self.assertEqual(['POST', 'PUT', 'PUT', 'PUT'], fhir.session.methods)
+        fhir.session = MockSession()
+        stats = fhir.transfer_stats()
+        
+        # compressed
+        fhir.connection['compress_requests'] = True
+        for method in [fhir.post_json, fhir.put_json]:
+            method('Bundle/1', b)
+            self.assertEqual('gzip', fhir.session.headers['Content-Encoding'])
+            raw = zlib.decompress(b''.join(fhir.session.chunks), 16 + zlib.MAX_WBITS)
+            self.assertEqual(data, json.loads(raw.decode('utf-8')))
+            
+            previous, stats = stats, fhir.transfer_stats()
+            self.assertEqual(len(raw), stats['sent_decoded'] - previous['sent_decoded'])
+            self.assertEqual(sum(len(chunk) for chunk in fhir.session.chunks), stats['sent'] - previous['sent'])
+            self.assertTrue(stats['sent'] - previous['sent'] < len(raw) / 2)
+    
+    def testRetry(self):
+        events = []
+        policy = server.FHIRRetryPolicy(backoff_factor=0, metrics=events.append)
+        fhir = server.FHIRServer(None, base_uri='https://fhir.smarthealthit.org', retry_policy=policy)
+        fhir.session = MockSession([503, (429, {'Retry-After': '0'}), 200])
+        self.assertEqual(200, fhir._get('Patient/1').status_code)
+        self.assertEqual(['GET', 'GET', 'GET'], fhir.session.methods)
+        self.assertEqual([(503, 1), (429, 2)], [(event['status'], event['attempt']) for event in events])
+        self.assertEqual((1, 2, 0), (policy.requests, policy.retries, policy.backoff_time))
+        
+        # POST isn't idempotent
+        fhir.session = MockSession([503])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fhir.post_json('Patient', {'resourceType': 'Patient'})
+        self.assertEqual(1, len(fhir.session.methods))
+        
+        # streamed bodies are sent again
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        fhir.session = MockSession([502, requests.exceptions.ConnectionError()])
+        fhir.put_json('Bundle/1', bundle.Bundle(data))
+        self.assertEqual(3, len(fhir.session.methods))
+        self.assertEqual(data, json.loads(fhir.session.body))
+        self.assertIsInstance(events[-1]['error'], requests.exceptions.ConnectionError)
+        
+        # give up after `total` retries, on long Retry-After and other statuses
+        fhir.session = MockSession([503] * 5)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fhir.delete_json('Patient/1')
+        self.assertEqual(4, len(fhir.session.methods))
+        for response in [(503, {'Retry-After': '3600'}), 501, 404]:
+            fhir.session = MockSession([response])
+            with self.assertRaises(Exception):
+                fhir._get('Patient/1')
+            self.assertEqual(1, len(fhir.session.methods))
+        
+        # stop retrying when the budget is exhausted
+        policy.budget_min = policy.retries
+        policy.budget_ratio = 0
+        fhir.session = MockSession([503])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fhir._get('Patient/1')
+        
+        later = email.utils.formatdate(time.time() + 30, usegmt=True)
+        self.assertAlmostEqual(30, policy.retry_after({'Retry-After': later}), delta=2)
+        self.assertIsNone(policy.retry_after({'Retry-After': 'soon'}))
+    
+    def testReadMany(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        patients = [entry['resource'] for entry in data['entry'] if 'Patient' == entry['resource']['resourceType']]
+        self.assertTrue(len(patients) > 1)
+        ids = ['pat-{}'.format(i) for i in range(len(patients))]
+        for rem_id, pat in zip(ids, patients):
+            pat['id'] = rem_id
+        
+        fhir = MockResourceServer(patients)
+        results = patient.Patient.read_many([ids[1], 'missing', ids[0], ids[1]], fhir, max_workers=3)
+        self.assertEqual([ids[1], None, ids[0], ids[1]], [res.id if res else None for res, err in results])
+        self.assertIsInstance(results[1][1], server.FHIRNotFoundException)
+        self.assertIsNone(results[0][1])
+        self.assertIs(fhir, results[0][0].origin_server)
+        self.assertEqual(ids[0], results[2][0]._local_id)
+        self.assertEqual(3, len(fhir.paths))
+        
+        # fold into an "_id" search if the server supports it
+        shutil.copyfile('test_metadata_valid.json', 'metadata')
+        fhir = MockResourceServer(patients)
+        fhir.get_capability()
+        self.assertFalse(fhir.supports_search_param('Patient', '_id'))
+        fhir._capability.rest[0].resource = [capabilitystatement.CapabilityStatementRestResource({
+            'type': 'Patient',
+            'interaction': [{'code': 'read'}, {'code': 'search-type'}],
+            'searchParam': [{'name': '_id', 'type': 'token'}],
+        })]
+        self.assertTrue(fhir.supports_search_param('Patient', '_id'))
+        
+        fhir.paths = []
+        results = patient.Patient.read_many([ids[1], 'missing', ids[0]], fhir)
+        self.assertEqual([ids[1], None, ids[0]], [res.id if res else None for res, err in results])
+        self.assertIsNone(results[0][0]._owner)
+        self.assertIs(fhir, results[0][0].origin_server)
+        self.assertEqual('Patient?_id={},missing,{}&_count=3'.format(ids[1], ids[0]), fhir.paths[0])
+        self.assertEqual(['Patient/missing'], fhir.paths[1:])
+        
+        # empty ids fail on their own
+        fhir.paths = []
+        results = patient.Patient.read_many([ids[0], '', None, ids[1]], fhir)
+        self.assertEqual([ids[0], None, None, ids[1]], [res.id if res else None for res, err in results])
+        self.assertIsNotNone(results[1][1])
+        self.assertIsNotNone(results[2][1])
+        self.assertIsNone(results[3][1])
+        self.assertEqual(['Patient?_id={},{}&_count=2'.format(ids[0], ids[1])], fhir.paths)
+        
+        # many ids are searched for in chunks
+        many = []
+        for i in range(120):
+            pat = dict(patients[i % len(patients)])
+            pat['id'] = 'many-{}'.format(i)
+            many.append(pat)
+        fhir.resources = dict((pat['id'], pat) for pat in many)
+        fhir.paths = []
+        results = patient.Patient.read_many([pat['id'] for pat in many], fhir)
+        self.assertEqual([pat['id'] for pat in many], [res.id for res, err in results])
+        self.assertEqual(3, len(fhir.paths))
+        self.assertEqual(['_count=50', '_count=50', '_count=20'], [path.split('&')[-1] for path in fhir.paths])
+        self.assertEqual('Patient?_id=many-100,', fhir.paths[2][:21])
+    
+    
+    def testSearchPaging(self):
+        with io.open('test_bundle.json', 'r', encoding='utf-8') as h:
+            data = json.load(h)
+        resources = [entry['resource'] for entry in data['entry']]
+        search = patient.Patient.where({'name': 'Darth'})
+        
+        for prefetch in [False, True]:
+            fhir = MockPagingServer(resources, 2)
+            found = list(search.perform_iter(fhir, count=2, prefetch=prefetch))
+            self.assertEqual(resources, [res.as_json() for res in found])
+            self.assertEqual(['Patient?name=Darth&_count=2', 'Patient?page=1', 'Patient?page=2'], fhir.paths)
+            self.assertIs(fhir, found[0].origin_server)
+        
+        # stop early, without requesting further pages
+        fhir = MockPagingServer(resources, 2)
+        found = list(search.perform_iter(fhir, max_results=2, prefetch=True))
+        self.assertEqual(2, len(found))
+        self.assertEqual(['Patient?name=Darth'], fhir.paths)
+        
+        fhir = MockPagingServer(resources, 2)
+        found = list(search.perform_iter(fhir, max_results=3, lazy=True, trusted=True))
+        self.assertEqual(resources[:3], [res.as_json() for res in found])
+        self.assertEqual(2, len(fhir.paths))
+        
+        fhir = MockPagingServer(resources, 2)
+        fhir.fail = 'Patient?page=2'
+        pages = search.perform_iter(fhir, prefetch=True)
+        self.assertEqual(4, len([next(pages) for i in range(4)]))
+        with self.assertRaises(server.FHIRNotFoundException):
+            next(pages)
+        
+        # absolute links are followed on the server only, and not to the same page
+        fhir = MockPagingServer(resources, 2)
+        fhir.next_link = 'HTTPS://FHIR.smarthealthit.org/Patient?page={}'
+        self.assertEqual(resources, [res.as_json() for res in search.perform_iter(fhir)])
+        self.assertEqual(['Patient?name=Darth', 'Patient?page=1', 'Patient?page=2'], fhir.paths)
+        
+        fhir = MockPagingServer(resources, 2)
+        fhir.next_link = 'https://fhir.smarthealthit.org/Patient?name=Darth&_count=2'
+        self.assertEqual(2, len(list(search.perform_iter(fhir, count=2))))
+        self.assertEqual(['Patient?name=Darth&_count=2'], fhir.paths)
+        
+        for next_link in ['https://evil.example.org/Patient?page={}', '//evil.example.org/Patient?page={}', 'https://fhir.smarthealthit.org.evil/Patient?page={}']:
+            fhir = MockPagingServer(resources, 2)
+            fhir.next_link = next_link
+            with self.assertRaises(Exception):
+                list(search.perform_iter(fhir, prefetch=True))
+            self.assertEqual(['Patient?name=Darth'], fhir.paths)
+    
+    
+    def testConnectionSettings(self):
+        httpd = mockserver.MockServer(MockHandler)
+        settings = {
+            'app_id': 'test',
+            'api_base': httpd.base_uri,
+            'pool_maxsize': 2,
+            'read_timeout': 0.2,
+        }
+        try:
+            smart = client.FHIRClient(settings=settings)
+            fhir = smart.server
+            self.assertEqual((10, 0.2), fhir.timeout)
+            self.assertEqual({}, fhir.pool_stats())
+            self.assertEqual({'id': 'fast'}, fhir.request_json('fast'))
+            self.assertEqual({'id': 'fast'}, fhir.request_json('fast'))
+            stats = fhir.pool_stats()['http://127.0.0.1:{}'.format(httpd.port)]
+            self.assertEqual({'maxsize': 2, 'in_use': 0, 'idle': 1, 'connections': 1, 'requests': 2}, stats)
+            self.assertEqual('keep-alive', MockHandler.connection)
+            
+            # compressed responses
+            stats = fhir.transfer_stats()
+            big = fhir.request_json('big')
+            self.assertEqual(1000, len(big['entry']))
+            previous, stats = stats, fhir.transfer_stats()
+            decoded = stats['received_decoded'] - previous['received_decoded']
+            self.assertEqual(len(json.dumps(big).encode('utf-8')), decoded)
+            self.assertTrue(stats['received'] - previous['received'] < decoded / 10)
+            
+            big = json.loads(b''.join(fhir.request_json_stream('big', chunk_size=100)).decode('utf-8'))
+            self.assertEqual(1000, len(big['entry']))
+            previous, stats = stats, fhir.transfer_stats()
+            self.assertEqual(decoded, stats['received_decoded'] - previous['received_decoded'])
+            self.assertTrue(stats['received'] - previous['received'] < decoded / 10)
+            
+            fhir.retry_policy = None
+            with self.assertRaises(requests.exceptions.Timeout):
+                fhir.request_json('slow')
+            
+            # settings are not part of the state, but apply when passed along
+            self.assertNotIn('connection', smart.state['server'])
+            self.assertEqual(10, client.FHIRClient(state=smart.state).server.connection['pool_maxsize'])
+            fhir = client.FHIRClient(settings=settings, state=smart.state).server
+            self.assertEqual(2, fhir.connection['pool_maxsize'])
+            state = dict(fhir.state, connection={'read_timeout': 5, 'pool_maxsize': 10})
+            fhir = server.FHIRServer(None, state=state, connection={'read_timeout': 99, 'pool_maxsize': 64})
+            self.assertEqual((10, 99), fhir.timeout)
+            self.assertEqual(64, fhir.connection['pool_maxsize'])
+            fhir.connection['keep_alive'] = False
+            fhir.session = fhir._create_session()
+            fhir.request_json('fast')
+            self.assertEqual('close', MockHandler.connection)
+        finally:
+            httpd.close()
+    
+    def testThreadSafeMode(self):
+        httpd = mockserver.MockServer(MockHandler)
+        settings = {
+            'app_id': 'test',
+            'api_base': httpd.base_uri,
+            'pool_maxsize': 4,
+            'pool_block': True,
+            'thread_safe': True,
+        }
+        saved = []
+        try:
+            smart = client.FHIRClient(settings=settings, save_func=saved.append)
+            fhir = smart.server
+            fhir.auth = auth.FHIROAuth2Auth({'access_token': 'secret'})
+            sessions = {}
+            errors = []
+            def work(i):
+                try:
+                    for j in range(5):
+                        self.assertEqual({'id': 'fast'}, fhir.request_json('fast'))
+                    sessions[i] = fhir.session
+                    smart.save_state()
+                except Exception as e:
+                    errors.append(e)
+            threads = [threading.Thread(target=work, args=(i,)) for i in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+            self.assertEqual([], errors)
+            
+            # own sessions, shared connection pools
+            self.assertEqual(16, len(set(id(session) for session in sessions.values())))
+            self.assertEqual(1, len(set(id(session.adapters['http://']) for session in sessions.values())))
+            stats = fhir.pool_stats()['http://127.0.0.1:{}'.format(httpd.port)]
+            self.assertEqual(80, stats['requests'])
+            self.assertTrue(stats['connections'] <= 4)
+            self.assertEqual(1, len(saved))
+            self.assertEqual({'requests': 16, 'writes': 1, 'unchanged': 15, 'saved': 15}, smart.save_stats)
+            self.assertTrue(client.FHIRClient(settings=settings, state=saved[-1]).server.connection['thread_safe'])
+            
+            # an assigned session is used by all threads
+            fhir.session = fhir._create_session()
+            other = []
+            thread = threading.Thread(target=lambda: other.append(fhir.session))
+            thread.start()
+            thread.join()
+            self.assertIs(fhir.session, other[0])
+        finally:
+            httpd.close()
+    
+    def testTokenRefresh(self):
+        fhir = MockTokenServer()
+        oauth = auth.FHIROAuth2Auth({'app_id': 'app', 'token_uri': 'https://auth.org/token', 'refresh_token': 'r0'})
+        fhir.auth = oauth
+        
+        # concurrent refreshes share one token request
+        fhir.release.clear()
+        threads = [threading.Thread(target=oauth.reauthorize, args=(fhir,)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        fhir.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(1, len(fhir.forms))
+        self.assertEqual('refresh_token', fhir.forms[0]['grant_type'])
+        self.assertEqual('token-1', oauth.access_token)
+        self.assertAlmostEqual(time.time() + 3600, oauth.expires_at, delta=5)
+        
+        state = server.FHIRServer(None, state=fhir.state).auth
+        self.assertEqual((oauth.expires_at, 60), (state.expires_at, state.refresh_skew))
+        
+        # refreshed ahead of expiry in the background, right away once expired
+        fhir.request_json('Patient/1')
+        self.assertEqual(1, len(fhir.forms))
+        oauth.expires_at = time.time() + 30
+        fhir.release.clear()
+        fhir.request_json('Patient/1')
+        self.assertEqual('Bearer token-1', fhir.session.headers['Authorization'])
+        fhir.release.set()
+        for i in range(100):
+            if 'token-2' == oauth.access_token and not oauth._refreshing_in_background:
+                break
+            time.sleep(0.02)
+        self.assertEqual(2, len(fhir.forms))
+        
+        # the refreshed state is saved by the next request, on its thread
+        self.assertEqual([], fhir.saved)
+        fhir.request_json('Patient/1')
+        self.assertEqual([threading.current_thread()], fhir.saved)
+        fhir.request_json('Patient/1')
+        self.assertEqual(1, len(fhir.saved))
+        
+        oauth.expires_at = time.time() - 1
+        fhir.request_json('Patient/1')
+        self.assertEqual(3, len(fhir.forms))
+        self.assertEqual('Bearer token-3', fhir.session.headers['Authorization'])
+        self.assertEqual(2, len(fhir.saved))
+        
+        oauth.refresh_skew = 0
+        oauth.expires_at = time.time() + 30
+        fhir.request_json('Patient/1')
+        self.assertEqual(3, len(fhir.forms))
+
+
+class MockHandler(mockserver.MockHandler):
+    """ Answers with JSON, gzipped for "/big", or not at all within the
+    tests' read timeout on "/slow".
+    """
+    connection = None
+    
+    def do_GET(self):
+        MockHandler.connection = self.headers.get('Connection')
+        if '/slow' == self.path:
+            time.sleep(0.5)
+            return
+        if '/big' != self.path or 'gzip' not in self.headers.get('Accept-Encoding', ''):
+            return self.respond(200, {'id': self.path[1:]})
+        body = json.dumps({'entry': [{'fullUrl': 'Patient/{}'.format(i)} for i in range(1000)]}).encode('utf-8')
+        body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Type', 'application/fhir+json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockSession(object):
+    """ Records request bodies, consuming them like requests does. Answers
+    with the given responses in turn: status codes, (status code, headers)
+    tuples or exceptions to raise; with status 201 once they run out.
+    """
+    
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.methods = []
+    
+    def request(self, method, url, headers=None, data=None, timeout=None, stream=False):
+        self.methods.append(method)
+        self.url = url
+        self.headers = headers
+        self.streamed = data is not None and not isinstance(data, bytes)
+        if data is None:
+            self.chunks = []
+        elif isinstance(data, bytes):
+            self.chunks = [data]
+        else:
+            self.chunks = list(data)
+        if 'Content-Encoding' not in (headers or {}):
+            self.body = b''.join(self.chunks).decode('utf-8')
+        
+        response = self.responses.pop(0) if len(self.responses) > 0 else 201
+        if isinstance(response, Exception):
+            raise response
+        if isinstance(response, tuple):
+            return MockResponse(*response)
+        return MockResponse(response)
+
+
+class MockResponse(object):
+    text = ''
+    content = b''
+    
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+    
+    def close(self):
+        pass
+    
+    def raise_for_status(self):
+        raise requests.exceptions.HTTPError(self.status_code)
+
+
+class MockResourceServer(server.FHIRServer):
+    """ Serves the given resources by id, and searches over them by "_id".
+    """
+    
+    def __init__(self, resources):
+        super().__init__(None, base_uri='https://fhir.smarthealthit.org')
+        self.resources = dict((res['id'], res) for res in resources)
+        self.paths = []
+    
+    def request_json(self, path, nosign=False):
+        self.paths.append(path)
+        if 'metadata' == path:
+            with io.open(path, encoding='utf-8') as handle:
+                return json.load(handle)
+        rem_id = path.split('/')[-1]
+        if rem_id not in self.resources:
+            raise server.FHIRNotFoundException(None)
+        return self.resources[rem_id]
+    
+    def request_json_stream(self, path, nosign=False):
+        self.paths.append(path)
+        ids = path.split('_id=')[1].split('&')[0].split(',')
+        entries = [{'resource': self.resources[rem_id]} for rem_id in ids if rem_id in self.resources]
+        yield json.dumps({'resourceType': 'Bundle', 'type': 'searchset', 'entry': entries}).encode('utf-8')
+
+
+class MockPagingServer(server.FHIRServer):
+    """ Serves the given resources as searchset Bundles of `page_size`
+    entries, linked by "next" links formatted from `next_link`.
+    """
+    
+    def __init__(self, resources, page_size):
+        super().__init__(None, base_uri='https://fhir.smarthealthit.org')
+        self.resources = resources
+        self.page_size = page_size
+        self.paths = []
+        self.fail = None
+        self.next_link = 'Patient?page={}'
+        self.lock = threading.Lock()
+    
+    def request_json(self, path, nosign=False):
+        with self.lock:
+            self.paths.append(path)
+        if self.fail == path:
+            raise server.FHIRNotFoundException(None)
+        page = int(path.split('page=')[1]) if 'page=' in path else 0
+        start = page * self.page_size
+        bundle = {
+            'resourceType': 'Bundle',
+            'type': 'searchset',
+            'total': len(self.resources),
+            'link': [{'relation': 'self', 'url': path}],
+            'entry': [{'resource': res} for res in self.resources[start:start + self.page_size]],
+        }
+        if start + self.page_size < len(self.resources):
+            bundle['link'].append({'relation': 'next', 'url': self.next_link.format(page + 1)})
+        return bundle
 
 
 class MockServer(server.FHIRServer):
@@ -70,4 +584,33 @@ class MockServer(server.FHIRServer):
             return json.load(handle)
         
         return None
+
+
+
+class MockTokenServer(server.FHIRServer):
+    """ Answers token requests with a new access token once `release` is
+    set, recording the forms posted, and resource requests with 200.
+    Records the threads saving state.
+    """
+    
+    def __init__(self):
+        super().__init__(None, base_uri='https://fhir.smarthealthit.org')
+        self.session = MockSession([(200, {'Content-Type': 'application/fhir+json'})] * 10)
+        self.forms = []
+        self.saved = []
+        self.release = threading.Event()
+        self.release.set()
+    
+    def post_as_form(self, url, formdata, auth=None):
+        self.release.wait(5)
+        self.forms.append(formdata)
+        response = MockResponse(200)
+        token = 'token-{}'.format(len(self.forms))
+        response.json = lambda: {'access_token': token, 'expires_in': 3600, 'refresh_token': 'r1'}
+        return response
     
+    def should_save_state(self):
+        self.saved.append(threading.current_thread())
+    
+    def request_json(self, path, nosign=False):
+        return self._request('GET', path, {'Accept': server.FHIRJSONMimeType}, nosign)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import logging
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+
+class FHIRStateSaver(object):
+    """ Calls a save function with the current state only when it changed
+    since it was last saved, and once for any number of changes made within
+    `deferred()`, e.g. while handling one web request. Deferring applies to
+    the calling thread only, so threads handling other requests keep saving
+    their changes right away.
+    """
+    
+    def __init__(self, save_func, state_func):
+        """ Initializer.
+        
+        :param save_func: Called with the state dictionary to persist
+        :param state_func: Returns the current state dictionary
+        """
+        self.save_func = save_func
+        """ The function persisting the state. """
+        
+        self.state_func = state_func
+        """ The function returning the current state. """
+        
+        self.requests = 0
+        """ The number of times saving was asked for. """
+        
+        self.writes = 0
+        """ The number of times `save_func` was called. """
+        
+        self.unchanged = 0
+        """ The number of writes skipped because the state was unchanged. """
+        
+        self.last_changes = []
+        """ The dotted paths of the state entries changed by the last write. """
+        
+        self._saved = None
+        self._deferral = threading.local()
+        self._lock = threading.RLock()
+    
+    @property
+    def stats(self):
+        """ The statistics as a dictionary; `saved` is the number of writes
+        saved by skipping unchanged states and coalescing deferred changes.
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'writes': self.writes,
+                'unchanged': self.unchanged,
+                'saved': self.requests - self.writes,
+            }
+    
+    def mark_saved(self, state):
+        """ Records the given state as persisted without calling
+        `save_func`, e.g. the state a client was restored from.
+        """
+        with self._lock:
+            self._saved = copy.deepcopy(state)
+    
+    def changed(self):
+        """ Call when the state may have changed; saves it unless saving is
+        deferred.
+        """
+        deferral = self._deferral
+        with self._lock:
+            self.requests += 1
+            if getattr(deferral, 'depth', 0) > 0:
+                deferral.pending = True
+            else:
+                self._write()
+    
+    @contextlib.contextmanager
+    def deferred(self):
+        """ A context manager holding back the calling thread's saves until
+        its outermost `deferred()` block is left, then saving once if needed.
+        """
+        deferral = self._deferral
+        deferral.depth = getattr(deferral, 'depth', 0) + 1
+        try:
+            yield self
+        finally:
+            deferral.depth -= 1
+            if 0 == deferral.depth and getattr(deferral, 'pending', False):
+                deferral.pending = False
+                with self._lock:
+                    self._write()
+    
+    def _write(self):
+        state = self.state_func()
+        if state == self._saved:
+            self.unchanged += 1
+            return
+        
+        self.last_changes = _changes(self._saved, state)
+        logger.debug("Saving state, changed: {0}".format(', '.join(self.last_changes)))
+        self.save_func(state)
+        self._saved = copy.deepcopy(state)
+        self.writes += 1
+
+
+def _changes(old, new, prefix=''):
+    """ The dotted paths of the entries that differ between the given
+    dictionaries, descending into nested dictionaries.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [prefix or '.']
+    
+    changes = []
+    for key in sorted(set(old.keys()) | set(new.keys()), key=str):
+        if old.get(key) != new.get(key) or (key in old) != (key in new):
+            path = '{0}.{1}'.format(prefix, key) if prefix else str(key)
+            if isinstance(old.get(key), dict) and isinstance(new.get(key), dict):
+                changes.extend(_changes(old[key], new[key], path))
+            else:
+                changes.append(path)
+    return changes
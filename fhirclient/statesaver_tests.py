@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import client
+import logging
+import unittest
+import threading
+import statesaver
+
+
+logging.basicConfig(level=logging.CRITICAL)
+
+
+class TestStateSaver(unittest.TestCase):
+    
+    def setUp(self):
+        self.settings = {
+            'app_id': 'test',
+            'api_base': 'https://fhir.example.org/',
+        }
+    
+    def testUnchanged(self):
+        saved = []
+        smart = client.FHIRClient(settings=self.settings, save_func=saved.append)
+        smart.save_state()
+        smart.save_state()
+        self.assertEqual(1, len(saved))
+        smart.patient_id = '1'
+        smart.save_state()
+        self.assertEqual(2, len(saved))
+        self.assertEqual('1', saved[-1]['patient_id'])
+        self.assertEqual(['patient_id'], smart._state_saver.last_changes)
+        self.assertEqual({'requests': 3, 'writes': 2, 'unchanged': 1, 'saved': 1}, smart.save_stats)
+        
+        # restored clients don't save the state they were restored from
+        restored = client.FHIRClient(state=saved[-1], save_func=saved.append)
+        restored.save_state()
+        self.assertEqual(2, len(saved))
+        restored.reset_patient()
+        self.assertEqual(3, len(saved))
+        self.assertIsNone(saved[-1]['patient_id'])
+    
+    def testDeferred(self):
+        saved = []
+        smart = client.FHIRClient(settings=self.settings, save_func=saved.append)
+        with smart.deferred_save():
+            smart.patient_id = '1'
+            smart.save_state()
+            with smart.deferred_save():
+                smart.launch_context = {'patient': '1'}
+                smart.save_state()
+            self.assertEqual([], saved)
+            smart.save_state()
+        self.assertEqual(1, len(saved))
+        self.assertEqual({'patient': '1'}, saved[0]['launch_context'])
+        self.assertEqual({'requests': 3, 'writes': 1, 'unchanged': 0, 'saved': 2}, smart.save_stats)
+        
+        # nothing saved when nothing asked to be, or nothing changed
+        with smart.deferred_save():
+            pass
+        with smart.deferred_save():
+            smart.save_state()
+        self.assertEqual(1, len(saved))
+    
+    def testDeferredPerThread(self):
+        saved = []
+        smart = client.FHIRClient(settings=self.settings, save_func=saved.append)
+        entered = threading.Event()
+        release = threading.Event()
+        def handle():
+            with smart.deferred_save():
+                smart.patient_id = '1'
+                smart.save_state()
+                entered.set()
+                release.wait(5)
+        thread = threading.Thread(target=handle)
+        thread.start()
+        entered.wait(5)
+        
+        # another thread's deferral neither holds back nor flushes this one's saves
+        smart.launch_context = {'patient': '1'}
+        smart.save_state()
+        self.assertEqual(1, len(saved))
+        with smart.deferred_save():
+            pass
+        self.assertEqual(1, len(saved))
+        release.set()
+        thread.join(5)
+        self.assertEqual(1, len(saved))
+        self.assertEqual({'requests': 2, 'writes': 1, 'unchanged': 1, 'saved': 1}, smart.save_stats)
+    
+    def testChanges(self):
+        old = {'a': 1, 'server': {'auth': {'access_token': 'x', 'scope': 's'}}}
+        new = {'a': 1, 'b': None, 'server': {'auth': {'access_token': 'y', 'scope': 's'}}}
+        self.assertEqual(['b', 'server.auth.access_token'], statesaver._changes(old, new))
+        self.assertEqual(['.'], statesaver._changes(None, new))
@@ -22,7 +22,7 @@ def _save_state(state):
 def _get_smart():
     state = session.get('state')
     if state:
-        return client.FHIRClient(state=state, save_func=_save_state)
+        return client.FHIRClient(settings=smart_defaults, state=state, save_func=_save_state)
     else:
         return client.FHIRClient(settings=smart_defaults, save_func=_save_state)
 
@@ -42,9 +42,11 @@ def _get_prescriptions(smart):
         return pres
     return None
 
-def _get_medication_by_ref(ref, smart):
-    med_id = ref.split("/")[1]
-    return Medication.read(med_id, smart.server).code
+def _get_medications_by_ref(prescriptions, smart):
+    refs = [p.medicationReference.reference for p in prescriptions
+        if p.medicationCodeableConcept is None and p.medicationReference is not None]
+    meds = Medication.read_many([ref.split("/")[1] for ref in refs], smart.server)
+    return dict((ref, med.code) for ref, (med, error) in zip(refs, meds) if med is not None)
 
 def _med_name(med):
     if med.coding:
@@ -55,12 +57,12 @@ def _med_name(med):
         return med.text
     return "Unnamed Medication(TM)"
 
-def _get_med_name(prescription, client=None):
+def _get_med_name(prescription, meds=None):
     if prescription.medicationCodeableConcept is not None:
         med = prescription.medicationCodeableConcept
         return _med_name(med)
-    elif prescription.medicationReference is not None and client is not None:
-        med = _get_medication_by_ref(prescription.medicationReference.reference, client)
+    elif prescription.medicationReference is not None and meds is not None and prescription.medicationReference.reference in meds:
+        med = meds[prescription.medicationReference.reference]
         return _med_name(med)
     else:
         return 'Error: medication not found'
@@ -82,7 +84,8 @@ def index():
         body += "<p>You are authorized and ready to make API requests for <em>{0}</em>.</p>".format(name)
         pres = _get_prescriptions(smart)
         if pres is not None:
-            body += "<p>{0} prescriptions: <ul><li>{1}</li></ul></p>".format("His" if 'male' == smart.patient.gender else "Her", '</li><li>'.join([_get_med_name(p,smart) for p in pres]))
+            meds = _get_medications_by_ref(pres, smart)
+            body += "<p>{0} prescriptions: <ul><li>{1}</li></ul></p>".format("His" if 'male' == smart.patient.gender else "Her", '</li><li>'.join([_get_med_name(p,meds) for p in pres]))
         else:
             body += "<p>(There are no prescriptions for {0})</p>".format("him" if 'male' == smart.patient.gender else "her")
         body += """<p><a href="/logout">Change patient</a></p>"""
@@ -102,7 +105,8 @@ def callback():
     """
     smart = _get_smart()
     try:
-        smart.handle_callback(request.url)
+        with smart.deferred_save():
+            smart.handle_callback(request.url)
     except Exception as e:
         return """<h1>Authorization Error</h1><p>{0}</p><p><a href="/">Start over</a></p>""".format(e)
     return redirect('/')
@@ -38,6 +38,7 @@ setup(
     author_email='support@smarthealthit.org',
     packages=find_packages(exclude=['test*', '*_tests.py']),
     install_requires=['requests', 'isodate'],
+    extras_require={'async': ['aiohttp'], 'jwt': ['pyjwt[crypto]']},
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',